@@ -0,0 +1,6 @@
+"""------------------------------
+Module: ./benchmarks/__init__.py
+Description: Benchmarks of jaldh on synthetic source trees, see benchmarks/__main__.py.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
@@ -0,0 +1,89 @@
+"""------------------------------
+Module: ./benchmarks/__main__.py
+Description: Command line of the benchmarks, run from the repository root with python -m benchmarks.
+Notes: <Special remarks or dependencies>
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.bench import compare, run_benchmarks
+from benchmarks.corpus import CorpusSpec
+from benchmarks.cparse import format_cparse, measure_cparse
+from benchmarks.startup import format_startup, measure_startup
+
+
+def main():
+    """
+    Runs the benchmarks and writes the JSON report, or compares two reports.
+
+    Exits with 1 if the import time of jaldh or the C scanner exceeds its budget, see
+    benchmarks/startup.py and benchmarks/cparse.py.
+    """
+    defaults = CorpusSpec()
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='jaldh benchmarks')
+    parser.add_argument('--files', type=int, default=defaults.files, help='Number of generated source files')
+    parser.add_argument('--depth', type=int, default=defaults.depth, help='Directory levels of the corpus')
+    parser.add_argument('--functions', type=int, default=defaults.functions, help='Average functions per file')
+    parser.add_argument('--documented', type=float, default=defaults.documented,
+                        help='Share of already documented files and functions (0..1)')
+    parser.add_argument('--long-line-files', type=int, default=defaults.long_line_files,
+                        help='Files with pathological long lines')
+    parser.add_argument('--long-line-words', type=int, default=defaults.long_line_words, help='Words per long line')
+    parser.add_argument('--seed', type=int, default=defaults.seed, help='Random seed of the corpus')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark, the fastest is reported')
+    parser.add_argument('--workdir', help='Keep corpus and outputs in this directory')
+    parser.add_argument('--output', '-o', metavar='FILE', help='Write the JSON report to FILE instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two JSON reports and exit')
+    parser.add_argument('--startup', action='store_true',
+                        help='Only check the import time budget of jaldh (python -X importtime) and exit')
+    parser.add_argument('--cparse', action='store_true',
+                        help='Only check the C scanner against the line regex budget and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path, 'r', encoding='utf-8') as f:
+                reports.append(json.load(f))
+        print(compare(*reports))
+        return
+
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1.")
+
+    if args.startup:
+        startup = measure_startup(max(args.repeat, 5))
+        print(format_startup(startup))
+        sys.exit(0 if all(result['passed'] for result in startup.values()) else 1)
+
+    if args.cparse:
+        cparse = measure_cparse(max(args.repeat, 5))
+        print(format_cparse(cparse))
+        sys.exit(0 if all(result['passed'] for result in cparse.values()) else 1)
+
+    spec = CorpusSpec(files=args.files, depth=args.depth, functions=args.functions, documented=args.documented,
+                      long_line_files=args.long_line_files, long_line_words=args.long_line_words, seed=args.seed)
+    report = run_benchmarks(spec, repeat=args.repeat, workdir=args.workdir)
+    report['startup'] = measure_startup(max(args.repeat, 5))
+    report['cparse'] = measure_cparse(max(args.repeat, 5))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        for name, result in report['results'].items():
+            print(f"{name:32} {result['files_per_s']:>10} files/s {result['mb_per_s']:>10} MB/s", file=sys.stderr)
+    else:
+        print(text)
+    print(format_startup(report['startup']), file=sys.stderr)
+    print(format_cparse(report['cparse']), file=sys.stderr)
+    if not all(result['passed'] for section in ('startup', 'cparse') for result in report[section].values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
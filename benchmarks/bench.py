@@ -0,0 +1,219 @@
+"""------------------------------
+Module: ./benchmarks/bench.py
+Description: Times the phases of jaldh on a synthetic corpus and reports files/s and MB/s.
+Notes: Every benchmark runs repeat times and the fastest run is reported. The end-to-end run
+    works on a fresh copy of the corpus each time, copying is not timed. MB are 10^6 bytes of
+    source read by the phase. Reports are plain JSON, compare() puts two of them side by side.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import contextlib
+import copy
+import io
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import yaml
+
+import jaldh
+from core import jaldh_codeparser, jaldh_logger
+from core.jaldh_config import DEFAULT_CONFIG
+from core.jaldh_docwriter import extract_headers_and_write_doc
+from core.jaldh_parsecache import PARSE_CACHE
+
+from benchmarks.corpus import CorpusSpec, generate_corpus
+
+REPORT_SCHEMA = 1
+
+# Files each parse_* function of core.jaldh_codeparser is benchmarked on, and how it is called
+PARSE_FUNCTIONS = {
+    'parse_python_functions': (('.py',), lambda parse, content, path, config: parse(content, config, path)),
+    'parse_c_functions': (('.c', '.h', '.cpp', '.hpp', '.cc'),
+                          lambda parse, content, path, config: parse(content, config, path,
+                                                                     classes=path.endswith(('.h', '.hpp')))),
+    'parse_cpp_classes': (('.h', '.hpp'), lambda parse, content, path, config: parse(content, config)),
+}
+
+
+def git_commit() -> Optional[str]:
+    """Returns the commit of the working tree the benchmark runs on, if it is a git checkout."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(jaldh.__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def measure(function: Callable[[], None], repeat: int, setup: Optional[Callable[[], None]] = None) -> List[float]:
+    """
+    Runs a function repeat times.
+
+    Parameters:
+        function (Callable[[], None]): The timed code.
+        repeat (int): Number of runs.
+        setup (Optional[Callable[[], None]]): Untimed preparation before each run.
+
+    Returns:
+        List[float]: The run times in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def result_entry(files: int, size: int, times: List[float]) -> Dict:
+    """Builds the report entry of a benchmark from its fastest run."""
+    best = min(times)
+    return {
+        'files': files,
+        'bytes': size,
+        'seconds': round(best, 6),
+        'runs': [round(t, 6) for t in times],
+        'files_per_s': round(files / best, 1) if best else None,
+        'mb_per_s': round(size / 1e6 / best, 3) if best else None,
+    }
+
+
+def run_benchmarks(spec: CorpusSpec = CorpusSpec(), repeat: int = 3, workdir: Optional[str] = None) -> Dict:
+    """
+    Generates a corpus and times all benchmarks on it.
+
+    Parameters:
+        spec (CorpusSpec): Corpus parameters.
+        repeat (int): Runs per benchmark, the fastest is reported.
+        workdir (Optional[str]): Directory for the corpus and outputs, a temporary directory is used
+            and removed afterwards if None.
+
+    Returns:
+        Dict: The report, see REPORT_SCHEMA.
+    """
+    cleanup = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix='jaldh-bench-')
+    logfile = jaldh_logger.logfile
+    try:
+        corpus_dir = os.path.join(workdir, 'corpus')
+        if os.path.exists(corpus_dir):
+            shutil.rmtree(corpus_dir)
+        summary = generate_corpus(corpus_dir, spec)
+
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        config['logging']['path'] = os.path.join(workdir, 'jaldh.log')
+        config_path = os.path.join(workdir, 'config.yaml')
+        with open(config_path, 'w') as f:
+            yaml.dump(config, f)
+
+        results = {}
+
+        # Collecting the files
+        targets = []
+
+        def run_collect():
+            targets[:] = jaldh.collect_files(corpus_dir, True, config)
+
+        times = measure(run_collect, repeat)
+        sizes = {path: os.path.getsize(path) for path in targets}
+        results['collect_files'] = result_entry(len(targets), sum(sizes.values()), times)
+
+        # Parsing, on contents already in memory
+        contents = {}
+        for path in targets:
+            with open(path, 'r', encoding='utf-8') as f:
+                contents[path] = f.read()
+        for name, (extensions, call) in PARSE_FUNCTIONS.items():
+            parse = getattr(jaldh_codeparser, name, None)
+            if parse is None:
+                continue
+            selected = [path for path in targets if path.endswith(extensions)]
+
+            def run_parse():
+                for path in selected:
+                    call(parse, contents[path], path, config)
+
+            times = measure(run_parse, repeat)
+            results[name] = result_entry(len(selected), sum(sizes[path] for path in selected), times)
+
+        # Documentation extraction
+        doc_path = os.path.join(workdir, 'doc.txt')
+        with contextlib.redirect_stdout(io.StringIO()):
+            times = measure(lambda: extract_headers_and_write_doc(targets, doc_path), repeat)
+        results['extract_headers_and_write_doc'] = result_entry(len(targets), sum(sizes.values()), times)
+
+        # End to end on a fresh copy of the corpus
+        run_dir = os.path.join(workdir, 'run')
+
+        def fresh_copy():
+            if os.path.exists(run_dir):
+                shutil.rmtree(run_dir)
+            shutil.copytree(corpus_dir, run_dir, symlinks=True)
+            # Every run starts cold, like a new process would
+            PARSE_CACHE.clear()
+
+        def run_main():
+            argv = sys.argv
+            sys.argv = ['jaldh.py', '-s', run_dir, '-r', '-c', config_path]
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    jaldh.main()
+            finally:
+                sys.argv = argv
+
+        times = measure(run_main, repeat, setup=fresh_copy)
+        results['main'] = result_entry(len(targets), sum(sizes.values()), times)
+
+        return {
+            'schema': REPORT_SCHEMA,
+            'version': jaldh.VERSION,
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'corpus': dict(spec._asdict(), **summary),
+            'results': results,
+        }
+    finally:
+        # The runs log into the work directory, flush before it goes away
+        jaldh_logger.log2File()
+        jaldh_logger.configure({'path': logfile})
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(old: Dict, new: Dict) -> str:
+    """
+    Formats two reports side by side.
+
+    Parameters:
+        old (Dict): The baseline report.
+        new (Dict): The report to compare.
+
+    Returns:
+        str: A table of MB/s per benchmark and the speedup of new over old.
+    """
+    if old.get('corpus') != new.get('corpus'):
+        note = 'Note: the reports were measured on different corpora\n'
+    else:
+        note = ''
+    lines = [f"{'benchmark':32} {old.get('commit') or 'old':>12} {new.get('commit') or 'new':>12}  speedup",
+             f"{'':32} {'MB/s':>12} {'MB/s':>12}"]
+    for name in dict.fromkeys(list(old['results']) + list(new['results'])):
+        before = old['results'].get(name, {}).get('seconds')
+        after = new['results'].get(name, {}).get('seconds')
+        before_rate = old['results'].get(name, {}).get('mb_per_s')
+        after_rate = new['results'].get(name, {}).get('mb_per_s')
+        speedup = f'{before / after:6.2f}x' if before and after else '      -'
+        lines.append(f"{name:32} {before_rate if before_rate is not None else '-':>12} "
+                     f"{after_rate if after_rate is not None else '-':>12}  {speedup}")
+    return note + '\n'.join(lines)
@@ -0,0 +1,157 @@
+"""------------------------------
+Module: ./benchmarks/corpus.py
+Description: Generates reproducible synthetic source trees for the benchmarks.
+Notes: The same parameters and seed always produce the same tree, byte for byte. Files are
+    spread over a directory tree of the given depth, a share of them is already documented
+    and a few contain pathological long lines.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import os
+import random
+from typing import Dict, List, NamedTuple
+
+# Share of the generated files per extension
+EXTENSION_WEIGHTS = {'.py': 4, '.c': 3, '.h': 2, '.cpp': 2, '.hpp': 1}
+
+SEPARATOR = '------------------------------'
+
+TYPES = ('int', 'unsigned int', 'long', 'double', 'char *', 'const char *', 'size_t', 'uint32_t', 'void *')
+WORDS = ('value', 'count', 'buffer', 'index', 'offset', 'length', 'handle', 'state', 'flags', 'mode',
+         'result', 'source', 'target', 'config', 'entry', 'node', 'item', 'limit', 'step', 'base')
+
+
+class CorpusSpec(NamedTuple):
+    """Parameters of a synthetic corpus."""
+    files: int = 200             # number of source files
+    depth: int = 3               # directory levels below the root
+    functions: int = 20          # average number of functions per file
+    documented: float = 0.5      # share of files and functions that already carry documentation
+    long_line_files: int = 2     # files with pathological long lines
+    long_line_words: int = 4000  # words per pathological line
+    pruned_files: int = 20       # files in directories the walker should skip (node_modules, build, .git)
+    seed: int = 0
+
+
+def _name(rng: random.Random) -> str:
+    """Returns a random identifier."""
+    return '_'.join(rng.sample(WORDS, 2))
+
+
+def _module_header(comment: str, filename: str) -> List[str]:
+    """Returns a jaldh style module header, comment is '\"\"\"' or '/*'."""
+    close = '"""' if comment == '"""' else '*/'
+    return [f'{comment}{SEPARATOR}', f'Module: {filename}', 'Description: Generated benchmark module',
+            'Author: Benchmark', f'{SEPARATOR}{close}', '']
+
+
+def _python_file(rng: random.Random, spec: CorpusSpec, filename: str, documented: bool) -> str:
+    """A Python module with functions, methods and multi-line signatures."""
+    lines = _module_header('"""', filename) if documented else []
+    lines += ['import os', '']
+    for i in range(max(1, int(rng.gauss(spec.functions, spec.functions / 4)))):
+        params = [_name(rng) for _ in range(rng.randint(0, 4))]
+        indent = ''
+        if i % 5 == 0:
+            lines += [f'class Generated{i}:', '']
+            indent = '    '
+            params = ['self'] + params
+        if rng.random() < 0.2 and len(params) > 1:
+            signature = f'{indent}def func_{i}(\n' + ''.join(f'{indent}        {p},\n' for p in params) + f'{indent}):'
+        else:
+            signature = f'{indent}def func_{i}({", ".join(params)}):'
+        lines.append(signature)
+        if rng.random() < spec.documented:
+            lines.append(f'{indent}    """Generated function {i}."""')
+        for _ in range(rng.randint(2, 12)):
+            lines.append(f'{indent}    {_name(rng)} = {rng.randint(0, 1000)}  # {_name(rng)}')
+        lines += [f'{indent}    return None', '']
+    return '\n'.join(lines) + '\n'
+
+
+def _c_file(rng: random.Random, spec: CorpusSpec, filename: str, documented: bool, cpp: bool, header: bool) -> str:
+    """A C/C++ file with function definitions, C++ headers also get classes."""
+    lines = _module_header('/*', filename) if documented else []
+    lines += ['#include <stdint.h>', '#include <stddef.h>', '']
+    for i in range(max(1, int(rng.gauss(spec.functions, spec.functions / 4)))):
+        if cpp and header and i % 4 == 0:
+            if rng.random() < spec.documented:
+                lines.append(f'/* Generated class {i} */')
+            lines += [f'class Generated{i} {{', 'public:', f'    int get_{i}(int {_name(rng)}) const;', '};', '']
+            continue
+        if rng.random() < spec.documented:
+            lines.append(f'/* Generated function {i} */')
+        params = ', '.join(f'{rng.choice(TYPES)} {_name(rng)}' for _ in range(rng.randint(0, 4))) or 'void'
+        return_type = rng.choice(TYPES)
+        if rng.random() < 0.2:
+            lines += [f'static {return_type}', f'func_{i}({params})']
+        else:
+            lines.append(f'{return_type} func_{i}({params})')
+        lines.append('{')
+        for _ in range(rng.randint(2, 15)):
+            lines.append(f'    if ({_name(rng)} > {rng.randint(0, 99)}) {{ {_name(rng)}++; }} /* {_name(rng)} */')
+        lines += ['    return 0;', '}', '']
+    return '\n'.join(lines) + '\n'
+
+
+def _long_line_file(rng: random.Random, spec: CorpusSpec, filename: str, ext: str) -> str:
+    """A file made of a few huge lines, e.g. generated tables."""
+    words = ' '.join(rng.choice(WORDS) for _ in range(spec.long_line_words))
+    if ext == '.py':
+        lines = [f'TABLE_{i} = "{words}"' for i in range(10)]
+        lines.append(f'def lookup({", ".join(WORDS)}): return TABLE_0')
+    else:
+        lines = [f'static const char *table_{i} = "{words}";' for i in range(10)]
+        lines.append(f'int {words.replace(" ", "_")[:2000]}(int a, {", ".join("int " + w for w in WORDS)}) {{ return a; }}')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_corpus(root: str, spec: CorpusSpec = CorpusSpec()) -> Dict[str, int]:
+    """
+    Writes a synthetic source tree.
+
+    Parameters:
+        root (str): Directory to create the tree in, created if missing.
+        spec (CorpusSpec): Corpus parameters.
+
+    Returns:
+        Dict[str, int]: Number of files and bytes written, total and per extension.
+    """
+    rng = random.Random(spec.seed)
+    extensions = [ext for ext, weight in EXTENSION_WEIGHTS.items() for _ in range(weight)]
+
+    # Directory tree, every directory has two subdirectories down to the given depth
+    directories = ['']
+    level_dirs = ['']
+    for level in range(spec.depth):
+        level_dirs = [os.path.join(parent, f'pkg_{level}_{i}') for parent in level_dirs for i in range(2)]
+        directories += level_dirs
+
+    summary = {'files': 0, 'bytes': 0}
+    for index in range(spec.files + spec.pruned_files):
+        ext = extensions[index % len(extensions)]
+        if index >= spec.files:
+            directory = os.path.join(('node_modules', 'build', '.git')[index % 3], f'dep_{index % 4}')
+        else:
+            directory = rng.choice(directories)
+        filename = f'file_{index}{ext}'
+        relpath = os.path.join(directory, filename)
+        documented = rng.random() < spec.documented
+
+        if index < spec.long_line_files:
+            content = _long_line_file(rng, spec, relpath, ext)
+        elif ext == '.py':
+            content = _python_file(rng, spec, relpath, documented)
+        else:
+            content = _c_file(rng, spec, relpath, documented, cpp=ext in ('.cpp', '.hpp'), header=ext in ('.h', '.hpp'))
+
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+        data = content.encode('utf-8')
+        with open(os.path.join(root, relpath), 'wb') as f:
+            f.write(data)
+        if index < spec.files:
+            summary['files'] += 1
+            summary['bytes'] += len(data)
+            summary[ext] = summary.get(ext, 0) + 1
+    return summary
@@ -0,0 +1,148 @@
+"""------------------------------
+Module: ./benchmarks/cparse.py
+Description: Guards the speed of the C scanner against the line regex it replaced.
+Notes: Before core.jaldh_cscanner, C functions were found by matching every line against
+    REFERENCE_PATTERN. The scanner finds more (signatures spanning lines, braces on their own line,
+    comments and literals), but ordinary sources must stay in the same range. Both are timed on
+    the same generated file in the same process, so the budget is a ratio and does not depend on
+    the machine. The long line and pathological scenarios are the cases the scanner was written
+    for, there it has to be faster than the line regex.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import gc
+import random
+import re
+import time
+from typing import Callable, Dict, List, NamedTuple
+
+from benchmarks.corpus import CorpusSpec, _c_file, _long_line_file
+from core.jaldh_cscanner import scan_c_source
+
+# The line regex of parse_c_functions() before the scanner
+REFERENCE_PATTERN = re.compile(r'^\s*(\w[\w\s\*\[\]]+)\s+(\w+)\s*\(([^;]*)\)\s*\{')
+
+
+class CParseScenario(NamedTuple):
+    """A generated C source the scanner is timed on."""
+    name: str
+    source: Callable[[], str]
+    budget: float  # highest allowed ratio of scanner to reference time, 0 for no budget
+
+
+def _conventional() -> str:
+    """About 1.5 MB of functions with the opening brace on its own line."""
+    return _c_file(random.Random(0), CorpusSpec(functions=2000), 'bench.c', False, cpp=False, header=False)
+
+
+def _same_line() -> str:
+    """The same functions with the opening brace on the signature line, which the line regex finds."""
+    return re.sub(r'\)\n\{', ') {', re.sub(r'(static [^\n]+)\n(func_)', r'\1 \2', _conventional()))
+
+
+def _long_lines() -> str:
+    """Generated tables with lines of several 10 KB."""
+    return _long_line_file(random.Random(0), CorpusSpec(long_line_words=20000), 'bench.c', '.c')
+
+
+def _pathological() -> str:
+    """
+    Column aligned identifiers with an opening but no closing parenthesis, about 320 KB.
+
+    Every blank run can end the type or start the name of the line regex, which tries them all:
+    its time grows with the square of the run length.
+    """
+    line = 'int ' + ''.join(f'{"id%d" % index:<16}' for index in range(400)) + 'f(x,\n'
+    return line * 50
+
+
+# Recorded with about one and a half times the ratio measured when the budgets were set. Lower
+# them when the scanner gets faster, never raise them to make a slow change pass
+CPARSE_SCENARIOS = (
+    CParseScenario('conventional', _conventional, 3.0),
+    CParseScenario('same_line', _same_line, 3.0),
+    CParseScenario('long_lines', _long_lines, 1.2),
+    CParseScenario('pathological', _pathological, 0.15),
+)
+
+
+def reference_scan(content: str) -> List[int]:
+    """
+    Finds functions like parse_c_functions() did before the scanner.
+
+    Parameters:
+        content (str): The C source.
+
+    Returns:
+        List[int]: The 0-based line numbers of the matched signatures.
+    """
+    match = REFERENCE_PATTERN.match
+    return [index for index, line in enumerate(content.splitlines()) if match(line)]
+
+
+def _run_ms(function: Callable[[], object]) -> float:
+    """Runs a function once with the garbage collector off, returns the time in ms."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        function()
+        return (time.perf_counter() - start) * 1000
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def measure_cparse(repeat: int = 5) -> Dict[str, Dict]:
+    """
+    Times the scanner and the reference regex on every scenario of CPARSE_SCENARIOS.
+
+    Parameters:
+        repeat (int): Runs of each, alternating, the fastest is reported.
+
+    Returns:
+        Dict[str, Dict]: Per scenario both times in ms, the number of functions each found, the
+            ratio, the budget and whether the scenario passed.
+    """
+    results = {}
+    for scenario in CPARSE_SCENARIOS:
+        content = scenario.source()
+        # Alternate the runs, so both see the same load of the machine
+        scanner_runs, reference_runs = [], []
+        for _ in range(repeat):
+            scanner_runs.append(_run_ms(lambda: scan_c_source(content)))
+            reference_runs.append(_run_ms(lambda: reference_scan(content)))
+        scanner_ms, reference_ms = min(scanner_runs), min(reference_runs)
+        ratio = scanner_ms / reference_ms
+        results[scenario.name] = {
+            'bytes': len(content.encode('utf-8')),
+            'ms': round(scanner_ms, 2),
+            'reference_ms': round(reference_ms, 2),
+            'functions': len(scan_c_source(content)),
+            'reference_functions': len(reference_scan(content)),
+            'ratio': round(ratio, 2),
+            'budget': scenario.budget,
+            'passed': not scenario.budget or ratio <= scenario.budget,
+        }
+    return results
+
+
+def format_cparse(results: Dict[str, Dict]) -> str:
+    """
+    Formats the results of measure_cparse().
+
+    Parameters:
+        results (Dict[str, Dict]): The measured scenarios.
+
+    Returns:
+        str: One line per scenario.
+    """
+    lines = []
+    for name, result in results.items():
+        budget = f"of {result['budget']:>4}x" if result['budget'] else 'no budget'
+        status = 'ok' if result['passed'] else 'OVER BUDGET'
+        lines.append(f"{name:16} {result['ms']:>9} ms vs {result['reference_ms']:>9} ms line regex "
+                     f"{result['ratio']:>6}x {budget:10} {result['functions']:>5}/{result['reference_functions']:<5} "
+                     f"functions  {status}")
+    return '\n'.join(lines)
@@ -0,0 +1,165 @@
+"""------------------------------
+Module: ./benchmarks/startup.py
+Description: Measures the import time of jaldh with python -X importtime and enforces a budget.
+Notes: For single files, e.g. an editor running jaldh on save, starting the interpreter and
+    importing the modules is most of the run time. Every scenario runs in a fresh interpreter,
+    the import time is the sum of the self times of all modules the bare interpreter does not
+    import itself. Besides the time budget, which depends on the machine, each scenario lists
+    modules that must not be imported at all; that part of the check is exact everywhere.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only needed by modes other than processing headers
+MODE_MODULES = ('sqlite3', 'concurrent.futures', 'ctypes', 'subprocess', 'core.jaldh_docwriter')
+
+SAMPLE_PYTHON = 'def add(a, b):\n    return a + b\n'
+SAMPLE_C = 'int add(int a, int b)\n{\n    return a + b;\n}\n'
+
+
+class StartupScenario(NamedTuple):
+    """A jaldh invocation whose imports are measured."""
+    name: str
+    arguments: Tuple[str, ...]     # after the interpreter, {repo} and {dir} are replaced
+    budget_ms: float               # recorded import time budget
+    excluded: Tuple[str, ...]      # modules (and their submodules) that must not be imported
+
+
+# Recorded with about twice the time measured when the budgets were set. Lower them when an
+# import gets cheaper, never raise them to make a slow import pass
+STARTUP_SCENARIOS = (
+    StartupScenario('import', ('-c', 'import jaldh'), 50.0,
+                    ('yaml', 'ast', 'tempfile', 'hashlib', 'core.jaldh_codeparser', 'core.jaldh_cscanner',
+                     'core.jaldh_templates') + MODE_MODULES),
+    StartupScenario('python_file', ('{repo}/jaldh.py', '-c', '{dir}/config.yaml', '-s', '{dir}/sample.py',
+                                    '-o', 'out_'), 90.0, ('core.jaldh_cscanner',) + MODE_MODULES),
+    StartupScenario('c_file', ('{repo}/jaldh.py', '-c', '{dir}/config.yaml', '-s', '{dir}/sample.c', '-o', 'out_'),
+                    100.0, ('ast',) + MODE_MODULES),
+)
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Reads the output of python -X importtime.
+
+    Parameters:
+        stderr (str): The standard error of the interpreter.
+
+    Returns:
+        Dict[str, int]: Self time in microseconds per imported module.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        modules[fields[2].strip()] = int(fields[0])
+    return modules
+
+
+def imported_modules(arguments: List[str], cwd: str) -> Dict[str, int]:
+    """
+    Runs the interpreter with -X importtime, jaldh can be imported from the repository.
+
+    Parameters:
+        arguments (List[str]): Arguments after the interpreter options.
+        cwd (str): Working directory, jaldh logs into it before its configuration is loaded.
+
+    Returns:
+        Dict[str, int]: Self time in microseconds per imported module.
+
+    Raises:
+        RuntimeError: If the interpreter fails.
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    # Compiling the sources is no startup cost of an installed jaldh, let the warm-up run cache the bytecode
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', *arguments], cwd=cwd, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(arguments)} failed: {result.stderr.strip().splitlines()[-1:]}")
+    return parse_importtime(result.stderr)
+
+
+def _matches(module: str, excluded: Tuple[str, ...]) -> bool:
+    """Checks whether a module is one of excluded or a submodule of one."""
+    return any(module == name or module.startswith(name + '.') for name in excluded)
+
+
+def measure_startup(repeat: int = 5, workdir: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Measures every scenario of STARTUP_SCENARIOS.
+
+    Parameters:
+        repeat (int): Runs per scenario after one warm-up run, the fastest is reported.
+        workdir (Optional[str]): Directory for the sample files, a temporary directory if None.
+
+    Returns:
+        Dict[str, Dict]: Per scenario the import time in ms, the budget, the number of imported
+            modules, the excluded modules that were imported and whether the scenario passed.
+    """
+    with tempfile.TemporaryDirectory(prefix='jaldh-startup-') as tmp:
+        workdir = workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        with open(os.path.join(workdir, 'sample.py'), 'w', encoding='utf-8') as f:
+            f.write(SAMPLE_PYTHON)
+        with open(os.path.join(workdir, 'sample.c'), 'w', encoding='utf-8') as f:
+            f.write(SAMPLE_C)
+        # The runs log next to the samples, not into the repository
+        with open(os.path.join(workdir, 'config.yaml'), 'w', encoding='utf-8') as f:
+            f.write(f"logging:\n  path: '{os.path.join(workdir, 'jaldh.log')}'\n")
+        baseline: Set[str] = set(imported_modules(['-c', 'pass'], workdir))
+
+        results = {}
+        for scenario in STARTUP_SCENARIOS:
+            arguments = [argument.replace('{repo}', REPO_DIR).replace('{dir}', workdir)
+                         for argument in scenario.arguments]
+            # The warm-up run writes the bytecode caches
+            imported_modules(arguments, workdir)
+            best = None
+            for _ in range(repeat):
+                modules = {name: us for name, us in imported_modules(arguments, workdir).items() if name not in baseline}
+                total = sum(modules.values())
+                if best is None or total < best[0]:
+                    best = (total, modules)
+            total, modules = best
+            unwanted = sorted(name for name in modules if _matches(name, scenario.excluded))
+            results[scenario.name] = {
+                'ms': round(total / 1000, 2),
+                'budget_ms': scenario.budget_ms,
+                'modules': len(modules),
+                'unwanted': unwanted,
+                'passed': total / 1000 <= scenario.budget_ms and not unwanted,
+            }
+        return results
+
+
+def format_startup(results: Dict[str, Dict]) -> str:
+    """
+    Formats the results of measure_startup().
+
+    Parameters:
+        results (Dict[str, Dict]): The measured scenarios.
+
+    Returns:
+        str: One line per scenario.
+    """
+    lines = []
+    for name, result in results.items():
+        status = 'ok' if result['passed'] else 'OVER BUDGET'
+        line = (f"{name:16} {result['ms']:>8} ms of {result['budget_ms']:>6} ms "
+                f"{result['modules']:>4} modules  {status}")
+        if result['unwanted']:
+            line += f"  unwanted: {', '.join(result['unwanted'])}"
+        lines.append(line)
+    return '\n'.join(lines)
@@ -0,0 +1,199 @@
+"""------------------------------
+Module: ./core/jaldh_api.py
+Description: Library interface for documenting sources held in memory, and the --serve JSON lines server.
+Notes: Nothing is read from or written to disk, the filename of a source only selects its language,
+    its module header and, with a ConfigResolver, the .jaldh.yaml files that apply to it. Line
+    endings of the input are kept. The server answers one JSON object per request line, so an
+    editor or build tool can keep one warm process instead of starting jaldh per file.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import json
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from core.jaldh_config import DEFAULT_CONFIG, ConfigResolver
+from core.jaldh_fileparser import FileParser
+from core.jaldh_logger import logIt
+from core.jaldh_source import source_from_text
+
+if TYPE_CHECKING:
+    from core.jaldh_codeparser import DocGap
+
+# Values of the 'mode' field of a --serve request
+SERVE_MODES = ('document', 'check')
+
+
+class SourceError(ValueError):
+    """A source can not be documented, e.g. its language is unknown or it does not parse."""
+
+
+class Documented(NamedTuple):
+    """Outcome of documenting one in-memory source."""
+    name: str
+    content: Optional[str]         # None if the source could not be documented
+    changed: bool
+    messages: List[str]
+
+
+def _document(fparser: FileParser, messages: List[str], name: str, content: str, lang: str,
+              config: dict) -> Documented:
+    """Documents one source with a parser whose report collects into messages."""
+    del messages[:]
+    source = source_from_text(content)
+    new_content = fparser.parse_text(source.text, name, lang, config)
+    if new_content is None:
+        return Documented(name, None, False, list(messages))
+    if new_content == source.text:
+        return Documented(name, content, False, list(messages))
+    if source.newline != '\n':
+        new_content = new_content.replace('\n', source.newline)
+    return Documented(name, new_content, True, list(messages))
+
+
+def document_source(content: str, filename: str, lang: str = 'auto', config: Optional[dict] = None) -> str:
+    """
+    Inserts the missing documentation headers into a source.
+
+    Parameters:
+        content (str): The source, any line ending.
+        filename (str): Name of the source, selects the language in 'auto' mode and appears in the module header.
+        lang (str): 'python', 'c', 'cpp' or 'auto'.
+        config (Optional[dict]): Loaded configuration, DEFAULT_CONFIG if None.
+
+    Returns:
+        str: The documented source with the line endings of content.
+
+    Raises:
+        SourceError: If the language is not supported or the source does not parse.
+    """
+    messages = []
+    fparser = FileParser(config or DEFAULT_CONFIG, report=messages.append)
+    result = _document(fparser, messages, filename, content, lang, config or DEFAULT_CONFIG)
+    if result.content is None:
+        raise SourceError('; '.join(result.messages) or f"Can not document {filename}")
+    return result.content
+
+
+def document_sources(sources: Iterable[Tuple[str, str]], lang: str = 'auto', config: Optional[dict] = None,
+                     resolver: Optional[ConfigResolver] = None) -> Iterator[Documented]:
+    """
+    Documents many sources in one process, lazily and in order.
+
+    A source that can not be documented does not stop the batch, its result has no content
+    and the reasons in messages.
+
+    Parameters:
+        sources (Iterable[Tuple[str, str]]): (filename, content) pairs.
+        lang (str): 'python', 'c', 'cpp' or 'auto'.
+        config (Optional[dict]): Loaded configuration, DEFAULT_CONFIG if None.
+        resolver (Optional[ConfigResolver]): Applies the .jaldh.yaml files of each filename's
+            directory, config is used for all sources if None.
+
+    Yields:
+        Documented: One result per source.
+    """
+    config = config or DEFAULT_CONFIG
+    messages = []
+    fparser = FileParser(config, report=messages.append)
+    for name, content in sources:
+        file_config = resolver.for_file(name) if resolver is not None else config
+        yield _document(fparser, messages, name, content, lang, file_config)
+
+
+def check_source(content: str, filename: str, lang: str = 'auto', first: bool = False,
+                 config: Optional[dict] = None) -> List['DocGap']:
+    """
+    Finds the missing documentation of a source without generating any text.
+
+    Parameters:
+        content (str): The source, any line ending.
+        filename (str): Name of the source, selects the language in 'auto' mode.
+        lang (str): 'python', 'c', 'cpp' or 'auto'.
+        first (bool): Stop at the first gap.
+        config (Optional[dict]): Loaded configuration, provides further languages, DEFAULT_CONFIG if None.
+
+    Returns:
+        List[DocGap]: The gaps in source order, see core.jaldh_codeparser.DocGap.
+
+    Raises:
+        SourceError: If the language is not supported or the source does not parse.
+    """
+    messages = []
+    gaps = FileParser(config or DEFAULT_CONFIG, report=messages.append).check_text(source_from_text(content).text,
+                                                                                     filename, lang, first)
+    if gaps is None:
+        raise SourceError('; '.join(messages) or f"Can not check {filename}")
+    return gaps
+
+
+def _handle_request(request: dict, lang: str, resolver: ConfigResolver) -> dict:
+    """Answers one --serve request, see serve()."""
+    response = {'id': request.get('id')}
+    filename = request.get('filename')
+    content = request.get('content')
+    mode = request.get('mode', 'document')
+    if not isinstance(filename, str) or not isinstance(content, str):
+        return dict(response, ok=False, error="'filename' and 'content' must be strings")
+    if mode not in SERVE_MODES:
+        return dict(response, ok=False, error=f"Unknown mode: {mode}")
+    lang = request.get('lang', lang)
+    response['filename'] = filename
+
+    if mode == 'check':
+        try:
+            gaps = check_source(content, filename, lang, bool(request.get('first')), resolver.for_file(filename))
+        except SourceError as e:
+            return dict(response, ok=False, error=str(e))
+        return dict(response, ok=True, missing=[{'line': gap.line, 'kind': gap.kind,
+                                                  'name': '' if gap.kind == 'module' else gap.name}
+                                                 for gap in gaps])
+
+    result = next(document_sources([(filename, content)], lang, resolver.base, resolver))
+    if result.content is None:
+        return dict(response, ok=False, error='; '.join(result.messages) or f"Can not document {filename}")
+    return dict(response, ok=True, changed=result.changed, content=result.content)
+
+
+def serve(requests: TextIO, responses: TextIO, lang: str = 'auto',
+          get_resolver: Callable[[], ConfigResolver] = lambda: ConfigResolver(DEFAULT_CONFIG)) -> int:
+    """
+    Answers JSON lines requests until the input ends (--serve).
+
+    A request is one JSON object per line:
+        {"id": 1, "filename": "src/a.py", "content": "...", "lang": "auto", "mode": "document"}
+    id is echoed, lang defaults to the --lang of the server, mode is 'document' (default) or
+    'check' (with optional "first": true). The response is one JSON object per line with id,
+    filename and ok; on success 'changed' and 'content' (document) or 'missing' (check), on
+    failure 'error'. Blank lines are ignored.
+
+    Parameters:
+        requests (TextIO): Input stream, e.g. sys.stdin.
+        responses (TextIO): Output stream, flushed after every response.
+        lang (str): Default language of the requests.
+        get_resolver (Callable[[], ConfigResolver]): Called before every request, returns the
+            resolver for the current configuration.
+
+    Returns:
+        int: Number of answered requests.
+    """
+    count = 0
+    for line in requests:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+        except ValueError as e:
+            response = {'id': None, 'ok': False, 'error': f"Invalid request: {e}"}
+        else:
+            try:
+                response = _handle_request(request, lang, get_resolver())
+            except Exception as e:
+                logIt(f"Error while serving request {request.get('id')!r}: {e}")
+                response = {'id': request.get('id'), 'ok': False, 'error': str(e)}
+        responses.write(json.dumps(response) + '\n')
+        responses.flush()
+        count += 1
+    return count
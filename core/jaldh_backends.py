@@ -0,0 +1,155 @@
+"""------------------------------
+Module: ./core/jaldh_backends.py
+Description: Registry of the language backends, maps file extensions to the language that processes them.
+Notes: The registry only knows names, extensions and import paths. A backend is imported and
+    created when the first file of its language is processed, so a run over Python files never
+    loads the C scanner and its patterns, and vice versa. Further languages are registered in
+    the 'languages' section of config.yaml:
+        languages:
+          rust:
+            extensions: ['.rs']
+            backend: 'jaldh_rust:RustBackend'
+    A backend class is created with the language name and provides
+        insertions(content, config, filename) -> Iterable[Insertion]   (core.jaldh_edits)
+        doc_gaps(content, filename) -> Iterable[DocGap]                 (core.jaldh_codeparser)
+    and, with streaming set to True, stream_insertions(source, config, filename) and
+    stream_doc_gaps(source, filename) for memory mapped files (core.jaldh_source.MappedSource).
+    Backends that also provide parse(content, config, filename) -> ParsedSource and
+    header(config, filename) -> Insertion have their results cached (core.jaldh_parsecache).
+    Configured languages override built-in ones with the same name or extension.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import importlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+
+class BackendSpec(NamedTuple):
+    """A language as the registry knows it before its backend is imported."""
+    name: str
+    extensions: Tuple[str, ...]
+    target: str                    # 'module:Class' of the backend
+
+
+BUILTIN_BACKENDS = (
+    BackendSpec('python', ('.py',), 'core.jaldh_codeparser:PythonBackend'),
+    BackendSpec('c', ('.c', '.h'), 'core.jaldh_codeparser:CBackend'),
+    BackendSpec('cpp', ('.cpp', '.hpp', '.cc'), 'core.jaldh_codeparser:CBackend'),
+)
+
+
+class BackendError(ValueError):
+    """A configured language is invalid or its backend can not be imported."""
+
+
+class BackendRegistry:
+    """
+    Language backends by name and by file extension.
+
+    The extension map is built once, detecting the language of a file is a single dict lookup.
+    Backends are created on first use and shared by all files of their language.
+    """
+
+    def __init__(self, specs: Iterable[BackendSpec] = BUILTIN_BACKENDS):
+        """
+        Parameters:
+            specs (Iterable[BackendSpec]): The languages, later ones override earlier ones.
+        """
+        self.specs: Dict[str, BackendSpec] = {}
+        for spec in specs:
+            self.specs[spec.name] = spec
+        self.by_extension: Dict[str, str] = {ext: spec.name for spec in self.specs.values()
+                                             for ext in spec.extensions}
+        # Extensions in registration order, for the walker and the git selection
+        self.extensions: Tuple[str, ...] = tuple(self.by_extension)
+        self._backends: Dict[str, Any] = {}
+
+    def language_of(self, filename: str) -> Optional[str]:
+        """Returns the language of a file by its extension, None if no backend handles it."""
+        return self.by_extension.get(os.path.splitext(filename)[1])
+
+    def get(self, name: str) -> Optional[Any]:
+        """
+        Returns the backend of a language, importing it on first use.
+
+        Parameters:
+            name (str): The language.
+
+        Returns:
+            Optional[Any]: The backend, None if the language is not registered.
+
+        Raises:
+            BackendError: If the backend can not be imported.
+        """
+        backend = self._backends.get(name)
+        if backend is not None:
+            return backend
+        spec = self.specs.get(name)
+        if spec is None:
+            return None
+        module_name, _, class_name = spec.target.partition(':')
+        try:
+            backend_class = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError) as e:
+            raise BackendError(f"Backend {spec.target} of language {name} can not be loaded: {e}") from e
+        backend = self._backends[name] = backend_class(name)
+        return backend
+
+
+def _configured_specs(languages: Any) -> Iterable[BackendSpec]:
+    """Reads the 'languages' section of the configuration, see the module notes."""
+    if not isinstance(languages, dict):
+        raise BackendError("'languages' must be a mapping of language names")
+    for name, settings in languages.items():
+        settings = settings or {}
+        extensions = settings.get('extensions')
+        target = settings.get('backend')
+        if isinstance(extensions, str):
+            extensions = [extensions]
+        if not extensions or not isinstance(target, str) or ':' not in target:
+            raise BackendError(f"Language {name} needs 'extensions' and a 'backend' like 'module:Class'")
+        yield BackendSpec(str(name), tuple(str(ext) for ext in extensions), target)
+
+
+# Number of 'languages' sections whose registries are kept
+REGISTRY_CACHE_SIZE = 16
+
+# Registries by the identity of the 'languages' section they were built from, least recently used
+# first. The section is kept with its registry, so its id can not be reused while the entry exists
+_registries: 'OrderedDict[int, Tuple[Any, BackendRegistry]]' = OrderedDict()
+_registries_lock = threading.Lock()
+
+
+def get_registry(config: Optional[dict] = None) -> BackendRegistry:
+    """
+    Returns the registry for a configuration, built once per 'languages' section.
+
+    Per-directory configurations inherit the section object of the run configuration, so all
+    files of a run share one registry and its loaded backends.
+
+    Parameters:
+        config (Optional[dict]): Loaded configuration, None for the built-in languages only.
+
+    Returns:
+        BackendRegistry: The registry.
+
+    Raises:
+        BackendError: If the 'languages' section is invalid.
+    """
+    languages = (config or {}).get('languages')
+    key = id(languages)
+    with _registries_lock:
+        entry = _registries.get(key)
+        if entry is None or entry[0] is not languages:
+            specs = BUILTIN_BACKENDS
+            if languages:
+                specs = BUILTIN_BACKENDS + tuple(_configured_specs(languages))
+            entry = _registries[key] = (languages, BackendRegistry(specs))
+        _registries.move_to_end(key)
+        while len(_registries) > REGISTRY_CACHE_SIZE:
+            _registries.popitem(last=False)
+    return entry[1]
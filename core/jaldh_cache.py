@@ -0,0 +1,190 @@
+"""------------------------------
+Module: ./core/jaldh_cache.py
+Description: Persistent manifest of already processed files for incremental runs.
+Notes: Entries are keyed by the absolute path and store size, mtime, content hash and the
+    hash of the configuration they were processed with. A file whose size and mtime still
+    match is skipped without being opened, on a size match with a different mtime the content
+    hash decides.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import json
+import os
+from typing import Any, Optional, Tuple
+
+from core.jaldh_logger import logIt
+
+CACHE_FILE = '.jaldh-cache'
+CACHE_VERSION = 1
+
+# (size, mtime_ns, sha256 hex digest)
+Stamp = Tuple[int, int, str]
+
+
+def config_hash(config: dict, *extra: Any) -> str:
+    """
+    Hashes a configuration together with further settings that influence the output.
+
+    Parameters:
+        config (dict): Loaded configuration.
+        extra (Any): Additional values, e.g. language and tool version.
+
+    Returns:
+        str: Hex digest identifying the configuration.
+    """
+    import hashlib
+
+    data = json.dumps([config, extra], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def content_hash(filepath: str) -> str:
+    """
+    Hashes the content of a file in chunks.
+
+    Parameters:
+        filepath (str): File to hash.
+
+    Returns:
+        str: sha256 hex digest of the file content.
+    """
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stamp(filepath: str) -> Stamp:
+    """
+    Collects the manifest data of a file.
+
+    Parameters:
+        filepath (str): File to stamp.
+
+    Returns:
+        Stamp: Size, mtime in nanoseconds and content hash.
+    """
+    st = os.stat(filepath)
+    return st.st_size, st.st_mtime_ns, content_hash(filepath)
+
+
+class CacheManifest:
+    """
+    Manifest of processed files, grouped in sections (e.g. 'headers' and 'doc').
+    """
+
+    def __init__(self, path: str = CACHE_FILE, config_key: str = ''):
+        """
+        Parameters:
+            path (str): Location of the manifest file.
+            config_key (str): Hash of the current configuration, see config_hash().
+        """
+        self.path = path
+        self.config_key = config_key
+        self.sections = {}
+        self.dirty = False
+        self.load()
+
+    def load(self) -> None:
+        """Loads the manifest, a missing or unreadable manifest starts empty."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.sections = data.get('sections', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logIt(f"Ignoring unreadable cache manifest {self.path}: {e}")
+
+    def save(self) -> None:
+        """Writes the manifest if it changed, replacing the old one atomically."""
+        if not self.dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'sections': self.sections}, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"Error while writing cache manifest {self.path}: {e}")
+            logIt(f"Error while writing cache manifest {self.path}: {e}")
+
+    def is_unchanged(self, section: str, filepath: str, config_key: Optional[str] = None) -> bool:
+        """
+        Checks whether a file was already processed under the current configuration.
+
+        Parameters:
+            section (str): Manifest section, e.g. 'headers' or 'doc'.
+            filepath (str): File to check.
+            config_key (Optional[str]): Hash of the configuration of the file, if it differs from the run's.
+
+        Returns:
+            bool: True if the file can be skipped.
+        """
+        key = os.path.abspath(filepath)
+        entry = self.sections.get(section, {}).get(key)
+        if entry is None or entry[3] != (config_key or self.config_key):
+            return False
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return False
+        if st.st_size != entry[0]:
+            return False
+        if st.st_mtime_ns == entry[1]:
+            return True
+
+        # Touched but possibly not modified, let the content decide
+        try:
+            if content_hash(filepath) != entry[2]:
+                return False
+        except OSError:
+            return False
+        entry[1] = st.st_mtime_ns
+        self.dirty = True
+        return True
+
+    def get(self, section: str, filepath: str) -> Any:
+        """
+        Returns the payload stored with a file, e.g. the extracted documentation header.
+
+        Parameters:
+            section (str): Manifest section.
+            filepath (str): File to look up.
+
+        Returns:
+            Any: The stored payload or None.
+        """
+        entry = self.sections.get(section, {}).get(os.path.abspath(filepath))
+        return entry[4] if entry else None
+
+    def record(self, section: str, filepath: str, stamp: Optional[Stamp] = None, payload: Any = None,
+               config_key: Optional[str] = None) -> None:
+        """
+        Records a processed file.
+
+        Parameters:
+            section (str): Manifest section.
+            filepath (str): Processed file.
+            stamp (Optional[Stamp]): Precomputed stamp, taken from the file if None.
+            payload (Any): JSON serializable data to store with the entry.
+            config_key (Optional[str]): Hash of the configuration of the file, if it differs from the run's.
+
+        Returns:
+            None
+        """
+        if stamp is None:
+            try:
+                stamp = file_stamp(filepath)
+            except OSError:
+                return
+        size, mtime_ns, digest = stamp
+        self.sections.setdefault(section, {})[os.path.abspath(filepath)] = [
+            size, mtime_ns, digest, config_key or self.config_key, payload]
+        self.dirty = True
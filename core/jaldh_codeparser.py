@@ -1,225 +1,440 @@
-"""------------------------------
-Module: ./core\jaldh_codeparser.py
-Description: <Short module description>
-Notes: Functions that parses the code and adds documentation headers.
-Author: Peter Jacobi
-Created: 2025-06-22
-------------------------------"""
-
-import re
-import os
-from datetime import datetime
-
-def parse_python_functions(content, config, filename):
-    """
-    Parses Python file content to add missing documentation headers.
-
-    Parameters:
-        content (str): The content of the Python file.
-        config (dict): Configuration dictionary for header generation.
-        filename (str): The name of the file being processed.
-
-    Returns:
-        str: The Python content with added documentation headers.
-    """
-
-    def generate_module_header(config, filename):
-        """Generates the module-level header."""
-        separator = config.get('file_separator', '------------------------------')
-        author = config.get('header', {}).get('author', 'Unknown')
-        include_date = config.get('header', {}).get('include_date', True)
-        date_format = config.get('header', {}).get('date_format', '%Y-%m-%d')
-        date_str = datetime.now().strftime(date_format) if include_date else ''
-
-        header_lines = [
-            f'"""{separator}',
-            f'Module: {filename}',
-            'Description: <Short module description>',
-            'Notes: <Special remarks or dependencies>',
-            f'Author: {author}',
-        ]
-        if include_date:
-            header_lines.append(f'Created: {date_str}')
-        header_lines.append(f'{separator}"""\n')
-
-        return header_lines
-
-    def generate_function_docstring(func_name, params, config):
-        """Generates a docstring for a function."""
-        separator = config.get('function_separator', '------------------------------')
-        docstring_lines = [
-            f'    """{separator}',
-            f'    Description: <Describe what {func_name} does>',
-            '',
-        ]
-        if params:
-            docstring_lines.append('    Parameters:')
-            for param in params:
-                docstring_lines.append(f'        {param}: <description>')
-        docstring_lines.extend([
-            '',
-            '    Returns:',
-            '        <description>',
-            f'    {separator}"""'
-        ])
-
-        return docstring_lines
-
-    # Split the content into lines for processing
-    lines = content.splitlines()
-
-    # Add a module-level header if missing
-    if not lines or not lines[0].strip().startswith('"""'):
-        lines = generate_module_header(config, filename) + lines
-
-    # Find all function definitions and add docstrings if missing
-    pattern = re.compile(r'^def\s+(\w+)\s*\((.*?)\):')
-    processed_lines = []
-    for i, line in enumerate(lines):
-        match = pattern.match(line)
-        if match:
-            func_name = match.group(1)
-            params = [param.strip().split('=')[0].strip() for param in match.group(2).split(',') if param.strip()]
-
-            # Check if next line is a docstring
-            next_line = lines[i + 1].strip() if i + 1 < len(lines) else ''
-            if not next_line.startswith('"""'):
-                docstring_lines = generate_function_docstring(func_name, params, config)
-                processed_lines.append(line)
-                processed_lines.extend(docstring_lines)
-                continue
-
-        # Append current line if no processing is needed
-        processed_lines.append(line)
-
-    # Join processed lines into a single content string
-    return '\n'.join(processed_lines)
-
-
-def parse_c_functions(content, config, filename):
-    """
-    Parses C file content to add missing documentation comments.
-
-    Parameters:
-        content (str): The content of the C file.
-        config (dict): Configuration dictionary for header generation.
-        filename (str): The name of the file being processed.
-
-    Returns:
-        str: The C content with added documentation headers and function comments.
-    """
-
-    def generate_module_header(config, filename):
-        """Generates the module-level header."""
-        separator = config.get('file_separator', '------------------------------')
-        author = config.get('header', {}).get('author', 'Unknown')
-        include_date = config.get('header', {}).get('include_date', True)
-        date_format = config.get('header', {}).get('date_format', '%Y-%m-%d')
-        date_str = datetime.now().strftime(date_format) if include_date else ''
-
-        header_lines = [
-            f'/*{separator}',
-            f'Module: {filename}',
-            'Description: <Short module description>',
-            'Notes: <Special remarks or dependencies>',
-            f'Author: {author}',
-        ]
-        if include_date:
-            header_lines.append(f'Created: {date_str}')
-        header_lines.append(f'{separator}*/\n')
-
-        return header_lines
-
-    def generate_function_comment(return_type, func_name, params, config):
-        """Generates a function-level comment."""
-        separator = config.get('function_separator', '------------------------------')
-        comment_lines = [
-            f'/*{separator}',
-            f'{func_name} - <Describe what this function does>',
-            ''
-        ]
-        if params:
-            comment_lines.append('Parameters:')
-            for param in params:
-                comment_lines.append(f'    {param} - <description>')
-        comment_lines.extend([
-            '',
-            'Returns:',
-            f'    {return_type} - <description>',
-            f'{separator}*/'
-        ])
-
-        return comment_lines
-
-    # Break the content into lines
-    lines = content.splitlines()
-
-    # Add a module-level header if missing
-    if not lines or not lines[0].strip().startswith('/*'):
-        lines = generate_module_header(config, filename) + lines
-
-    # Regex pattern for function definitions
-    pattern = re.compile(r'^\s*(\w[\w\s\*\[\]]+)\s+(\w+)\s*\(([^;]*)\)\s*\{')
-
-    # Process lines to add function comments
-    processed_lines = []
-    for i, line in enumerate(lines):
-        match = pattern.match(line)
-        if match:
-            return_type = match.group(1).strip()
-            func_name = match.group(2).strip()
-            param_list = match.group(3).strip()
-            params = [p.strip().split()[-1] for p in param_list.split(',') if p.strip() and p.strip() != 'void']
-
-            # Check if the previous line is already a comment
-            prev_line = lines[i - 1].strip() if i > 0 else ''
-            if not (prev_line.startswith("/*") or prev_line.startswith("//")):
-                comment = generate_function_comment(return_type, func_name, params, config)
-                processed_lines.extend(comment)
-
-        # Append the current line to the output
-        processed_lines.append(line)
-
-    # Return the processed content
-    return '\n'.join(processed_lines)
-
-
-
-def parse_cpp_classes(content, config):
-    """
-    Parses C++ file content to add missing class documentation.
-
-    Parameters:
-        content (str): The content of the C++ file.
-        config (dict): Configuration dictionary for comment generation.
-
-    Returns:
-        str: The C++ content with added class documentation.
-    """
-
-    def generate_class_comment(class_type, class_name, config):
-        """Generates a class-level documentation comment."""
-        separator = config.get('function_separator', '------------------------------')
-        comment_lines = [
-            f'/*{separator}',
-            f'{class_name} - {class_type} overview',
-            f'Constructor example: {class_name} obj;',
-            f'{separator}*/'
-        ]
-        return comment_lines
-
-    # Compile regex for class/struct declaration
-    class_pattern = re.compile(r'\b(class|struct)\s+(\w+)\s*(?:[:\{])')
-
-    lines = content.splitlines()
-    processed_lines = []
-    for line in lines:
-        match = class_pattern.match(line)
-        if match:
-            class_type, class_name = match.groups()
-            comment = generate_class_comment(class_type, class_name, config)
-            processed_lines.extend(comment)
-        processed_lines.append(line)
-
-    # Return the processed content
-    return '\n'.join(processed_lines)
+"""------------------------------
+Module: ./core\jaldh_codeparser.py
+Description: <Short module description>
+Notes: Functions that parses the code and adds documentation headers. PythonBackend and
+    CBackend are the language backends of core.jaldh_backends; ast is only imported for Python
+    files and the C scanner only for C/C++ files. Their parse() results are cached per run by
+    core.jaldh_parsecache.
+Author: Peter Jacobi
+Created: 2025-06-22
+------------------------------"""
+
+import os
+from typing import NamedTuple, Sequence
+
+from core.jaldh_edits import Insertion, apply_insertions
+from core.jaldh_parsecache import ParsedSource
+from core.jaldh_templates import get_templates
+
+# Fields of ast nodes that hold statements (function/class bodies, if/else, try/except, match),
+# in source order
+PYTHON_BODY_FIELDS = ('body', 'handlers', 'orelse', 'finalbody', 'cases')
+
+def python_param_names(node, in_class=False):
+    """
+    Collects the parameter names of a function definition.
+
+    Parameters:
+        node (ast.FunctionDef | ast.AsyncFunctionDef): The function definition.
+        in_class (bool): Whether the function is a method, its self/cls parameter is skipped.
+
+    Returns:
+        list[str]: Parameter names, *args and **kwargs with their stars.
+    """
+    args = node.args
+    params = [arg.arg for arg in getattr(args, 'posonlyargs', []) + args.args]
+    if in_class and params and params[0] in ('self', 'cls'):
+        params = params[1:]
+    if args.vararg:
+        params.append(f'*{args.vararg.arg}')
+    params.extend(arg.arg for arg in args.kwonlyargs)
+    if args.kwarg:
+        params.append(f'**{args.kwarg.arg}')
+    return params
+
+
+def find_python_functions(tree):
+    """
+    Walks a module and yields all function definitions, including methods and nested functions.
+
+    Definitions are statements, so only statement bodies are visited and expressions are
+    never descended into.
+
+    Parameters:
+        tree (ast.Module): The parsed module.
+
+    Yields:
+        tuple: The function node and whether it is defined directly in a class, in source order.
+    """
+    import ast
+
+    stack = [(tree, False)]
+    while stack:
+        node, in_class = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield node, in_class
+        is_class = isinstance(node, ast.ClassDef)
+        # Pushed last field and last child first, so they are popped in source order
+        for field in reversed(PYTHON_BODY_FIELDS):
+            children = getattr(node, field, None)
+            if children:
+                stack.extend((child, is_class) for child in reversed(children))
+
+
+class DocGap(NamedTuple):
+    """A module or definition without documentation, as found by the *_doc_gaps() functions."""
+    insert_at: int                 # 0-based line the documentation goes in front of
+    line: int                      # 1-based line of the definition, for reports
+    kind: str                      # 'module', 'function', 'class', 'struct' or 'union'
+    name: str
+    params: Sequence[str] = ()
+    return_type: str = ''
+    indent: str = ''               # indentation of a Python docstring
+
+
+def python_doc_gaps(content, filename):
+    """
+    Finds the undocumented parts of a Python module without generating any text.
+
+    The module header is checked before the module is parsed, so a consumer that only needs
+    to know whether anything is missing can stop early.
+
+    Parameters:
+        content (str): The content of the Python file.
+        filename (str): The name of the file, used for the module gap and syntax errors.
+
+    Yields:
+        DocGap: The missing module header, then the functions without docstring.
+    """
+    lines = content.split('\n')
+    if not lines[0].strip().startswith('"""'):
+        yield DocGap(0, 1, 'module', filename)
+
+    # Parse the module, a syntax error is reported by the caller
+    import ast
+
+    tree = ast.parse(content, filename)
+    for node, in_class in find_python_functions(tree):
+        if ast.get_docstring(node, clean=False) is not None:
+            continue
+
+        # The docstring goes in front of the first body statement, which must start its own line
+        body_index = node.body[0].lineno - 1
+        body_line = lines[body_index]
+        indent = body_line[:len(body_line) - len(body_line.lstrip())]
+        if len(indent) < node.body[0].col_offset:
+            continue
+
+        # Keep comments between the signature and the body below the docstring
+        while body_index > 0 and (not lines[body_index - 1].strip() or lines[body_index - 1].lstrip().startswith('#')):
+            body_index -= 1
+
+        yield DocGap(body_index, node.lineno, 'function', node.name, python_param_names(node, in_class), '', indent)
+
+
+def python_insertions(content, config, filename):
+    """
+    Turns the undocumented parts of a Python module into an edit list.
+
+    Parameters:
+        content (str): The content of the Python file.
+        config (dict): Configuration dictionary for header generation.
+        filename (str): The name of the file being processed.
+
+    Returns:
+        list[Insertion]: The module header if missing, then one docstring per undocumented function.
+    """
+    templates = get_templates(config, 'python')
+    insertions = []
+    for gap in python_doc_gaps(content, filename):
+        if gap.kind == 'module':
+            insertions.append(Insertion(0, templates.module.render(filename=filename)))
+        else:
+            insertions.append(python_gap_insertion(templates, gap))
+    return insertions
+
+
+def python_gap_insertion(templates, gap):
+    """
+    Renders the docstring of an undocumented function.
+
+    Parameters:
+        templates (TemplateSet): The compiled Python templates.
+        gap (DocGap): The function, as found by python_doc_gaps().
+
+    Returns:
+        Insertion: The docstring in front of the first body statement.
+    """
+    return Insertion(gap.insert_at, templates.function.render(gap.indent, gap.params, name=gap.name))
+
+
+def parsed_source(gaps, templates, render):
+    """
+    Renders the definition comments of a source and leaves the module header out.
+
+    Parameters:
+        gaps (Iterable[DocGap]): The undocumented parts, as found by a *_doc_gaps() function.
+        templates (TemplateSet): The compiled templates of the language.
+        render (Callable[[TemplateSet, DocGap], Insertion]): Renders the comment of a definition.
+
+    Returns:
+        ParsedSource: Whether the module header is missing and the comments, see core.jaldh_parsecache.
+    """
+    module_header = False
+    insertions = []
+    for gap in gaps:
+        if gap.kind == 'module':
+            module_header = True
+        else:
+            insertions.append(render(templates, gap))
+    return ParsedSource(module_header, tuple(insertions))
+
+
+def parse_python_functions(content, config, filename):
+    """
+    Parses Python file content to add missing documentation headers.
+
+    Functions are found with the ast module, so methods, async functions, nested functions
+    and signatures spanning several lines are covered. The docstrings are collected as an
+    edit list and spliced into the content in one pass.
+
+    Parameters:
+        content (str): The content of the Python file.
+        config (dict): Configuration dictionary for header generation.
+        filename (str): The name of the file being processed.
+
+    Returns:
+        str: The Python content with added documentation headers.
+    """
+    return apply_insertions(content, python_insertions(content, config, filename))
+
+
+def is_c_comment_line(line):
+    """
+    Checks whether a line is (the end of) a comment, i.e. documents the line below.
+
+    Parameters:
+        line (str): The source line.
+
+    Returns:
+        bool: True if the line starts a comment or ends a block comment.
+    """
+    line = line.strip()
+    return line.startswith("/*") or line.startswith("//") or line.endswith("*/")
+
+
+def has_c_comment_above(lines, index):
+    """
+    Checks whether the line in front of a declaration is (the end of) a comment.
+
+    Parameters:
+        lines (list[str]): The source lines.
+        index (int): Index of the first line of the declaration.
+
+    Returns:
+        bool: True if the declaration is already documented.
+    """
+    return index > 0 and is_c_comment_line(lines[index - 1])
+
+
+def c_doc_gaps(decls, get_line, filename):
+    """
+    Finds the undocumented parts of a C/C++ file without generating any text.
+
+    Parameters:
+        decls (Iterable[CDecl]): The definitions in source order, consumed lazily.
+        get_line (Callable[[int], str]): Returns a source line by its 0-based index.
+        filename (str): The name of the file, used for the module gap.
+
+    Yields:
+        DocGap: The missing module header, then the definitions without a comment in front.
+    """
+    if not get_line(0).strip().startswith('/*'):
+        yield DocGap(0, 1, 'module', filename)
+
+    for decl in decls:
+        if decl.line > 0 and is_c_comment_line(get_line(decl.line - 1)):
+            continue
+        yield DocGap(decl.line, decl.line + 1, decl.kind, decl.name, decl.params, decl.return_type)
+
+
+def c_insertions(decls, get_line, config, filename, lang='c'):
+    """
+    Turns scanned C/C++ definitions into an edit list, skipping documented ones.
+
+    Parameters:
+        decls (Iterable[CDecl]): The definitions in source order.
+        get_line (Callable[[int], str]): Returns a source line by its 0-based index.
+        config (dict): Configuration dictionary for comment generation.
+        filename (str): The name of the file being processed.
+        lang (str): 'c' or 'cpp', selects the templates.
+
+    Yields:
+        Insertion: The module header if missing, then one comment per undocumented definition.
+    """
+    templates = get_templates(config, lang)
+    for gap in c_doc_gaps(decls, get_line, filename):
+        if gap.kind == 'module':
+            yield Insertion(0, templates.module.render(filename=filename))
+        else:
+            yield c_gap_insertion(templates, gap)
+
+
+def c_gap_insertion(templates, gap):
+    """
+    Renders the comment of an undocumented C/C++ function, class, struct or union.
+
+    Parameters:
+        templates (TemplateSet): The compiled C or C++ templates.
+        gap (DocGap): The definition, as found by c_doc_gaps().
+
+    Returns:
+        Insertion: The comment in front of the definition.
+    """
+    if gap.kind == 'function':
+        return Insertion(gap.insert_at, templates.function.render(params=gap.params, name=gap.name,
+                                                                  return_type=gap.return_type))
+    return Insertion(gap.insert_at, templates.class_.render(name=gap.name, kind=gap.kind))
+
+
+def parse_c_functions(content, config, filename, classes=False, lang='c'):
+    """
+    Parses C file content to add missing documentation comments.
+
+    Functions, and with classes set C++ classes/structs, are found in a single pass by
+    core.jaldh_cscanner, signatures may span several lines.
+
+    Parameters:
+        content (str): The content of the C file.
+        config (dict): Configuration dictionary for header generation.
+        filename (str): The name of the file being processed.
+        classes (bool): Whether to document C++ classes/structs as well.
+        lang (str): 'c' or 'cpp', selects the templates.
+
+    Returns:
+        str: The C content with added documentation headers and function comments.
+    """
+    lines = content.split('\n')
+    insertions = c_insertions(scan_c_blocks([content], classes), lines.__getitem__, config, filename, lang)
+    return apply_insertions(content, insertions)
+
+
+def stream_c_functions(source, config, filename, classes=False, lang='c'):
+    """
+    Streaming variant of parse_c_functions() for huge files.
+
+    The source is scanned block by block while the caller consumes the edit list, so only one
+    block and the pending statement are held in memory.
+
+    Parameters:
+        source (MappedSource): The mapped C/C++ file.
+        config (dict): Configuration dictionary for header generation.
+        filename (str): The name of the file being processed.
+        classes (bool): Whether to document C++ classes/structs as well.
+        lang (str): 'c' or 'cpp', selects the templates.
+
+    Returns:
+        Iterator[Insertion]: The edit list in line order, see core.jaldh_edits.stream_insertions().
+    """
+    return c_insertions(scan_c_blocks(source.blocks(), classes), source.line, config, filename, lang)
+
+
+def scan_c_blocks(blocks, classes=False):
+    """
+    Feeds a C/C++ source to the scanner block by block and hands out the definitions found in each block.
+
+    Parameters:
+        blocks (Iterable[str]): Blocks of complete lines, see core.jaldh_source.MappedSource.blocks().
+        classes (bool): Whether to report C++ classes/structs as well.
+
+    Yields:
+        CDecl: The definitions in source order, the next block is only scanned when needed.
+    """
+    # The C scanner compiles large patterns, Python-only runs never load it
+    from core.jaldh_cscanner import CScanner
+
+    scanner = CScanner(classes)
+    for block in blocks:
+        scanner.feed(block)
+        yield from scanner.decls
+        scanner.decls.clear()
+
+
+def parse_cpp_classes(content, config):
+    """
+    Parses C++ file content to add missing class documentation.
+
+    Parameters:
+        content (str): The content of the C++ file.
+        config (dict): Configuration dictionary for comment generation.
+
+    Returns:
+        str: The C++ content with added class documentation.
+    """
+    lines = content.split('\n')
+    class_template = get_templates(config, 'cpp').class_
+    insertions = [
+        Insertion(decl.line, class_template.render(name=decl.name, kind=decl.kind))
+        for decl in scan_c_blocks([content], classes=True)
+        if decl.kind != 'function' and not has_c_comment_above(lines, decl.line)
+    ]
+    return apply_insertions(content, insertions)
+
+
+class PythonBackend:
+    """Language backend for Python modules, see core.jaldh_backends."""
+
+    streaming = False
+
+    def __init__(self, name='python'):
+        self.name = name
+
+    def insertions(self, content, config, filename):
+        """Returns the edit list of a module, see python_insertions()."""
+        return python_insertions(content, config, filename)
+
+    def parse(self, content, config, filename):
+        """Returns the docstrings of the functions and whether the module header is missing."""
+        return parsed_source(python_doc_gaps(content, filename), get_templates(config, 'python'), python_gap_insertion)
+
+    def header(self, config, filename):
+        """Returns the module header of a file."""
+        return Insertion(0, get_templates(config, 'python').module.render(filename=filename))
+
+    def doc_gaps(self, content, filename):
+        """Yields the undocumented parts of a module, see python_doc_gaps()."""
+        return python_doc_gaps(content, filename)
+
+
+class CBackend:
+    """
+    Language backend for C and C++, see core.jaldh_backends.
+
+    Registered as 'c' and 'cpp', the name selects the templates. C++ headers (.h, .hpp) get
+    class comments as well.
+    """
+
+    streaming = True
+
+    def __init__(self, name='c'):
+        self.name = name
+
+    def _classes(self, filename):
+        """Checks whether classes/structs of a file are documented."""
+        return self.name == 'cpp' and os.path.splitext(filename)[1] in ('.h', '.hpp')
+
+    def insertions(self, content, config, filename):
+        """Returns the edit list of a file, see c_insertions()."""
+        return list(c_insertions(scan_c_blocks([content], self._classes(filename)), content.split('\n').__getitem__,
+                                 config, filename, self.name))
+
+    def parse(self, content, config, filename):
+        """Returns the comments of the definitions and whether the module header is missing."""
+        gaps = c_doc_gaps(scan_c_blocks([content], self._classes(filename)), content.split('\n').__getitem__, filename)
+        return parsed_source(gaps, get_templates(config, self.name), c_gap_insertion)
+
+    def header(self, config, filename):
+        """Returns the module header of a file."""
+        return Insertion(0, get_templates(config, self.name).module.render(filename=filename))
+
+    def doc_gaps(self, content, filename):
+        """Yields the undocumented parts of a file, see c_doc_gaps()."""
+        return c_doc_gaps(scan_c_blocks([content], self._classes(filename)), content.split('\n').__getitem__, filename)
+
+    def stream_insertions(self, source, config, filename):
+        """Returns the edit list of a mapped file while scanning it, see stream_c_functions()."""
+        return stream_c_functions(source, config, filename, self._classes(filename), self.name)
+
+    def stream_doc_gaps(self, source, filename):
+        """Yields the undocumented parts of a mapped file while scanning it."""
+        return c_doc_gaps(scan_c_blocks(source.blocks(), self._classes(filename)), source.line, filename)
@@ -1,50 +1,221 @@
-"""------------------------------
-Module: ./core\jaldh_config.py
-Description: Reads or if not existent generates a config file and returns its contents.
-Notes: <Special remarks or dependencies>
-Author: Peter Jacobi
-Created: 2025-06-22
-------------------------------"""
-
-import yaml
-import os
-from datetime import datetime
-
-DEFAULT_CONFIG = {
-    'language': 'auto',
-    'file_separator': '------------------------------',
-    'function_separator': '------------------------------',
-    'header': {
-        'author': 'Anonymous',
-        'include_date': True,
-        'date_format': '%Y-%m-%d'
-    }
-}
-
-def ensure_default_config(path='config.yaml'):
-    """------------------------------
-    Description: <Describe what ensure_default_config does>
-
-    Parameters:
-        path: <description>
-
-    Returns:
-        <description>
-    ------------------------------"""
-    if not os.path.exists(path):
-        with open(path, 'w') as f:
-            yaml.dump(DEFAULT_CONFIG, f)
-    return load_config(path)
-
-def load_config(path):
-    """------------------------------
-    Description: <Describe what load_config does>
-
-    Parameters:
-        path: <description>
-
-    Returns:
-        <description>
-    ------------------------------"""
-    with open(path, 'r') as f:
-        return yaml.safe_load(f)
\ No newline at end of file
+"""------------------------------
+Module: ./core\jaldh_config.py
+Description: Reads or if not existent generates a config file and returns its contents.
+Notes: <Special remarks or dependencies>
+Author: Peter Jacobi
+Created: 2025-06-22
+------------------------------"""
+
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from core.jaldh_logger import logIt
+
+
+def _yaml():
+    """Imports PyYAML on first use, it is the most expensive import of a run (see benchmarks/startup.py)."""
+    import yaml
+    return yaml
+
+
+def _safe_loader():
+    """The libyaml based loader is much faster, the pure Python one is the fallback."""
+    yaml = _yaml()
+    return getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Per-directory configuration, merged over the configuration of the parent directories
+LOCAL_CONFIG_FILE = '.jaldh.yaml'
+
+# A directory containing this entry is a repository root, .jaldh.yaml files above it are not read
+REPOSITORY_MARKER = '.git'
+
+DEFAULT_CONFIG = {
+    'language': 'auto',
+    'file_separator': '------------------------------',
+    'function_separator': '------------------------------',
+    'header': {
+        'author': 'Anonymous',
+        'include_date': True,
+        'date_format': '%Y-%m-%d'
+    },
+    'stream_threshold_mb': 64,
+    'parse_cache': 4096,
+    'sniff': {
+        'max_size_mb': 0,
+        'max_line_length': 0,
+        'skip_binary': True,
+        'skip_generated': True
+    },
+    'walk': {
+        'exclude': [],
+        'prune': [],
+        'symlinks': 'files'
+    },
+    'logging': {
+        'path': 'jaldh.log',
+        'bufsize': 64,
+        'flush_interval': 1.0
+    }
+}
+
+def ensure_default_config(path='config.yaml'):
+    """------------------------------
+    Description: <Describe what ensure_default_config does>
+
+    Parameters:
+        path: <description>
+
+    Returns:
+        <description>
+    ------------------------------"""
+    if not os.path.exists(path):
+        with open(path, 'w') as f:
+            _yaml().dump(DEFAULT_CONFIG, f)
+    return load_config(path)
+
+# Parsed configuration files by path: (mtime_ns, size, parsed data)
+_parsed_configs: Dict[str, Tuple[int, int, Any]] = {}
+
+
+def load_config(path):
+    """------------------------------
+    Description: Loads a YAML configuration file, parsed files are cached until their mtime or size changes.
+
+    Parameters:
+        path: Path of the configuration file.
+
+    Returns:
+        The parsed configuration. The object is shared between calls and must not be modified.
+    ------------------------------"""
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    cached = _parsed_configs.get(key)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2]
+    with open(key, 'r') as f:
+        data = _yaml().load(f, Loader=_safe_loader())
+    _parsed_configs[key] = (st.st_mtime_ns, st.st_size, data)
+    return data
+
+
+def merge_configs(base, override):
+    """------------------------------
+    Description: Merges a configuration over another one, nested sections are merged key by key.
+
+    Parameters:
+        base: The inherited configuration.
+        override: The configuration taking precedence.
+
+    Returns:
+        A new dict, the inputs are not modified.
+    ------------------------------"""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_configs(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class ConfigResolver:
+    """
+    Resolves the configuration of a directory from the run configuration and the
+    .jaldh.yaml files in the directory and its parents up to the run root.
+
+    Results are memoized per directory, so each directory is looked at once per resolver.
+    Directories without a .jaldh.yaml share the configuration object of their parent.
+    """
+
+    def __init__(self, base: dict, filename: str = LOCAL_CONFIG_FILE, roots: Iterable[str] = ()):
+        """
+        Parameters:
+            base (dict): The run configuration, e.g. from config.yaml.
+            filename (str): Name of the per-directory configuration files.
+            roots (Iterable[str]): Directories the lookup does not climb above, e.g. the directory
+                of config.yaml and the source directory. Roots inside another root are ignored.
+                Repository roots (REPOSITORY_MARKER) always end the lookup, without either it
+                climbs to the filesystem root.
+        """
+        self.base = base
+        self.filename = filename
+        roots = {os.path.abspath(root) for root in roots}
+        self.roots = frozenset(root for root in roots
+                               if not any(root.startswith(os.path.join(other, '')) for other in roots))
+        self._directories: Dict[str, dict] = {}
+        # Merged configuration per directory with a .jaldh.yaml, kept with its inputs, so
+        # resolving again after clear() returns the same object for unchanged files. A changed
+        # file replaces the entry of its directory
+        self._merged: Dict[str, Tuple[dict, dict, dict]] = {}
+
+    def for_file(self, filepath: str) -> dict:
+        """
+        Returns the configuration of a file.
+
+        Parameters:
+            filepath (str): The source file.
+
+        Returns:
+            dict: The configuration of the directory of the file.
+        """
+        return self.for_directory(os.path.dirname(os.path.abspath(filepath)))
+
+    def for_directory(self, directory: str) -> dict:
+        """
+        Returns the configuration of a directory.
+
+        Parameters:
+            directory (str): Absolute path of the directory.
+
+        Returns:
+            dict: The run configuration with all .jaldh.yaml files from the run root down to the
+                directory merged over it.
+        """
+        config = self._directories.get(directory)
+        if config is not None:
+            return config
+
+        parent = os.path.dirname(directory)
+        if parent == directory or self._is_root(directory):
+            config = self.base
+        else:
+            config = self.for_directory(parent)
+        local = self._load_local(os.path.join(directory, self.filename))
+        if local:
+            merged = self._merged.get(directory)
+            if merged is None or merged[0] is not config or merged[1] is not local:
+                merged = self._merged[directory] = (config, local, merge_configs(config, local))
+            config = merged[2]
+        else:
+            self._merged.pop(directory, None)
+        self._directories[directory] = config
+        return config
+
+    def _is_root(self, directory: str) -> bool:
+        """Checks whether the lookup stops at a directory, its own .jaldh.yaml is still read."""
+        return directory in self.roots or os.path.exists(os.path.join(directory, REPOSITORY_MARKER))
+
+    def clear(self) -> None:
+        """Forgets the resolved directories, e.g. to pick up changed .jaldh.yaml files."""
+        self._directories.clear()
+
+    @staticmethod
+    def _load_local(path: str) -> Optional[dict]:
+        """Loads a per-directory configuration, a missing or broken file counts as empty."""
+        try:
+            local = load_config(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, _yaml().YAMLError) as e:
+            print(f"Ignoring configuration file {path}: {e}")
+            logIt(f"Ignoring configuration file {path}: {e}")
+            return None
+        if local is not None and not isinstance(local, dict):
+            print(f"Ignoring configuration file {path}: not a mapping")
+            logIt(f"Ignoring configuration file {path}: not a mapping")
+            return None
+        if local and 'languages' in local:
+            # The languages decide which files are collected, so they are set for the whole run
+            logIt(f"Ignoring 'languages' in {path}: only read from the run configuration")
+            local = {key: value for key, value in local.items() if key != 'languages'}
+        return local
\ No newline at end of file
@@ -0,0 +1,610 @@
+"""------------------------------
+Module: ./core/jaldh_cscanner.py
+Description: Single pass scanner that finds function definitions and classes/structs in C and C++ sources.
+Notes: Works on blocks of complete lines in linear time. String and character literals, comments,
+    preprocessor directives and #if 0 blocks are skipped, signatures may span several lines.
+    The regex engine only stops at braces, semicolons, literals, comments and directives; the text
+    of a statement is tokenized only when it is followed by an opening brace, function bodies and
+    initializers are skipped. Line numbers are counted lazily for the found definitions.
+    Statements up to MAX_SIGNATURE_CHARS are first matched against a plain signature regex, only
+    other statements are tokenized.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+# Everything that can not hide a brace or semicolon. Each alternative starts with a different
+# character and is followed by plain characters only (the "unrolled loop" form), so every text has
+# exactly one way to match and a failing match gives up in linear time. String literals with more
+# than 256 characters between escapes stop the run, _literal_end() skips them with str.find(),
+# which is several times faster than the regex on the huge literals of generated tables.
+_SPECIAL = r'''(?:
+      "[^"\\\n]{0,256}(?:\\.[^"\\\n]{0,256})*"  # string literal
+    | '[^'\\\n]*(?:\\.[^'\\\n]*)*'        # character literal
+    | /\*[^*]*\*+(?:[^/*][^*]*\*+)*/      # block comment
+    | //[^\n]*(?=\n|\Z)                   # line comment
+    | /(?![*/])                           # division
+    | \n[ \t]*\#(?![ \t]*if[ \t]+0\b)     # directive line, except #if 0
+      [^\n\\]*(?:\\(?!\n\Z)[\s\S][^\n\\]*)*(?=\n|\Z)
+    | \n(?![ \t]*\#)                      # line break, unless a directive follows
+)'''
+
+
+def _run(plain: str) -> str:
+    # Plain characters and specials in the unrolled form plain*(special plain*)*
+    return f'{plain}*(?:{_SPECIAL}{plain}*)*'
+
+
+def _nested(run: str, depth: int) -> str:
+    # Balanced braces up to depth levels around runs, L(k) = run(\{L(k-1)\}run)*
+    pattern = run
+    for _ in range(depth):
+        pattern = f'{run}(?:\\{{{pattern}\\}}{run})*'
+    return pattern
+
+
+# Statement text at scope level, stops at braces, semicolons, directives and unterminated literals
+SCOPE_RUN = re.compile(_run(r'[^{};"\'/\n]'), re.VERBOSE)
+
+# Inside a skipped block: skips nested blocks up to four levels in one match and stops at the
+# closing brace, a deeper opening brace, a directive or an unterminated literal
+SKIP_RUN = re.compile(_nested(_run(r'[^{}"\'/\n]'), 4), re.VERBOSE)
+
+# Quotes of the literals the runs stop at, see _literal_end()
+QUOTES = ('"', "'")
+
+# Directive at a line start, and directives inside #if 0 blocks
+DIRECTIVE_START_PATTERN = re.compile(r'[ \t]*#')
+DIRECTIVE_LINE_PATTERN = re.compile(r'^[ \t]*#', re.MULTILINE)
+
+# A plain function signature with optional comments in front: "type name(params)" without
+# qualified names, templates, nested parentheses, literals or directives. It is classified like
+# its tokens would be, any other statement is tokenized.
+SIGNATURE_PATTERN = re.compile(r'''
+    (?:\s|/\*[^*]*\*+(?:[^/*][^*]*\*+)*/|//[^\n]*\n)*   # comments in front, each matched whole
+    ((?:[A-Za-z_]\w*[\s*&]+)+)                          # return type and specifiers
+    ([A-Za-z_]\w*)\s*                                   # name
+    \(([^()"'/\#:=]*)\)                                 # parameters
+    [\w\s&]*                                           # trailers like const
+    \Z''', re.VERBOSE)
+
+# Tokens of a SIGNATURE_PATTERN match, which has no literals, comments or '::'
+SIGNATURE_TOKEN_PATTERN = re.compile(r'\w+|\S')
+
+# The name at the end of each parameter of a plain parameter list
+PARAM_NAME_PATTERN = re.compile(r'\b([A-Za-z_]\w*)\s*(?=,|\Z)')
+
+# Tokens of a statement in front of an opening brace, most frequent first. Comments and directive
+# lines are matched as tokens of their own to be dropped, see _is_noise().
+TOKEN_PATTERN = re.compile(r'''\s*(
+      \w+
+    | ::
+    | "(?:[^"\\\n]|\\.)*"?
+    | '(?:[^'\\\n]|\\.)*'?
+    | /\*.*?(?:\*/|\Z)
+    | //[^\n]*
+    | \#(?:[^\n\\]|\\.)*
+    | [^\s\w]
+)''', re.VERBOSE | re.DOTALL)
+
+# Comments and directive lines of a statement, literals are matched to be kept as they are
+NOISE_PATTERN = re.compile(r'''
+      "(?:[^"\\\n]|\\.)*"?
+    | '(?:[^'\\\n]|\\.)*'?
+    | (/\*.*?(?:\*/|\Z) | //[^\n]* | \#(?:[^\n\\]|\\.)*)
+''', re.VERBOSE | re.DOTALL)
+
+DIRECTIVE_PATTERN = re.compile(r'#\s*(\w*)\s*(\S*)')
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_]\w*$')
+
+# Names in front of a parenthesis that never name a function definition
+KEYWORDS = frozenset((
+    'if', 'else', 'for', 'while', 'do', 'switch', 'case', 'return', 'sizeof', 'catch', 'new',
+    'delete', 'goto', 'typedef', 'using', 'static_assert', 'alignof', 'defined',
+))
+# Parenthesized trailers between the parameter list and the body
+TRAILERS = frozenset(('throw', 'noexcept', '__attribute__', '__declspec', 'alignas', 'requires', 'decltype'))
+# Specifiers that are not a return type on their own (constructors)
+SPECIFIERS = frozenset(('explicit', 'inline', 'virtual', 'static', 'constexpr', 'consteval', 'friend', 'extern'))
+RECORDS = frozenset(('class', 'struct', 'union'))
+ACCESS = frozenset(('public', 'protected', 'private'))
+OPENING = frozenset(('(', '[', '<'))
+CLOSING = frozenset((')', ']', '>'))
+BRACKETS = OPENING | CLOSING
+
+# Longest statement that is matched against SIGNATURE_PATTERN before it is tokenized
+MAX_SIGNATURE_CHARS = 1024
+
+# Statements longer than this without their comments and directives are not signatures (e.g.
+# generated tables), their text is dropped
+MAX_STATEMENT_CHARS = 8192
+
+
+class CDecl(NamedTuple):
+    """A definition found by the scanner."""
+    kind: str            # 'function', 'class', 'struct' or 'union'
+    line: int            # 0-based index of the first line of the declaration
+    name: str
+    return_type: str
+    params: List[str]
+
+
+def _literal_end(text: str, pos: int) -> int:
+    """
+    Skips a string or character literal the runs stopped at, like the literal alternatives of
+    _SPECIAL would, but with str.find() instead of a character class.
+
+    Parameters:
+        text (str): The block of source.
+        pos (int): Offset of the opening quote.
+
+    Returns:
+        int: The offset after the closing quote. An unterminated literal ends at the line end.
+    """
+    quote = text[pos]
+    pos += 1
+    while True:
+        close = text.find(quote, pos)
+        end = close if close >= 0 else len(text)
+        newline = text.find('\n', pos, end)
+        if newline >= 0:
+            return newline
+        if close < 0:
+            return end
+        # The quote is escaped by an odd number of backslashes in front of it
+        escape = close
+        while text[escape - 1] == '\\':
+            escape -= 1
+        if (close - escape) % 2 == 0:
+            return close + 1
+        pos = close + 1
+
+
+def _is_noise(token: str) -> bool:
+    """Checks whether a token is a comment or a directive line."""
+    return token[0] == '#' or token[:2] in ('/*', '//')
+
+
+def _strip_noise(match: 're.Match') -> str:
+    """NOISE_PATTERN replacement, keeps literals and only the line breaks of comments and directives."""
+    if match.group(1) is None:
+        return match.group(0)
+    return '\n' * match.group(1).count('\n')
+
+
+def _is_word_char(char: str) -> bool:
+    """Checks whether a character belongs to an identifier or number."""
+    return char.isalnum() or char == '_'
+
+
+def _join_tokens(tokens: List[str]) -> str:
+    """Joins tokens to source like text, with blanks only between words and after commas."""
+    text = ''
+    for token in tokens:
+        if text and (text[-1] == ',' or _is_word_char(text[-1]) and _is_word_char(token[0])):
+            text += ' '
+        text += token
+    return text
+
+
+def _param_names(tokens: List[str]) -> List[str]:
+    """Extracts the parameter names of a parameter list, without the enclosing parentheses."""
+    if BRACKETS.isdisjoint(tokens):
+        # Plain parameter list, the common case
+        segments = [[]]
+        for token in tokens:
+            if token == ',':
+                segments.append([])
+            else:
+                segments[-1].append(token)
+    else:
+        segments = [[]]
+        depth = 0
+        for token in tokens:
+            if token in OPENING:
+                depth += 1
+            elif token in CLOSING:
+                depth -= 1
+            elif token == ',' and depth == 0:
+                segments.append([])
+                continue
+            segments[-1].append(token)
+
+    names = []
+    for segment in segments:
+        if '=' in segment:
+            segment = segment[:segment.index('=')]
+        if not segment or segment == ['void']:
+            continue
+        if IDENTIFIER_PATTERN.match(segment[-1]) and '(' not in segment:
+            names.append(segment[-1])
+            continue
+        if all(token == '.' for token in segment):
+            names.append('...')
+            continue
+        identifiers = [token for token in segment if IDENTIFIER_PATTERN.match(token)]
+        if not identifiers:
+            continue
+        if '(' in segment:
+            # Function pointer, the name is the first identifier inside the parentheses
+            inner = [token for token in segment[segment.index('(') + 1:] if IDENTIFIER_PATTERN.match(token)]
+            names.append(inner[0] if inner else identifiers[-1])
+        else:
+            names.append(identifiers[-1])
+    return names
+
+
+@lru_cache(maxsize=256)
+def _signature_type(text: str) -> Optional[str]:
+    """Returns the return type of a SIGNATURE_PATTERN match, None if it is not a function definition."""
+    tokens = SIGNATURE_TOKEN_PATTERN.findall(text)
+    if 'namespace' in tokens[:3] or all(token in SPECIFIERS for token in tokens):
+        return None
+    return _join_tokens(tokens)
+
+
+class CScanner:
+    """
+    Incremental scanner, feed() it the source in blocks of complete lines and read the found
+    definitions from decls.
+    """
+
+    def __init__(self, classes: bool = False):
+        """
+        Parameters:
+            classes (bool): Whether to report classes/structs/unions in addition to functions.
+        """
+        self.classes = classes
+        self.decls = []
+        self.in_comment = False
+        self.pp_continued = False
+        self.pp_skip = 0
+        self.skip_depth = 0
+        self.scope_depth = 0
+        # Line counting, line_pos is the offset in the current block that line_no refers to
+        self.text = ''
+        self.line_pos = 0
+        self.line_no = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        """Starts a new statement."""
+        self.fragments = []
+        self.size = 0
+        self.overflow = False
+        self.tokens = []
+        self.token_starts = []
+        self.dropped = 0
+
+    def _line(self, offset: int) -> int:
+        """Returns the 0-based line number of an offset in the current block, offsets never decrease."""
+        self.line_no += self.text.count('\n', self.line_pos, offset)
+        self.line_pos = offset
+        return self.line_no
+
+    def _append(self, start: int, end: int) -> None:
+        """Adds source text to the current statement, within MAX_STATEMENT_CHARS."""
+        if self.overflow:
+            return
+        self.fragments.append((self._line(start), self.text[start:end]))
+        self.size += end - start
+        if self.size > MAX_STATEMENT_CHARS:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drops the comments and directives of an oversized statement, or the whole statement text."""
+        fragments = [(lineno, NOISE_PATTERN.sub(_strip_noise, text)) for lineno, text in self.fragments]
+        size = sum(len(text) for _, text in fragments)
+        if size > MAX_STATEMENT_CHARS:
+            self.overflow = True
+            self.fragments = []
+        else:
+            self.fragments = fragments
+            self.size = size
+
+    def _tokenize(self) -> None:
+        """Splits the current statement into tokens, dropping leading access specifiers."""
+        tokens = self.tokens
+        starts = self.token_starts
+        for _, text in self.fragments:
+            starts.append(len(tokens))
+            if '/' in text or '#' in text:
+                tokens.extend(token for token in TOKEN_PATTERN.findall(text) if not _is_noise(token))
+            else:
+                tokens.extend(TOKEN_PATTERN.findall(text))
+        self.dropped = 0
+        while tokens and tokens[0] in ACCESS and ':' in tokens[1:3]:
+            end = tokens.index(':') + 1
+            del tokens[:end]
+            self.dropped += end
+
+    def _token_line(self, index: int) -> int:
+        """Returns the 0-based line number of a token of the current statement."""
+        index += self.dropped
+        fragment = bisect_right(self.token_starts, index) - 1
+        lineno, text = self.fragments[fragment]
+        count = index - self.token_starts[fragment]
+        for match in TOKEN_PATTERN.finditer(text):
+            if _is_noise(match.group(1)):
+                continue
+            if not count:
+                return lineno + text.count('\n', 0, match.start(1))
+            count -= 1
+        return lineno
+
+    def feed(self, text: str) -> None:
+        """
+        Scans the next block of source.
+
+        Parameters:
+            text (str): One or more complete lines, separated by newlines.
+
+        Returns:
+            None
+        """
+        self.text = text
+        self.line_pos = 0
+        length = len(text)
+        pos = 0
+
+        # State carried over from the previous block
+        if self.pp_continued:
+            pos = self._directive_end(0, 0)
+        if self.in_comment:
+            end = text.find('*/', pos)
+            if end < 0:
+                pos = length
+            else:
+                self.in_comment = False
+                pos = end + 2
+        elif pos == 0 and DIRECTIVE_START_PATTERN.match(text):
+            pos = self._directive_end(text.index('#'), text.index('#') + 1)
+        pos = self._skip_disabled(pos)
+
+        # start is the beginning of the pending statement text, pos the scan position
+        start = pos
+        while pos < length:
+            pos = (SKIP_RUN if self.skip_depth else SCOPE_RUN).match(text, pos).end()
+            if pos >= length:
+                break
+            char = text[pos]
+
+            if char == '\n':
+                # An #if 0 (or a directive continued in the next block) starts on the next line
+                self._flush(start, pos)
+                index = text.index('#', pos)
+                start = pos = self._skip_disabled(self._directive_end(index, index + 1))
+            elif char == '/':
+                # Unterminated block comment, continued in the next block
+                self._flush(start, pos)
+                self.in_comment = True
+                start = pos = length
+            elif char in QUOTES:
+                # Long or unterminated literal
+                pos = _literal_end(text, pos)
+            elif self.skip_depth:
+                pos += 1
+                if char == '{':
+                    self.skip_depth += 1
+                else:
+                    self.skip_depth -= 1
+                    if not self.skip_depth:
+                        self._reset()
+                        start = pos
+            elif char == ';':
+                self._reset()
+                start = pos = pos + 1
+            elif char == '{':
+                self._flush(start, pos)
+                self._open_block()
+                start = pos = pos + 1
+            else:
+                if self.scope_depth:
+                    self.scope_depth -= 1
+                self._reset()
+                start = pos = pos + 1
+
+        if not self.skip_depth:
+            self._flush(start, length)
+
+        # Continue the line count in the next block
+        self._line(length)
+        self.text = ''
+
+    def _flush(self, start: int, end: int) -> None:
+        """Adds pending source text to the current statement unless it is blank."""
+        if end > start and not self.text[start:end].isspace():
+            self._append(start, end)
+
+    def _skip_disabled(self, pos: int) -> int:
+        """Skips the lines of an #if 0 block, returns the offset to continue at."""
+        while self.pp_skip:
+            match = DIRECTIVE_LINE_PATTERN.search(self.text, pos)
+            if match is None:
+                return len(self.text)
+            pos = self._directive_end(match.end() - 1, match.end())
+        return pos
+
+    def _directive_end(self, start: int, pos: int) -> int:
+        """Handles the directive starting at start, returns the offset of its line end."""
+        text = self.text
+        self.pp_continued = False
+        end = text.find('\n', pos)
+        while end > pos and text[end - 1] == '\\':
+            next_end = text.find('\n', end + 1)
+            if next_end < 0:
+                # Continued in the next block
+                self.pp_continued = end == len(text) - 1
+                end = len(text)
+                break
+            end = next_end
+        if end < 0:
+            end = len(text)
+        if text[start] == '#':
+            self._directive(text[start:end])
+        return end
+
+    def _directive(self, stripped: str) -> None:
+        """Tracks #if 0 blocks, all other directives are ignored."""
+        match = DIRECTIVE_PATTERN.match(stripped)
+        word, arg = match.groups()
+        if self.pp_skip:
+            if word in ('if', 'ifdef', 'ifndef'):
+                self.pp_skip += 1
+            elif word == 'endif':
+                self.pp_skip -= 1
+            elif word in ('else', 'elif') and self.pp_skip == 1:
+                self.pp_skip = 0
+        elif word == 'if' and arg == '0':
+            self.pp_skip = 1
+
+    def _open_block(self) -> None:
+        """Classifies the statement in front of an opening brace."""
+        if len(self.fragments) == 1 and self.size <= MAX_SIGNATURE_CHARS and self._signature():
+            self.skip_depth = 1
+            self._reset()
+            return
+        self._tokenize()
+        tokens = self.tokens
+        if self.overflow or not tokens:
+            self.skip_depth = 1
+        elif 'namespace' in tokens[:3] or (tokens[0] == 'extern' and len(tokens) == 2 and tokens[1][0] == '"'):
+            self.scope_depth += 1
+        elif '(' in tokens:
+            decl = self._function()
+            if decl is not None:
+                self.decls.append(decl)
+            self.skip_depth = 1
+        elif '=' not in tokens and self._record():
+            self.scope_depth += 1
+        else:
+            self.skip_depth = 1
+        self._reset()
+
+    def _signature(self) -> bool:
+        """Records a statement matching SIGNATURE_PATTERN, False if it has to be tokenized."""
+        lineno, text = self.fragments[0]
+        match = SIGNATURE_PATTERN.match(text)
+        if match is None:
+            return False
+        type_start, name, params = match.start(1), match.group(2), match.group(3)
+        return_type = _signature_type(match.group(1))
+        if return_type is None or name in KEYWORDS or name in TRAILERS:
+            return False
+        # One name per parameter, anything else goes the token way
+        names = PARAM_NAME_PATTERN.findall(params)
+        if len(names) != params.count(',') + 1 or 'void' in names or '<' in params or '[' in params:
+            names = _param_names(SIGNATURE_TOKEN_PATTERN.findall(params))
+        self.decls.append(CDecl('function', lineno + text.count('\n', 0, type_start), name, return_type, names))
+        return True
+
+    def _record(self) -> bool:
+        """Checks for a class/struct/union body and records it, returns True for a record."""
+        tokens = self.tokens
+        for i, token in enumerate(tokens):
+            if token in RECORDS:
+                if i and tokens[i - 1] == 'enum':
+                    return False
+                if self.classes and i + 1 < len(tokens) and IDENTIFIER_PATTERN.match(tokens[i + 1]):
+                    self.decls.append(CDecl(token, self._token_line(0), tokens[i + 1], '', []))
+                return True
+        return False
+
+    def _function(self) -> Optional[CDecl]:
+        """Matches the statement against a function definition signature."""
+        tokens = self.tokens
+
+        # Top level parenthesis groups as (open, close) index pairs
+        groups = []
+        depth = 0
+        start = 0
+        for i in [i for i, token in enumerate(tokens) if token == '(' or token == ')']:
+            if tokens[i] == '(':
+                if not depth:
+                    start = i
+                depth += 1
+            else:
+                depth -= 1
+                if depth < 0:
+                    return None
+                if not depth:
+                    groups.append((start, i))
+
+        # The parameter list is the last group that is not a trailer like noexcept(...)
+        for index in range(len(groups) - 1, -1, -1):
+            open_index, close_index = groups[index]
+            first = open_index - 1
+            if first < 0:
+                return None
+            name = tokens[first]
+            if name in TRAILERS:
+                continue
+
+            if not IDENTIFIER_PATTERN.match(name):
+                # operator==, operator() and friends
+                while first > 0 and first >= open_index - 4 and not IDENTIFIER_PATTERN.match(tokens[first]):
+                    first -= 1
+                if tokens[first] != 'operator':
+                    return None
+                name = ''.join(tokens[first:open_index])
+            elif name in KEYWORDS:
+                return None
+
+            # Qualified names like ns::Class::method
+            while first >= 2 and tokens[first - 1] == '::' and IDENTIFIER_PATTERN.match(tokens[first - 2]):
+                first -= 2
+                name = tokens[first] + '::' + name
+
+            if '=' in tokens[:first]:
+                return None
+
+            # The return type starts after a preceding group, e.g. a macro invocation
+            type_start = 0
+            for _, group_close in groups:
+                if group_close < first:
+                    type_start = group_close + 1
+            type_tokens = tokens[type_start:first]
+            if type_tokens and type_tokens[0] == 'template':
+                type_start, type_tokens = self._skip_template(type_start, first)
+
+            # Constructors, destructors and initializer lists have no return type
+            if (not type_tokens or type_tokens[-1] in ('~', '::') or ':' in type_tokens
+                    or all(token in SPECIFIERS for token in type_tokens)):
+                return None
+
+            return CDecl('function', self._token_line(type_start), name, _join_tokens(type_tokens),
+                         _param_names(tokens[open_index + 1:close_index]))
+        return None
+
+    def _skip_template(self, start: int, end: int):
+        """Skips a leading template<...> clause, returns the new start index and the remaining type tokens."""
+        tokens = self.tokens
+        depth = 0
+        for i in range(start + 1, end):
+            if tokens[i] == '<':
+                depth += 1
+            elif tokens[i] == '>':
+                depth -= 1
+                if not depth:
+                    return i + 1, tokens[i + 1:end]
+        return end, []
+
+
+def scan_c_source(text: str, classes: bool = False) -> List[CDecl]:
+    """
+    Finds function definitions, and optionally classes/structs, in C or C++ source.
+
+    Parameters:
+        text (str): The source, lines separated by newlines.
+        classes (bool): Whether to report classes/structs/unions as well.
+
+    Returns:
+        List[CDecl]: The definitions in source order.
+    """
+    scanner = CScanner(classes)
+    scanner.feed(text)
+    return scanner.decls
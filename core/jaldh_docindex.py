@@ -0,0 +1,432 @@
+"""------------------------------
+Module: ./core/jaldh_docindex.py
+Description: Indexed documentation store (--doc-index), renders text, Markdown or JSON reports from it.
+Notes: The index is a SQLite database (stdlib sqlite3) with one row per file (size, mtime,
+    content hash, language, module header) and one row per function or class. A run only
+    re-extracts files whose size and mtime changed, touched files with the same content only
+    get their mtime updated. Rows of deleted files are removed. Languages are detected with the
+    registry of the run configuration, a change of the configured languages rebuilds the index. sqlite3, the worker pools and the
+    language parsers are imported on first use, the command line only needs the constants.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import io
+import json
+import os
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.jaldh_backends import BackendRegistry, get_registry
+from core.jaldh_logger import logIt
+from core.jaldh_source import decode_source
+
+if TYPE_CHECKING:
+    import ast
+
+    from core.jaldh_stats import RunStats
+
+DOC_INDEX_FILE = '.jaldh-doc.db'
+# Bump when the extraction changes, older indexes are rebuilt
+DOC_INDEX_VERSION = 1
+
+REPORT_FORMATS = ('text', 'markdown', 'json')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT,
+    language TEXT, header TEXT, error TEXT);
+CREATE TABLE IF NOT EXISTS symbols (
+    path TEXT, line INTEGER, kind TEXT, name TEXT, return_type TEXT,
+    params TEXT, documented INTEGER, summary TEXT);
+CREATE INDEX IF NOT EXISTS symbols_path ON symbols (path);
+'''
+
+
+class Symbol(NamedTuple):
+    """A function, method or class of a file."""
+    line: int                 # 1-based line of the definition
+    kind: str                 # 'function', 'method', 'class', 'struct' or 'union'
+    name: str
+    return_type: Optional[str]
+    params: List[str]
+    documented: bool
+    summary: Optional[str]    # first line of the docstring (Python)
+
+
+class FileDoc(NamedTuple):
+    """The indexed documentation of a file."""
+    path: str
+    language: Optional[str]
+    header: Optional[str]
+    symbols: List[Symbol]
+    error: Optional[str] = None
+
+
+def _docstring_summary(node: 'ast.AST') -> Optional[str]:
+    """Returns the first line of a docstring with text, skipping separator lines."""
+    import ast
+
+    docstring = ast.get_docstring(node)
+    if not docstring:
+        return None
+    for line in docstring.splitlines():
+        line = line.strip()
+        if line and line.strip('-=') and line != '"""':
+            return line
+    return None
+
+
+def python_symbols(text: str, filename: str) -> List[Symbol]:
+    """
+    Lists the classes, functions and methods of a Python module.
+
+    Parameters:
+        text (str): The module source.
+        filename (str): Used in syntax error messages.
+
+    Returns:
+        List[Symbol]: The definitions in line order.
+    """
+    import ast
+    from core.jaldh_codeparser import PYTHON_BODY_FIELDS, python_param_names
+
+    tree = ast.parse(text, filename)
+    symbols = []
+    stack = [(tree, False)]
+    while stack:
+        node, in_class = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append(Symbol(node.lineno, 'method' if in_class else 'function', node.name, None,
+                                  python_param_names(node, in_class), ast.get_docstring(node) is not None,
+                                  _docstring_summary(node)))
+        elif isinstance(node, ast.ClassDef):
+            symbols.append(Symbol(node.lineno, 'class', node.name, None, [], ast.get_docstring(node) is not None,
+                                  _docstring_summary(node)))
+        is_class = isinstance(node, ast.ClassDef)
+        for field in PYTHON_BODY_FIELDS:
+            children = getattr(node, field, None)
+            if children:
+                stack.extend((child, is_class) for child in children)
+    symbols.sort()
+    return symbols
+
+
+def c_symbols(text: str) -> List[Symbol]:
+    """
+    Lists the functions, classes and structs of a C/C++ source.
+
+    Parameters:
+        text (str): The source.
+
+    Returns:
+        List[Symbol]: The definitions in line order, documented if a comment ends right above them.
+    """
+    from core.jaldh_codeparser import is_c_comment_line
+    from core.jaldh_cscanner import scan_c_source
+
+    lines = text.split('\n')
+    return [Symbol(decl.line + 1, decl.kind, decl.name, decl.return_type if decl.kind == 'function' else None,
+                   decl.params, decl.line > 0 and is_c_comment_line(lines[decl.line - 1]), None)
+            for decl in scan_c_source(text, classes=True)]
+
+
+def extract_file(filepath: str, language: Optional[str]) -> Tuple[FileDoc, Tuple[int, int, str]]:
+    """
+    Extracts the documentation of a file.
+
+    Parameters:
+        filepath (str): The file.
+        language (Optional[str]): The language of the file as the registry of the run detects it,
+            symbols are only extracted for Python and C/C++.
+
+    Returns:
+        Tuple[FileDoc, Tuple[int, int, str]]: The documentation, and size, mtime and content hash
+            of the extracted content.
+
+    Raises:
+        OSError: If the file can not be read.
+    """
+    import hashlib
+
+    st = os.stat(filepath)
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    stamp = (len(data), st.st_mtime_ns, hashlib.sha256(data).hexdigest())
+    text = decode_source(data).text
+
+    from core.jaldh_docwriter import scan_header
+
+    header = scan_header(io.StringIO(text))
+    try:
+        if language == 'python':
+            symbols = python_symbols(text, filepath)
+        elif language in ('c', 'cpp'):
+            symbols = c_symbols(text)
+        else:
+            symbols = []
+    except (SyntaxError, ValueError) as e:
+        return FileDoc(filepath, language, header, [], f"Could not parse: {e}"), stamp
+    return FileDoc(filepath, language, header, symbols), stamp
+
+
+def _extract_or_error(filepath: str, language: Optional[str]) -> Tuple[FileDoc, Optional[Tuple[int, int, str]], float]:
+    """Runs extract_file() in a worker, a read error becomes part of the result, the seconds taken are added."""
+    start = time.perf_counter()
+    try:
+        doc, stamp = extract_file(filepath, language)
+    except OSError as e:
+        doc, stamp = FileDoc(filepath, language, None, [], f"Could not read file: {e}"), None
+    return doc, stamp, time.perf_counter() - start
+
+
+class DocIndex:
+    """
+    SQLite store of extracted documentation, keyed by absolute path.
+    """
+
+    def __init__(self, path: str = DOC_INDEX_FILE, registry: Optional[BackendRegistry] = None):
+        """
+        Parameters:
+            path (str): Database file, ':memory:' for a throw-away index.
+            registry (Optional[BackendRegistry]): Detects the languages of the files, the registry
+                of the run configuration (core.jaldh_backends.get_registry()). None for the
+                built-in languages only.
+        """
+        import sqlite3
+
+        self.path = path
+        self.registry = registry if registry is not None else get_registry()
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        meta = dict(self.db.execute("SELECT key, value FROM meta"))
+        languages = json.dumps(self.registry.by_extension, sort_keys=True)
+        if meta.get('version') != str(DOC_INDEX_VERSION) or meta.get('languages', languages) != languages:
+            # Written by another version of the extraction or with other languages, start over
+            with self.db:
+                self.db.execute("DELETE FROM files")
+                self.db.execute("DELETE FROM symbols")
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(DOC_INDEX_VERSION),))
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('languages', ?)", (languages,))
+
+    def close(self) -> None:
+        """Closes the database."""
+        self.db.close()
+
+    def __enter__(self) -> 'DocIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def update(self, filepaths: Sequence[str], jobs: int = 1, executor: str = 'process',
+               stats: Optional['RunStats'] = None) -> Tuple[int, int]:
+        """
+        Brings the index up to date for the given files.
+
+        Parameters:
+            filepaths (Sequence[str]): Files to index.
+            jobs (int): Number of workers for the extraction, 0 uses one per CPU.
+            executor (str): 'process' or 'thread', see core.jaldh_runner.
+            stats (Optional[RunStats]): Run statistics the timings of the extracted files are added to.
+
+        Returns:
+            Tuple[int, int]: Number of extracted and of unchanged files.
+        """
+        import hashlib
+
+        known = {path: (size, mtime_ns, digest) for path, size, mtime_ns, digest
+                 in self.db.execute("SELECT path, size, mtime_ns, hash FROM files")}
+
+        stale = []
+        touched = []
+        for filepath in filepaths:
+            key = os.path.abspath(filepath)
+            entry = known.get(key)
+            if entry is None:
+                stale.append(filepath)
+                continue
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                stale.append(filepath)
+                continue
+            if st.st_size != entry[0]:
+                stale.append(filepath)
+            elif st.st_mtime_ns != entry[1]:
+                # Touched but possibly not modified, let the content decide
+                try:
+                    with open(filepath, 'rb') as f:
+                        unchanged = hashlib.sha256(f.read()).hexdigest() == entry[2]
+                except OSError:
+                    unchanged = False
+                if unchanged:
+                    touched.append((st.st_mtime_ns, key))
+                else:
+                    stale.append(filepath)
+
+        with self.db:
+            self.db.executemany("UPDATE files SET mtime_ns = ? WHERE path = ?", touched)
+            for doc, stamp, seconds in self._extract(stale, jobs, executor):
+                self._store(doc, stamp)
+                if stats is not None:
+                    stats.add_file(doc.path, {'parse': seconds, 'total': seconds,
+                                              'bytes_in': stamp[0] if stamp else 0, 'bytes_out': 0})
+            # Forget files that are gone
+            gone = [(path,) for path in known if not os.path.exists(path)]
+            self.db.executemany("DELETE FROM files WHERE path = ?", gone)
+            self.db.executemany("DELETE FROM symbols WHERE path = ?", gone)
+        logIt(f"Doc index {self.path}: {len(stale)} extracted, {len(filepaths) - len(stale)} unchanged, "
+              f"{len(gone)} removed")
+        return len(stale), len(filepaths) - len(stale)
+
+    def _extract(self, filepaths: Sequence[str], jobs: int,
+                 executor: str) -> Iterator[Tuple[FileDoc, Optional[Tuple[int, int, str]], float]]:
+        """Extracts the files, in a worker pool if jobs asks for one."""
+        if jobs == 0:
+            jobs = os.cpu_count() or 1
+        languages = [self.registry.language_of(filepath) for filepath in filepaths]
+        if jobs <= 1 or len(filepaths) <= 1:
+            yield from map(_extract_or_error, filepaths, languages)
+            return
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        if executor == 'thread':
+            pool = ThreadPoolExecutor(max_workers=jobs)
+            chunksize = 1
+        else:
+            pool = ProcessPoolExecutor(max_workers=jobs)
+            chunksize = max(1, min(64, len(filepaths) // (jobs * 4)))
+        with pool:
+            yield from pool.map(_extract_or_error, filepaths, languages, chunksize=chunksize)
+
+    def _store(self, doc: FileDoc, stamp: Optional[Tuple[int, int, str]]) -> None:
+        """Replaces the rows of a file."""
+        key = os.path.abspath(doc.path)
+        self.db.execute("DELETE FROM symbols WHERE path = ?", (key,))
+        if stamp is None:
+            # Unreadable, keep no row so the next run tries again
+            self.db.execute("DELETE FROM files WHERE path = ?", (key,))
+            return
+        size, mtime_ns, digest = stamp
+        self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (key, size, mtime_ns, digest, doc.language, doc.header, doc.error))
+        self.db.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            [(key, symbol.line, symbol.kind, symbol.name, symbol.return_type,
+                              json.dumps(symbol.params), int(symbol.documented), symbol.summary)
+                             for symbol in doc.symbols])
+
+    def documents(self, filepaths: Iterable[str]) -> Iterator[FileDoc]:
+        """
+        Reads the documentation of files from the index.
+
+        Parameters:
+            filepaths (Iterable[str]): Files in report order, files missing from the index are
+                reported as unreadable.
+
+        Yields:
+            FileDoc: The documentation, with path as given.
+        """
+        files = {path: (language, header, error) for path, language, header, error
+                 in self.db.execute("SELECT path, language, header, error FROM files")}
+        symbols: Dict[str, List[Symbol]] = {}
+        for path, line, kind, name, return_type, params, documented, summary in self.db.execute(
+                "SELECT path, line, kind, name, return_type, params, documented, summary FROM symbols "
+                "ORDER BY path, line"):
+            symbols.setdefault(path, []).append(
+                Symbol(line, kind, name, return_type, json.loads(params), bool(documented), summary))
+
+        for filepath in filepaths:
+            key = os.path.abspath(filepath)
+            entry = files.get(key)
+            if entry is None:
+                yield FileDoc(filepath, self.registry.language_of(filepath), None, [], "Could not read file.")
+            else:
+                language, header, error = entry
+                yield FileDoc(filepath, language, header, symbols.get(key, []), error)
+
+
+def _signature(symbol: Symbol) -> str:
+    """Formats a symbol for the reports."""
+    if symbol.kind in ('function', 'method'):
+        signature = f"{symbol.name}({', '.join(symbol.params)})"
+        if symbol.return_type:
+            signature = f"{symbol.return_type} {signature}"
+        return signature
+    return symbol.name
+
+
+def write_report(docs: Iterable[FileDoc], output_file: str, fmt: str = 'text') -> None:
+    """
+    Writes a documentation report.
+
+    Parameters:
+        docs (Iterable[FileDoc]): The documentation in report order.
+        output_file (str): The report file.
+        fmt (str): One of REPORT_FORMATS. 'text' follows the layout of
+            core.jaldh_docwriter.extract_headers_and_write_doc() and adds the definitions.
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report format: {fmt}")
+    with open(output_file, 'w', encoding='utf-8') as out:
+        if fmt == 'json':
+            json.dump({'files': [{
+                'path': doc.path,
+                'language': doc.language,
+                'header': doc.header,
+                'error': doc.error,
+                'symbols': [symbol._asdict() for symbol in doc.symbols],
+            } for doc in docs]}, out, indent=2)
+            out.write('\n')
+            return
+
+        if fmt == 'markdown':
+            out.write("# Documentation\n")
+        for doc in docs:
+            if fmt == 'markdown':
+                out.write(f"\n## {doc.path}\n\n")
+                if doc.error:
+                    out.write(f"> {doc.error}\n\n")
+                out.write(f"```\n{doc.header}\n```\n" if doc.header else "No documentation header found.\n")
+                if doc.symbols:
+                    out.write("\n| Line | Kind | Definition | Documented |\n|---:|---|---|---|\n")
+                    for symbol in doc.symbols:
+                        definition = _signature(symbol).replace('|', '\\|')
+                        summary = f" {symbol.summary}" if symbol.summary else ''
+                        out.write(f"| {symbol.line} | {symbol.kind} | `{definition}` | "
+                                  f"{'yes' if symbol.documented else 'no'}{summary.replace('|', '/')} |\n")
+                continue
+
+            out.write(f"File: {os.path.basename(doc.path)}\n")
+            out.write("=" * 60 + "\n")
+            if doc.error:
+                out.write(f"ERROR: {doc.error}\n")
+            out.write((doc.header if doc.header else "No documentation header found.") + "\n")
+            for symbol in doc.symbols:
+                marker = '' if symbol.documented else '  (undocumented)'
+                out.write(f"  {symbol.line:>6}  {symbol.kind:<8} {_signature(symbol)}{marker}\n")
+            out.write("=" * 60 + "\n")
+
+
+def write_indexed_doc(filepaths: Sequence[str], output_file: str, index_path: str = DOC_INDEX_FILE,
+                      fmt: str = 'text', jobs: int = 1, executor: str = 'process',
+                      registry: Optional[BackendRegistry] = None, stats: Optional['RunStats'] = None) -> None:
+    """
+    Updates the documentation index for the files and writes the report.
+
+    Parameters:
+        filepaths (Sequence[str]): Files to document, in report order.
+        output_file (str): The report file.
+        index_path (str): Database file, ':memory:' extracts everything without keeping an index.
+        fmt (str): One of REPORT_FORMATS.
+        jobs (int): Number of extraction workers.
+        executor (str): 'process' or 'thread'.
+        registry (Optional[BackendRegistry]): The languages of the run configuration, None for the
+            built-in languages only.
+        stats (Optional[RunStats]): Run statistics, the extracted files are timed into it.
+    """
+    with DocIndex(index_path, registry) as index:
+        index.update(filepaths, jobs, executor, stats)
+        write_report(index.documents(filepaths), output_file, fmt)
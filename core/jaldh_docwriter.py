@@ -1,69 +1,136 @@
-"""------------------------------
-Module: ./core\jaldh_docwriter.py
-Description: Extracts the documentation headers from files and writes them to a single file.
-Notes: <Special remarks or dependencies>
-Author: Peter Jacobi
-Created: 2025-06-22
-------------------------------"""
-
-import re
-import os
-from jaldh_logger import logIt
-
-def extract_headers_and_write_doc(filepaths, output_file):
-    """
-    Extracts documentation headers from a list of files and writes them to a single output file.
-
-    Parameters:
-        filepaths (list[str]): A list of file paths where headers will be extracted from.
-        output_file (str): The path to the output file where extracted headers will be written.
-
-    Returns:
-        None
-    """
-
-    def extract_header(content):
-        """
-        Extracts the documentation header from the file content.
-
-        Parameters:
-            content (str): The content of the file.
-
-        Returns:
-            str: The extracted documentation header, or an empty string if no header is found.
-        """
-        # Regex for Python ("""...""") or C/C++ style comments (/*...*/)
-        header_pattern = re.compile(r'(\"\"\"|/\*)[-=]{5,}(.*?)(\"\"\"|\*/)', re.DOTALL)
-        match = header_pattern.search(content)
-        return match.group(0).strip() if match else None
-
-    documentation = []
-
-    for filepath in filepaths:
-        try:
-            with open(filepath, 'r') as file:
-                content = file.read()
-
-            name = os.path.basename(filepath)
-            documentation.append(f"File: {name}\n")
-            documentation.append("=" * 60 + "\n")
-
-            # Extract header
-            header = extract_header(content)
-            if header:
-                documentation.append(header + "\n")
-            else:
-                documentation.append("No documentation header found.\n")
-
-            documentation.append("=" * 60 + "\n")
-        except (IOError, FileNotFoundError):
-            documentation.append(f"File: {filepath} - ERROR: Could not read file.\n")
-            documentation.append("=" * 60 + "\n")
-            logIt(f"File: {filepath} - ERROR: Could not read file.\n")
-
-    try:
-        with open(output_file, 'w') as out:
-            out.writelines(documentation)
-    except IOError:
-        print(f"ERROR: Could not write to output file: {output_file}")
-        logIt(f"ERROR: Could not write to output file: {output_file}")
\ No newline at end of file
+"""------------------------------
+Module: ./core\jaldh_docwriter.py
+Description: Extracts the documentation headers from files and writes them to a single file.
+Notes: <Special remarks or dependencies>
+Author: Peter Jacobi
+Created: 2025-06-22
+------------------------------"""
+
+import io
+import re
+import os
+import time
+from typing import Optional, TextIO
+from core.jaldh_logger import logIt
+from core.jaldh_source import decode_source
+
+# Opening of a documentation header, Python ("""-----) or C/C++ (/*-----) style
+HEADER_OPEN_PATTERN = re.compile(r'(\"\"\"|/\*)[-=]{5,}')
+# Closing of a documentation header, either style
+HEADER_CLOSE_PATTERN = re.compile(r'\"\"\"|\*/')
+
+# Headers are expected near the top, at most this many bytes of a file are scanned
+HEADER_SCAN_LIMIT = 64 * 1024
+
+
+def read_header(filepath: str, limit: int = HEADER_SCAN_LIMIT) -> Optional[str]:
+    """
+    Reads the documentation header of a file, scanning only a bounded prefix.
+
+    At most limit bytes are read, the prefix is decoded like a source file (core.jaldh_source),
+    so Latin-1 sources are read the same way the other modes read them.
+
+    Parameters:
+        filepath (str): The file to read the header from.
+        limit (int): Maximum number of bytes to scan.
+
+    Returns:
+        Optional[str]: The extracted documentation header, or None if no header is found.
+
+    Raises:
+        OSError: If the file can not be read.
+        UnicodeDecodeError: If a UTF-16 prefix can not be decoded.
+    """
+    with open(filepath, 'rb') as file:
+        data = file.read(limit)
+        if len(data) == limit and file.read(1):
+            # Decode whole lines only, a UTF-8 character cut in half would make the prefix Latin-1
+            data = data[:data.rfind(b'\n') + 1] or data
+    return scan_header(io.StringIO(decode_source(data).text), limit)
+
+
+def scan_header(file: TextIO, limit: int = HEADER_SCAN_LIMIT) -> Optional[str]:
+    """
+    Finds the documentation header in an open text stream, see read_header().
+
+    Parameters:
+        file (TextIO): The stream, e.g. an open file or io.StringIO.
+        limit (int): Maximum number of characters to scan.
+
+    Returns:
+        Optional[str]: The extracted documentation header, or None if no header is found.
+    """
+    header_lines = []
+    remaining = limit
+    while remaining > 0:
+        # Bounded readline, a single huge line can not exhaust the limit in one go
+        line = file.readline(remaining)
+        if not line:
+            break
+        remaining -= len(line)
+
+        if not header_lines:
+            match = HEADER_OPEN_PATTERN.search(line)
+            if not match:
+                continue
+            line = line[match.start():]
+            close = HEADER_CLOSE_PATTERN.search(line, match.end() - match.start())
+        else:
+            close = HEADER_CLOSE_PATTERN.search(line)
+
+        if close:
+            header_lines.append(line[:close.end()])
+            return ''.join(header_lines).strip()
+        header_lines.append(line)
+    return None
+
+
+def extract_headers_and_write_doc(filepaths, output_file, manifest=None, stats=None):
+    """
+    Extracts documentation headers from a list of files and writes them to a single output file.
+
+    Each file's section is written as soon as it is extracted, nothing is collected in memory.
+
+    Parameters:
+        filepaths (list[str]): A list of file paths where headers will be extracted from.
+        output_file (str): The path to the output file where extracted headers will be written.
+        manifest (CacheManifest): Optional cache manifest, unchanged files are taken from it without being read.
+        stats (RunStats): Optional run statistics, the reading time of every read file is added.
+
+    Returns:
+        None
+    """
+    try:
+        out = open(output_file, 'w', encoding='utf-8')
+    except IOError:
+        print(f"ERROR: Could not write to output file: {output_file}")
+        logIt(f"ERROR: Could not write to output file: {output_file}")
+        return
+
+    with out:
+        for filepath in filepaths:
+            try:
+                if manifest is not None and manifest.is_unchanged('doc', filepath):
+                    header = manifest.get('doc', filepath)
+                else:
+                    start = time.perf_counter()
+                    header = read_header(filepath)
+                    if stats is not None:
+                        seconds = time.perf_counter() - start
+                        stats.add_file(filepath, {'read': seconds, 'total': seconds})
+                    if manifest is not None:
+                        manifest.record('doc', filepath, payload=header)
+            except (IOError, FileNotFoundError, UnicodeDecodeError):
+                out.write(f"File: {filepath} - ERROR: Could not read file.\n")
+                out.write("=" * 60 + "\n")
+                logIt(f"File: {filepath} - ERROR: Could not read file.\n")
+                continue
+
+            name = os.path.basename(filepath)
+            out.write(f"File: {name}\n")
+            out.write("=" * 60 + "\n")
+            if header:
+                out.write(header + "\n")
+            else:
+                out.write("No documentation header found.\n")
+            out.write("=" * 60 + "\n")
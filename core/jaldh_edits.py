@@ -0,0 +1,204 @@
+"""------------------------------
+Module: ./core/jaldh_edits.py
+Description: Edit list shared by the language backends.
+Notes: A backend only computes where comments go, apply_insertions() splices them into the
+    original content in one pass. Lines without an insertion are never split or copied one
+    by one, their line endings are kept as they are. stream_insertions() does the same for a
+    memory mapped file and writes the result without holding it in memory. format_patch()
+    renders an edit list as a unified diff (--diff), it only looks at the lines around the
+    insertion points, the rest of the file is never compared.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+from operator import attrgetter
+from typing import Callable, Iterable, List, NamedTuple
+
+from core.jaldh_source import STREAM_BLOCK_SIZE, AtomicWriter, MappedSource
+
+
+# Unchanged lines shown around the insertions of a patch, like diff -u
+DIFF_CONTEXT = 3
+
+NO_NEWLINE_MARKER = '\\ No newline at end of file\n'
+
+
+class Insertion(NamedTuple):
+    """Lines to insert in front of a source line."""
+    line: int  # 0-based index of the line the new lines are inserted in front of
+    lines: List[str]
+
+
+def apply_insertions(content: str, insertions: Iterable[Insertion]) -> str:
+    """
+    Applies an edit list to the content.
+
+    Insertions at the same line keep their order in the edit list. A line index past the
+    end of the content appends the lines.
+
+    Parameters:
+        content (str): The original content.
+        insertions (Iterable[Insertion]): The edit list, in any order.
+
+    Returns:
+        str: The content with all insertions applied.
+    """
+    insertions = sorted(insertions, key=attrgetter('line'))
+    if not insertions:
+        return content
+
+    chunks = []
+    start = 0  # start of the content not yet copied
+    pos = 0    # start of line number 'line'
+    line = 0
+    length = len(content)
+    for insertion in insertions:
+        # Advance to the start of the target line
+        while line < insertion.line and pos < length:
+            newline = content.find('\n', pos)
+            pos = length if newline < 0 else newline + 1
+            line += 1
+        chunks.append(content[start:pos])
+        if pos == length and pos > start and content[-1] != '\n':
+            chunks.append('\n')
+        chunks.append('\n'.join(insertion.lines))
+        chunks.append('\n')
+        start = pos
+    chunks.append(content[start:])
+    return ''.join(chunks)
+
+
+def stream_insertions(source: MappedSource, insertions: Iterable[Insertion], writer: AtomicWriter) -> int:
+    """
+    Applies an edit list to a mapped file and writes the result.
+
+    The raw bytes between the insertion points are copied unchanged, in pieces of at most
+    STREAM_BLOCK_SIZE. The inserted lines get the encoding and line ending of the file.
+
+    Parameters:
+        source (MappedSource): The original file.
+        insertions (Iterable[Insertion]): The edit list in ascending line order, may be a generator
+            that reads the source block by block.
+        writer (AtomicWriter): Receives the new content.
+
+    Returns:
+        int: Number of applied insertions.
+    """
+    mapped = source.map
+    count = 0
+    start = 0
+    for insertion in insertions:
+        pos = source.line_offset(insertion.line)
+        for chunk_start in range(start, pos, STREAM_BLOCK_SIZE):
+            writer.write(mapped[chunk_start:min(pos, chunk_start + STREAM_BLOCK_SIZE)])
+        if pos == source.size and pos > start and mapped[pos - 1] != 0x0A:
+            writer.write(source.newline.encode(source.codec))
+        text = '\n'.join(insertion.lines) + '\n'
+        writer.write(text.replace('\n', source.newline).encode(source.codec))
+        start = pos
+        count += 1
+    for chunk_start in range(start, source.size, STREAM_BLOCK_SIZE):
+        writer.write(mapped[chunk_start:min(source.size, chunk_start + STREAM_BLOCK_SIZE)])
+    return count
+
+
+def _patch_line(tag: str, text: str, eol: bool, newline: str) -> str:
+    """Formats a line of a hunk, a line without line break is followed by the marker."""
+    return f'{tag}{text}{newline}' if eol else f'{tag}{text}\n{NO_NEWLINE_MARKER}'
+
+
+def format_patch(path: str, insertions: Iterable[Insertion], get_line: Callable[[int], str],
+                 has_line: Callable[[int], bool], final_newline: bool = True, newline: str = '\n',
+                 codec: str = 'utf-8', bom: bool = False, context: int = DIFF_CONTEXT) -> bytes:
+    """
+    Renders an edit list as the unified diff of one file, as git apply and patch -p1 read it.
+
+    Only the insertion points and up to context lines around them are looked up, insertions
+    closer than 2 * context lines share a hunk. The patch describes exactly what
+    apply_insertions() and stream_insertions() write.
+
+    Parameters:
+        path (str): Path of the file in the patch, relative with '/' separators.
+        insertions (Iterable[Insertion]): The edit list, in any order.
+        get_line (Callable[[int], str]): Returns a line of the file by its 0-based index, without line ending.
+        has_line (Callable[[int], bool]): Checks whether the file has a line with this index.
+        final_newline (bool): Whether the last line of the file ends with a line break.
+        newline (str): Line ending of the file, used for all lines of the hunks.
+        codec (str): Encoding of the file, without byte order mark.
+        bom (bool): Whether the file starts with a UTF-8 byte order mark, it moves to a line inserted at the top.
+        context (int): Unchanged lines around the insertions.
+
+    Returns:
+        bytes: The file headers and hunks, empty if there is nothing to insert.
+    """
+    # Inserted text per insertion point, points past the end are moved to the end
+    points = []
+    for insertion in sorted(insertions, key=attrgetter('line')):
+        line = insertion.line
+        while line > 0 and not has_line(line - 1):
+            line -= 1
+        text = '\n'.join(insertion.lines)
+        if points and points[-1][0] == line:
+            points[-1] = (line, points[-1][1] + '\n' + text)
+        else:
+            points.append((line, text))
+    if not points:
+        return b''
+
+    hunks = []
+    offset = 0  # lines added by the previous hunks
+    first = 0
+    while first < len(points):
+        last = first
+        while last + 1 < len(points) and points[last + 1][0] - points[last][0] <= 2 * context:
+            last += 1
+        inserted = dict(points[first:last + 1])
+        start = max(0, points[first][0] - context)
+        end = points[last][0]
+        appended = not has_line(end)
+        while end < points[last][0] + context and has_line(end):
+            end += 1
+        if appended and not final_newline and end > 0:
+            # The last line gets the line break it lacked
+            start = min(start, end - 1)
+        first = last + 1
+
+        hunk = []
+        old_count = new_count = 0
+        for index in range(start, end + 1):
+            text = inserted.get(index)
+            if text is not None:
+                if bom and index == 0:
+                    text = '\ufeff' + text
+                # All inserted lines of a point in one piece
+                hunk.append('+' + text.replace('\n', newline + '+') + newline)
+                new_count += text.count('\n') + 1
+            if index == end:
+                break
+
+            old_text = new_text = get_line(index)
+            if bom and index == 0:
+                old_text = '\ufeff' + old_text
+                if text is None:
+                    new_text = old_text
+            old_eol = final_newline or has_line(index + 1)
+            new_eol = old_eol or appended
+            old_count += 1
+            new_count += 1
+            if (old_text, old_eol) == (new_text, new_eol):
+                hunk.append(_patch_line(' ', old_text, old_eol, newline))
+            else:
+                # A changed line is removed in front of the lines inserted above it and added again
+                hunk.insert(len(hunk) - (text is not None), _patch_line('-', old_text, old_eol, newline))
+                hunk.append(_patch_line('+', new_text, new_eol, newline))
+
+        old_start = start + 1 if old_count else start
+        new_start = start + offset + 1 if new_count else start + offset
+        hunks.append(f'@@ -{old_start},{old_count} +{new_start},{new_count} @@\n')
+        hunks.extend(hunk)
+        offset += new_count - old_count
+
+    # Like git, a tab ends a path with spaces, patch would otherwise cut it at the first space
+    end = '\t\n' if ' ' in path else '\n'
+    header = f'--- a/{path}{end}+++ b/{path}{end}'.encode('utf-8', 'surrogateescape')
+    return header + ''.join(hunks).encode(codec)
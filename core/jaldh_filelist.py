@@ -0,0 +1,95 @@
+"""------------------------------
+Module: ./core/jaldh_filelist.py
+Description: Reads the files to process from a list (--files-from), e.g. the output of find or git ls-files.
+Notes: The list is read incrementally, paths are handed out while the producer is still
+    running and nothing but the current chunk is kept in memory. Entries are separated by NUL
+    bytes (find -print0, git ls-files -z) or by line breaks, whichever comes first in the input.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import os
+import sys
+from typing import BinaryIO, Iterator, Tuple
+
+from core.jaldh_logger import logIt
+
+# Bytes requested per read, a pipe returns what is available instead of waiting for all of it
+FILE_LIST_CHUNK = 64 * 1024
+
+
+def read_paths(stream: BinaryIO, chunk_size: int = FILE_LIST_CHUNK) -> Iterator[str]:
+    """
+    Splits a NUL or newline separated list of paths as it arrives.
+
+    The first separator in the input decides, a list with a NUL byte in its first chunk is NUL
+    separated. Newline separated lists may use '\\r\\n', empty entries are ignored.
+
+    Parameters:
+        stream (BinaryIO): The list, e.g. sys.stdin.buffer.
+        chunk_size (int): Bytes requested per read.
+
+    Yields:
+        str: The paths in list order, decoded like os.fsdecode().
+    """
+    read = getattr(stream, 'read1', stream.read)
+    separator = None
+    pending = b''
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        pending += chunk
+        if separator is None:
+            if b'\0' in pending:
+                separator = b'\0'
+            elif b'\n' in pending:
+                separator = b'\n'
+            else:
+                continue
+        *entries, pending = pending.split(separator)
+        for entry in entries:
+            if separator == b'\n':
+                entry = entry.rstrip(b'\r')
+            if entry:
+                yield os.fsdecode(entry)
+    if separator != b'\0':
+        pending = pending.rstrip(b'\r')
+    if pending:
+        yield os.fsdecode(pending)
+
+
+def files_from(path: str, extensions: Tuple[str, ...]) -> Iterator[str]:
+    """
+    Yields the source files of a file list.
+
+    Parameters:
+        path (str): File with the list, '-' reads standard input.
+        extensions (Tuple[str, ...]): File extensions to keep, other entries are skipped silently.
+
+    Yields:
+        str: Paths with a matching extension that name existing files, relative paths are
+            relative to the working directory.
+
+    Raises:
+        OSError: If the list can not be read.
+    """
+    listed = selected = 0
+    if path == '-':
+        stream = sys.stdin.buffer
+    else:
+        stream = open(path, 'rb')
+    try:
+        for filepath in read_paths(stream):
+            listed += 1
+            if not filepath.endswith(extensions):
+                continue
+            if not os.path.isfile(filepath):
+                logIt(f"Skipping listed path {filepath}: not a file")
+                continue
+            selected += 1
+            yield filepath
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+        logIt(f"Selected {selected} of {listed} listed paths from {'stdin' if path == '-' else path}")
@@ -1,91 +1,403 @@
-"""
-------------------------------
-Module: ./core/jaldh_fileparser.py
-Description: Recognizes the file type, opens and parses them and returns their contents.
-Notes: Depends on the core.jaldh_codeparser module.
-Author: Peter Jacobi
-Created: 2025-06-22
-------------------------------
-"""
-
-import re
-import os
-from typing import Optional
-from core.jaldh_codeparser import parse_python_functions, parse_c_functions, parse_cpp_classes
-from core.jaldh_logger import logIt
-
-# Centralized list for supported file extensions
-SUPPORTED_LANGUAGES = {
-    'python': ['.py'],
-    'c': ['.c', '.h'],
-    'cpp': ['.cpp', '.hpp', '.cc']
-}
-
-class FileParser:
-    def __init__(self, config: dict):
-        self.config = config
-
-    def parse_file_and_insert_headers(filepath: str, lang: str, config: dict, dry_run: bool = False) -> Optional[str]:
-        """
-        Parses the file based on its language and inserts documentation headers.
-
-        Parameters:
-            filepath (str): The path to the input file to process.
-            lang (str): The language of the source file. If set to 'auto', language will be detected based on extension.
-            config (dict): Configuration settings for the parser.
-            dry_run (bool): If True, no changes will be written to the file.
-
-        Returns:
-            Optional[str]: The modified file content with inserted headers, or None if the language is unsupported.
-        """
-        # Get the file extension
-        ext = os.path.splitext(filepath)[1]
-
-        # Language auto-detection based on file extension
-        if lang == 'auto':
-            for detected_lang, extensions in SUPPORTED_LANGUAGES.items():
-                if ext in extensions:
-                    lang = detected_lang
-                    break
-            else:
-                print(f"[ERROR] Unsupported file extension for auto-detection: {ext}")
-                logIt(f"Unsupported file extension for auto-detection: {ext}")
-                return None
-
-        # Open and read the file's content
-        try:
-            with open(filepath, 'r') as f:
-                content = f.read()
-        except FileNotFoundError:
-            print(f"[ERROR] File not found: {filepath}")
-            logIt(f"File not found: {filepath}")
-            return None
-        except PermissionError:
-            print(f"[ERROR] Permission denied: {filepath}")
-            logIt(f"Permission denied: {filepath}")
-            return None
-        except Exception as e:
-            print(f"[ERROR] Failed to read file {filepath}: {e}")
-            logIt(f"Failed to read file {filepath}: {e}")
-            return None
-
-        # Process the file based on its language
-        try:
-            if lang == 'python':
-                return parse_python_functions(content, config, filepath)
-            elif lang == 'c':
-                return parse_c_functions(content, config, filepath)
-            elif lang == 'cpp':
-                content = parse_c_functions(content, config, filepath)
-                if ext in ['.h', '.hpp']:
-                    content = parse_cpp_classes(content, config)
-                return content
-            else:
-                print(f"[ERROR] Unsupported language specified: {lang}")
-                logIt(f"Unsupported language specified: {lang}")
-                return None
-        except Exception as e:
-            print(f"[ERROR] Failed to parse file {filepath} for language {lang}: {e}")
-            logIt(f"Failed to parse file {filepath} for language {lang}: {e}")
-            return None
-
+"""
+------------------------------
+Module: ./core/jaldh_fileparser.py
+Description: Recognizes the file type, opens and parses them and returns their contents.
+Notes: The language of a file is looked up in the registry of core.jaldh_backends, whose
+    backends are imported when the first file of their language is parsed. Identical sources are
+    parsed once per run, see core.jaldh_parsecache.
+Author: Peter Jacobi
+Created: 2025-06-22
+------------------------------
+"""
+
+import os
+import time
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
+from core.jaldh_backends import BackendError, get_registry
+from core.jaldh_edits import Insertion, apply_insertions, format_patch, stream_insertions
+from core.jaldh_logger import logIt
+from core.jaldh_parsecache import PARSE_CACHE, PARSE_CACHE_SIZE
+from core.jaldh_source import STREAM_ENCODINGS, AtomicWriter, MappedSource, SourceFile, read_source
+
+if TYPE_CHECKING:
+    from core.jaldh_codeparser import DocGap
+
+class FileParser:
+    def __init__(self, config: dict, report: Callable[[str], None] = print, timings: Optional[dict] = None):
+        """
+        Parameters:
+            config (dict): Configuration settings for the parser.
+            report (Callable[[str], None]): Receives user facing error messages. Defaults to print,
+                worker processes pass a collector so messages can be reported in a stable order.
+            timings (Optional[dict]): Receives the seconds spent in parse_file() under 'read' and 'parse',
+                and the parse cache outcome under 'cache_hits' or 'cache_misses' (--stats).
+        """
+        self.config = config
+        self.report = report
+        self.timings = timings
+        self.backends = get_registry(config)
+
+    def parse_file_and_insert_headers(self, filepath: str, lang: str, config: Optional[dict] = None,
+                                      dry_run: bool = False) -> Optional[str]:
+        """
+        Parses the file based on its language and inserts documentation headers.
+
+        Parameters:
+            filepath (str): The path to the input file to process.
+            lang (str): The language of the source file. If set to 'auto', language will be detected based on extension.
+            config (dict): Configuration settings for the parser. Defaults to the parser's own config.
+            dry_run (bool): If True, no changes will be written to the file.
+
+        Returns:
+            Optional[str]: The modified file content with inserted headers, or None if the language is unsupported.
+        """
+        result = self.parse_file(filepath, lang, config)
+        return result[1] if result else None
+
+    def parse_file(self, filepath: str, lang: str, config: Optional[dict] = None) -> Optional[Tuple[SourceFile, str]]:
+        """
+        Reads the file and inserts documentation headers, keeping what is needed to write it back.
+
+        Parameters:
+            filepath (str): The path to the input file to process.
+            lang (str): The language of the source file. If set to 'auto', language will be detected based on extension.
+            config (dict): Configuration settings for the parser. Defaults to the parser's own config.
+
+        Returns:
+            Optional[Tuple[SourceFile, str]]: The original source (text, encoding and line ending) and the
+                modified text with '\n' line endings, or None if the file could not be processed.
+        """
+        lang = self.detect_language(filepath, lang)
+        if lang is None:
+            return None
+
+        # Open and read the file's content
+        start = time.perf_counter()
+        try:
+            source = read_source(filepath)
+        except Exception as e:
+            self._report_read_error(filepath, e)
+            return None
+        parse_start = time.perf_counter()
+        if self.timings is not None:
+            self.timings['read'] = parse_start - start
+
+        try:
+            new_content = self.parse_text(source.text, filepath, lang, config)
+        finally:
+            if self.timings is not None:
+                self.timings['parse'] = time.perf_counter() - parse_start
+        return None if new_content is None else (source, new_content)
+
+    def parse_text(self, content: str, filename: str, lang: str, config: Optional[dict] = None) -> Optional[str]:
+        """
+        Inserts documentation headers into source that is already in memory, e.g. an unsaved editor buffer.
+
+        Parameters:
+            content (str): The source with '\n' line endings.
+            filename (str): Name of the source, used for the module header and language detection.
+            lang (str): The language of the source. If set to 'auto', language will be detected based on extension.
+            config (dict): Configuration settings for the parser. Defaults to the parser's own config.
+
+        Returns:
+            Optional[str]: The modified content, or None if the language is unsupported or the source does not parse.
+        """
+        insertions = self.find_insertions(content, filename, lang, config)
+        return None if insertions is None else apply_insertions(content, insertions)
+
+    def find_insertions(self, content: str, filename: str, lang: str,
+                        config: Optional[dict] = None) -> Optional[List[Insertion]]:
+        """
+        Computes the edit list for source that is already in memory, without applying it.
+
+        Backends with parse() and header() go through the parse cache, a copy of a source that was
+        seen before only gets its own module header rendered.
+
+        Parameters:
+            content (str): The source with '\n' line endings.
+            filename (str): Name of the source, used for the module header and language detection.
+            lang (str): The language of the source. If set to 'auto', language will be detected based on extension.
+            config (dict): Configuration settings for the parser. Defaults to the parser's own config.
+
+        Returns:
+            Optional[List[Insertion]]: The insertions, or None if the language is unsupported or the source does not parse.
+        """
+        if config is None:
+            config = self.config
+
+        lang = self.detect_language(filename, lang)
+        if lang is None:
+            return None
+        backend = self.backend(lang)
+        if backend is None:
+            return None
+
+        try:
+            parse = getattr(backend, 'parse', None)
+            if parse is None:
+                return list(backend.insertions(content, config, filename))
+            parsed, hit = PARSE_CACHE.lookup(content, lang, os.path.splitext(filename)[1], config,
+                                             lambda: parse(content, config, filename),
+                                             config.get('parse_cache', PARSE_CACHE_SIZE))
+            if self.timings is not None and hit is not None:
+                self.timings['cache_hits' if hit else 'cache_misses'] = 1
+            if parsed.module_header:
+                return [backend.header(config, filename)] + list(parsed.insertions)
+            return list(parsed.insertions)
+        except Exception as e:
+            self.report(f"[ERROR] Failed to parse file {filename} for language {lang}: {e}")
+            logIt(f"Failed to parse file {filename} for language {lang}: {e}")
+            return None
+
+    def stream_file(self, filepath: str, lang: str, writer: AtomicWriter, config: Optional[dict] = None) -> Optional[int]:
+        """
+        Inserts documentation headers into a huge file without reading it into memory.
+
+        The file is memory mapped and scanned block by block, the result is written to writer
+        while scanning. Only backends with streaming support (C/C++) can do this.
+
+        Parameters:
+            filepath (str): The path to the input file to process.
+            lang (str): The language of the source file, e.g. 'c', 'cpp' or 'auto'.
+            writer (AtomicWriter): Receives the modified content.
+            config (dict): Configuration settings for the parser. Defaults to the parser's own config.
+
+        Returns:
+            Optional[int]: The number of inserted comments, or None if the file could not be processed.
+        """
+        if config is None:
+            config = self.config
+
+        lang = self.detect_language(filepath, lang)
+        if lang is None:
+            return None
+        backend = self.backend(lang)
+        if backend is None:
+            return None
+        if not getattr(backend, 'streaming', False):
+            self.report(f"[ERROR] Streaming is not supported for language {lang}: {filepath}")
+            logIt(f"Streaming is not supported for language {lang}: {filepath}")
+            return None
+
+        try:
+            source = MappedSource(filepath)
+        except Exception as e:
+            self._report_read_error(filepath, e)
+            return None
+
+        with source:
+            if source.encoding not in STREAM_ENCODINGS:
+                self.report(f"[ERROR] Streaming is not supported for {source.encoding} encoded file {filepath}")
+                logIt(f"Streaming is not supported for {source.encoding} encoded file {filepath}")
+                return None
+            try:
+                return stream_insertions(source, backend.stream_insertions(source, config, filepath), writer)
+            except Exception as e:
+                self.report(f"[ERROR] Failed to parse file {filepath} for language {lang}: {e}")
+                logIt(f"Failed to parse file {filepath} for language {lang}: {e}")
+                return None
+
+    def diff_file(self, filepath: str, lang: str, config: Optional[dict] = None,
+                  streamed: bool = False) -> Optional[bytes]:
+        """
+        Computes the unified diff that inserting the documentation headers would apply (--diff).
+
+        The file is not changed. Streamed files are mapped and scanned block by block like in
+        stream_file(), only the lines around the insertions are decoded for the patch.
+
+        Parameters:
+            filepath (str): The path to the file.
+            lang (str): The language of the source file. If set to 'auto', language will be detected based on extension.
+            config (dict): Configuration settings for the parser. Defaults to the parser's own config.
+            streamed (bool): Map the file instead of reading it, if the backend supports streaming.
+
+        Returns:
+            Optional[bytes]: The patch of the file, empty if nothing would be inserted, or None if
+                the file could not be processed.
+        """
+        if config is None:
+            config = self.config
+        path = os.path.relpath(filepath).replace(os.sep, '/')
+
+        detected = self.detect_language(filepath, lang)
+        if detected is None:
+            return None
+        backend = self.backend(detected)
+        if backend is None:
+            return None
+        if streamed and getattr(backend, 'streaming', False):
+            try:
+                source = MappedSource(filepath)
+            except Exception as e:
+                self._report_read_error(filepath, e)
+                return None
+            with source:
+                if source.encoding not in STREAM_ENCODINGS:
+                    self.report(f"[ERROR] Streaming is not supported for {source.encoding} encoded file {filepath}")
+                    logIt(f"Streaming is not supported for {source.encoding} encoded file {filepath}")
+                    return None
+                try:
+                    return format_patch(path, backend.stream_insertions(source, config, filepath), source.line,
+                                        lambda index: source.line_offset(index) < source.size,
+                                        source.map[source.size - 1] == 0x0A, source.newline, source.codec,
+                                        source.encoding == 'utf-8-sig')
+                except Exception as e:
+                    self.report(f"[ERROR] Failed to parse file {filepath} for language {detected}: {e}")
+                    logIt(f"Failed to parse file {filepath} for language {detected}: {e}")
+                    return None
+
+        try:
+            source = read_source(filepath)
+        except Exception as e:
+            self._report_read_error(filepath, e)
+            return None
+        # A patch is read line by line as bytes, '\r' alone or UTF-16 can not be expressed in it
+        if source.newline == '\r' or source.encoding == 'utf-16':
+            self.report(f"[ERROR] No patch can be written for {filepath}, it has {source.encoding} encoding "
+                        f"or '\\r' line endings")
+            logIt(f"No patch can be written for {filepath} ({source.encoding}, {source.newline!r})")
+            return None
+        insertions = self.find_insertions(source.text, filepath, detected, config)
+        if insertions is None:
+            return None
+        lines = source.text.split('\n') if source.text else []
+        final_newline = source.text.endswith('\n')
+        if final_newline:
+            lines.pop()
+        return format_patch(path, insertions, lines.__getitem__, len(lines).__gt__, final_newline, source.newline,
+                            'utf-8' if source.encoding == 'utf-8-sig' else source.encoding,
+                            source.encoding == 'utf-8-sig')
+
+    def check_file(self, filepath: str, lang: str, first: bool = False,
+                   streamed: bool = False) -> Optional[List['DocGap']]:
+        """
+        Finds missing documentation without generating any text (--check).
+
+        The module header is looked at before the rest of the file is parsed, with first set the
+        search stops at the first gap. Streamed files are scanned block by block, so a missing
+        header is found without scanning the file at all.
+
+        Parameters:
+            filepath (str): The path to the file to check.
+            lang (str): The language of the source file. If set to 'auto', language will be detected based on extension.
+            first (bool): Stop at the first gap.
+            streamed (bool): Map the file instead of reading it, if the backend supports streaming.
+
+        Returns:
+            Optional[List[DocGap]]: The gaps in source order, empty if the file is fully documented,
+                or None if the file could not be checked.
+        """
+        lang = self.detect_language(filepath, lang)
+        if lang is None:
+            return None
+        backend = self.backend(lang)
+        if backend is None:
+            return None
+        if streamed and getattr(backend, 'streaming', False):
+            try:
+                source = MappedSource(filepath)
+            except Exception as e:
+                self._report_read_error(filepath, e)
+                return None
+            with source:
+                if source.encoding not in STREAM_ENCODINGS:
+                    self.report(f"[ERROR] Streaming is not supported for {source.encoding} encoded file {filepath}")
+                    logIt(f"Streaming is not supported for {source.encoding} encoded file {filepath}")
+                    return None
+                try:
+                    return list(islice(backend.stream_doc_gaps(source, filepath), 1 if first else None))
+                except Exception as e:
+                    self.report(f"[ERROR] Failed to parse file {filepath} for language {lang}: {e}")
+                    logIt(f"Failed to parse file {filepath} for language {lang}: {e}")
+                    return None
+
+        try:
+            content = read_source(filepath).text
+        except Exception as e:
+            self._report_read_error(filepath, e)
+            return None
+        return self.check_text(content, filepath, lang, first)
+
+    def check_text(self, content: str, filename: str, lang: str, first: bool = False) -> Optional[List['DocGap']]:
+        """
+        Finds missing documentation in source that is already in memory, see check_file().
+
+        Parameters:
+            content (str): The source with '\n' line endings.
+            filename (str): Name of the source, used for language detection and in messages.
+            lang (str): The language of the source. If set to 'auto', language will be detected based on extension.
+            first (bool): Stop at the first gap.
+
+        Returns:
+            Optional[List[DocGap]]: The gaps in source order, or None if the source could not be checked.
+        """
+        lang = self.detect_language(filename, lang)
+        if lang is None:
+            return None
+        backend = self.backend(lang)
+        if backend is None:
+            return None
+
+        try:
+            return list(islice(backend.doc_gaps(content, filename), 1 if first else None))
+        except Exception as e:
+            self.report(f"[ERROR] Failed to parse file {filename} for language {lang}: {e}")
+            logIt(f"Failed to parse file {filename} for language {lang}: {e}")
+            return None
+
+    def detect_language(self, filepath: str, lang: str) -> Optional[str]:
+        """
+        Resolves the language of a file.
+
+        Parameters:
+            filepath (str): The path to the file.
+            lang (str): The requested language. If set to 'auto', language will be detected based on extension.
+
+        Returns:
+            Optional[str]: The language, or None if it can not be detected.
+        """
+        if lang != 'auto':
+            return lang
+
+        # Language auto-detection based on file extension
+        detected_lang = self.backends.language_of(filepath)
+        if detected_lang is None:
+            ext = os.path.splitext(filepath)[1]
+            self.report(f"[ERROR] Unsupported file extension for auto-detection: {ext}")
+            logIt(f"Unsupported file extension for auto-detection: {ext}")
+        return detected_lang
+
+    def backend(self, lang: str) -> Optional[Any]:
+        """
+        Returns the backend of a language, importing it on first use (see core.jaldh_backends).
+
+        Parameters:
+            lang (str): The language, as returned by detect_language().
+
+        Returns:
+            Optional[Any]: The backend, or None if the language is not registered or its backend
+                can not be loaded.
+        """
+        try:
+            backend = self.backends.get(lang)
+        except BackendError as e:
+            self.report(f"[ERROR] {e}")
+            logIt(str(e))
+            return None
+        if backend is None:
+            self.report(f"[ERROR] Unsupported language specified: {lang}")
+            logIt(f"Unsupported language specified: {lang}")
+        return backend
+
+    def _report_read_error(self, filepath: str, error: Exception) -> None:
+        """Reports a failure to open or read a file."""
+        if isinstance(error, FileNotFoundError):
+            self.report(f"[ERROR] File not found: {filepath}")
+            logIt(f"File not found: {filepath}")
+        elif isinstance(error, PermissionError):
+            self.report(f"[ERROR] Permission denied: {filepath}")
+            logIt(f"Permission denied: {filepath}")
+        else:
+            self.report(f"[ERROR] Failed to read file {filepath}: {error}")
+            logIt(f"Failed to read file {filepath}: {error}")
@@ -0,0 +1,145 @@
+"""------------------------------
+Module: ./core/jaldh_git.py
+Description: Asks the local git repository which files changed (--changed-since, --staged).
+Notes: Only local git commands are run (diff, ls-files), nothing is fetched, so the selection
+    works offline and its cost depends on the size of the change, not of the tree.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.jaldh_logger import logIt
+from core.jaldh_walker import IGNORE_FILES, PRUNE_DIRS, compile_ignore_rules, is_ignored, read_ignore_file
+
+
+class GitError(RuntimeError):
+    """A git command failed or git is not installed."""
+
+
+def run_git(arguments: Sequence[str], cwd: str) -> List[str]:
+    """
+    Runs a git command that prints NUL separated paths.
+
+    Parameters:
+        arguments (Sequence[str]): Arguments after 'git', '-z' output is expected.
+        cwd (str): Directory to run git in.
+
+    Returns:
+        List[str]: The printed paths.
+
+    Raises:
+        GitError: If git is missing or fails, e.g. outside a repository or on an unknown ref.
+    """
+    import subprocess
+
+    try:
+        result = subprocess.run(['git', *arguments], cwd=cwd, capture_output=True)
+    except OSError as e:
+        raise GitError(f"git can not be run: {e}") from e
+    if result.returncode != 0:
+        lines = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        message = lines[0] if lines else f"exit code {result.returncode}"
+        raise GitError(f"git {' '.join(arguments)} failed: {message}")
+    return [os.fsdecode(path) for path in result.stdout.split(b'\0') if path]
+
+
+def _directory_rules(base_path: str, reldir: str, root_rules: List[Tuple[str, list]], ignore_files: Sequence[str],
+                     cache: Dict[str, Optional[List[Tuple[str, list]]]]) -> Optional[List[Tuple[str, list]]]:
+    """
+    Returns the rule sets that apply to the contents of a directory, stacked like the walker
+    stacks them: the exclude patterns, then the ignore files from base_path down to the directory.
+
+    Parameters:
+        base_path (str): The walk root.
+        reldir (str): '/' terminated directory relative to base_path, '' for base_path.
+        root_rules (List[Tuple[str, list]]): The rule set of the exclude patterns, if any.
+        ignore_files (Sequence[str]): Names of the ignore files read in every directory.
+        cache (Dict[str, Optional[List[Tuple[str, list]]]]): Rule sets per directory, every
+            ignore file is read once per selection.
+
+    Returns:
+        Optional[List[Tuple[str, list]]]: The (base, rules) pairs, None if the directory or one of
+            its parents is ignored.
+    """
+    if reldir in cache:
+        return cache[reldir]
+    rule_sets: Optional[List[Tuple[str, list]]] = root_rules
+    if reldir:
+        parent = reldir[:-1].rpartition('/')[0]
+        rule_sets = _directory_rules(base_path, parent + '/' if parent else '', root_rules, ignore_files, cache)
+        if rule_sets and is_ignored(rule_sets, reldir[:-1], True):
+            rule_sets = None
+    if rule_sets is not None:
+        for name in ignore_files:
+            path = os.path.join(base_path, reldir, name)
+            if os.path.isfile(path):
+                rules = read_ignore_file(path)
+                if rules:
+                    rule_sets = rule_sets + [(reldir, rules)]
+    cache[reldir] = rule_sets
+    return rule_sets
+
+
+def git_changed_files(base_path: str, extensions: Tuple[str, ...], since: Optional[str] = None,
+                      staged: bool = False, max_depth: Optional[int] = None,
+                      exclude: Sequence[str] = (), prune_dirs: Iterable[str] = PRUNE_DIRS,
+                      ignore_files: Sequence[str] = IGNORE_FILES) -> List[str]:
+    """
+    Lists the changed source files below a directory.
+
+    With since, these are the files that differ between the ref and the working tree (committed,
+    staged or not) plus untracked files that are not ignored. With staged, the files added to
+    the index. Deleted files are never listed, nor files the walker would skip (prune_dirs,
+    exclude patterns, .gitignore and .jaldhignore files below base_path).
+
+    Parameters:
+        base_path (str): Directory inside a git working tree, only files below it are listed.
+        extensions (Tuple[str, ...]): File extensions to keep.
+        since (Optional[str]): Commit, branch or tag to compare the working tree with.
+        staged (bool): List the staged files instead.
+        max_depth (Optional[int]): Deepest directory level below base_path, 0 only lists base_path itself.
+        exclude (Sequence[str]): Additional gitignore style patterns relative to base_path.
+        prune_dirs (Iterable[str]): Directory names whose files are never listed.
+        ignore_files (Sequence[str]): Names of the ignore files read in base_path and the
+            directories of the changed files.
+
+    Returns:
+        List[str]: Paths joined onto base_path, sorted.
+
+    Raises:
+        GitError: If git fails.
+    """
+    # Outside a working tree git diff would silently compare files instead
+    run_git(['rev-parse', '--show-toplevel'], base_path)
+
+    if staged:
+        paths = run_git(['diff', '--cached', '--name-only', '-z', '--relative', '--diff-filter=d', '--'], base_path)
+    else:
+        if since is None:
+            raise ValueError("Either since or staged is required")
+        paths = run_git(['diff', '--name-only', '-z', '--relative', '--diff-filter=d', since, '--'], base_path)
+        paths += run_git(['ls-files', '--others', '--exclude-standard', '-z', '--', '.'], base_path)
+
+    rules = [('', compile_ignore_rules(exclude))] if exclude else []
+    prune_dirs = frozenset(prune_dirs)
+    ignore_cache: Dict[str, Optional[List[Tuple[str, list]]]] = {}
+    selected = set()
+    for relpath in paths:
+        if not relpath.endswith(extensions):
+            continue
+        if max_depth is not None and relpath.count('/') > max_depth:
+            continue
+        if not prune_dirs.isdisjoint(relpath.split('/')[:-1]):
+            continue
+        directory = relpath.rpartition('/')[0]
+        rule_sets = _directory_rules(base_path, directory + '/' if directory else '', rules, ignore_files,
+                                     ignore_cache)
+        if rule_sets is None or (rule_sets and is_ignored(rule_sets, relpath, False)):
+            continue
+        filepath = os.path.join(base_path, relpath)
+        if os.path.isfile(filepath):
+            selected.add(filepath)
+    logIt(f"git selected {len(selected)} of {len(paths)} changed paths below {base_path}")
+    return sorted(selected)
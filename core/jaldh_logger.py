@@ -2,32 +2,57 @@
 
 Goal : to log with timestamps into a file.
 
+Messages are queued by logIt() and written in batches by a background thread, either when
+bufsize messages are pending or after flush_interval seconds. Every batch is appended with a
+single write on a file opened with O_APPEND, so threads and worker processes can share one
+logfile. Pending messages are flushed at exit, also in multiprocessing workers.
 """
+import atexit
 import datetime
 import os
-
-import cyboidef
+import queue
+import sys
+import threading
 
 
 # Global module variables
 logfile = "jaldh.log"
-logbuf = []
-bufcount:int = 0
-bufsize:int = 1
+bufsize: int = 64
+flush_interval: float = 1.0
+
+_queue = queue.Queue()
+_wake = threading.Event()
+_write_lock = threading.Lock()
+_start_lock = threading.Lock()
+_writer = None
+
+
+def configure(settings: dict) -> None:
+    """ Applies the 'logging' section of the configuration.
+    Args:
+        settings (dict): Optional keys path, bufsize and flush_interval.
+    """
+    global logfile
+    global bufsize
+    global flush_interval
+    if not settings:
+        return
+    logfile = settings.get('path', logfile)
+    bufsize = max(1, int(settings.get('bufsize', bufsize)))
+    flush_interval = max(0.01, float(settings.get('flush_interval', flush_interval)))
+
 
 def logIt(logstr:str) -> None:
     """ Log a message to buffer with a timestamp.
     Args:
         logstr (str): Text to log.
     """
-    global bufcount
-    global bufsize
-    global logbuf
     tmpstr = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "  " + logstr + "\n"
-    logbuf.append(tmpstr)
-    bufcount += 1
-    if bufcount>=bufsize:
-        log2File()
+    _queue.put(tmpstr)
+    if _writer is None:
+        _start_writer()
+    if _queue.qsize() >= bufsize:
+        _wake.set()
 
 
 def log2File() -> None:
@@ -35,21 +60,68 @@ def log2File() -> None:
     Args: None
     Returns: None
     """
-    global logbuf
-    global bufcount
-    global logfile
-    try:
-        with open(logfile, "a+") as fh:
-            # write the buffer to file
-            fh.writelines(logbuf)
-            logbuf.clear()  # Clear the buffer after writing
-            bufcount = 0
-    except Exception as e:
-        print(f"Error while logging to file: {e}")
+    with _write_lock:
+        lines = []
+        while True:
+            try:
+                lines.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        if not lines:
+            return
+        try:
+            fd = os.open(logfile, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, "".join(lines).encode("utf-8"))
+            finally:
+                os.close(fd)
+        except Exception as e:
+            print(f"Error while logging to file: {e}")
 
 
 def remlogfile() -> None:
     """ Deletes the logfile. """
-    global logfile
+    log2File()
     if os.path.exists(logfile):
-        os.remove(logfile)
\ No newline at end of file
+        os.remove(logfile)
+
+
+def _writer_loop() -> None:
+    """ Background thread, flushes when woken by logIt() or after flush_interval. """
+    while True:
+        _wake.wait(flush_interval)
+        _wake.clear()
+        log2File()
+
+
+def _start_writer() -> None:
+    """ Starts the background writer and registers the exit flush once per process. """
+    global _writer
+    with _start_lock:
+        if _writer is not None:
+            return
+        _writer = threading.Thread(target=_writer_loop, name="jaldh-logger", daemon=True)
+        _writer.start()
+        atexit.register(log2File)
+        # Pool workers leave through os._exit(), which skips atexit but runs the finalizers
+        mp_util = sys.modules.get("multiprocessing.util")
+        if mp_util is not None:
+            mp_util.Finalize(None, log2File, exitpriority=10)
+
+
+def _after_fork() -> None:
+    """ A forked child starts without writer, pending messages belong to the parent. """
+    global _queue
+    global _wake
+    global _write_lock
+    global _start_lock
+    global _writer
+    _queue = queue.Queue()
+    _wake = threading.Event()
+    _write_lock = threading.Lock()
+    _start_lock = threading.Lock()
+    _writer = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,99 @@
+"""------------------------------
+Module: ./core/jaldh_parsecache.py
+Description: In-run cache of parse results, byte-identical sources are parsed once per run.
+Notes: Large trees contain many identical files (vendored copies, generated stubs, per-platform
+    duplicates). Entries are keyed by a digest of the content, the language, the file extension
+    and the configuration object, whose templates are compiled once (core.jaldh_templates). They
+    hold the rendered comments of the definitions and whether the module header is missing; the
+    header names the file and is rendered for every copy. The day is part of the key, comments
+    rendered with a {date} are not reused after midnight by --watch and --serve. The cache lives in the process, every
+    worker has its own. Backends opt in with parse() and header(), see core.jaldh_backends.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from core.jaldh_edits import Insertion
+
+# Default for the 'parse_cache' setting, number of sources kept, 0 disables the cache
+PARSE_CACHE_SIZE = 4096
+
+
+class ParsedSource(NamedTuple):
+    """The part of an edit list that does not depend on the name of the file."""
+    module_header: bool                  # whether the module header is missing
+    insertions: Tuple[Insertion, ...]    # the comments of the undocumented definitions, in line order
+
+
+class ParseCache:
+    """
+    Least recently used parse results with hit and miss counters.
+
+    Lookups are thread safe, two threads missing the same source at once both parse it.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[tuple, Tuple[dict, ParsedSource]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, content: str, lang: str, extension: str, config: dict,
+               parse: Callable[[], ParsedSource], size: int = PARSE_CACHE_SIZE) -> Tuple[ParsedSource, Optional[bool]]:
+        """
+        Returns the parse result of a source, parsing it on a miss.
+
+        Parameters:
+            content (str): The source with '\\n' line endings.
+            lang (str): The language of the source.
+            extension (str): The file extension, backends may treat extensions of a language differently.
+            config (dict): The configuration the comments are rendered with. It is kept with the
+                entry, so its id can not be reused by another dict while the entry exists.
+            parse (Callable[[], ParsedSource]): Parses the source, exceptions are passed on and not cached.
+            size (int): Number of entries to keep, 0 or None parses without caching.
+
+        Returns:
+            Tuple[ParsedSource, Optional[bool]]: The result and whether it came from the cache, None
+                if the cache is disabled.
+        """
+        if not size or size < 1:
+            return parse(), None
+
+        # Imported on first use, runs without parsing do not need it
+        import hashlib
+
+        digest = hashlib.blake2b(content.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        key = (digest, lang, extension, id(config), date.today().toordinal())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is config:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], True
+            self.misses += 1
+
+        parsed = parse()
+        with self._lock:
+            self._entries[key] = (config, parsed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+        return parsed, False
+
+    def info(self) -> Dict[str, int]:
+        """Returns the counters and the number of cached sources."""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def clear(self) -> None:
+        """Drops all entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# The cache of this process, shared by all FileParser instances
+PARSE_CACHE = ParseCache()
@@ -0,0 +1,368 @@
+"""------------------------------
+Module: ./core/jaldh_runner.py
+Description: Processes the collected target files, either in-process or in a worker pool.
+Notes: The configuration is handed to every worker once through the pool initializer, each
+    worker resolves the per-directory configurations of its files on its own. Results are
+    yielded in the order of the targets, independent of the completion order. The targets may be
+    a lazy iterable (walker, --files-from), they are only pulled as far as the workers are busy,
+    so processing starts with the first path and memory does not grow with the number of files.
+    Closing the result iterator early cancels the files that were not started yet (--check quiet).
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import os
+import time
+from collections import deque
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sized, Tuple
+
+from core.jaldh_cache import Stamp, file_stamp
+from core.jaldh_config import ConfigResolver
+from core.jaldh_fileparser import FileParser
+from core.jaldh_logger import configure as configure_logging, logIt
+from core.jaldh_sniff import sniff_file
+from core.jaldh_source import AtomicWriter, write_source
+
+if TYPE_CHECKING:
+    from core.jaldh_codeparser import DocGap
+
+EXECUTORS = ('process', 'thread')
+
+# Modes of the --check run, 'first' stops at the first gap of a file
+CHECK_MODES = ('all', 'first')
+
+# Default for the 'stream_threshold_mb' setting, files of this size or more are streamed
+STREAM_THRESHOLD_MB = 64
+
+# Batch size for the process pool when the number of targets is not known in advance
+LAZY_CHUNKSIZE = 8
+
+# Batches submitted per worker ahead of the results the caller has consumed
+BATCHES_PER_WORKER = 4
+
+# Per worker state, filled once by init_worker()
+_worker_state = {}
+
+
+class FileResult(NamedTuple):
+    """Outcome of processing a single target file."""
+    filepath: str
+    output_path: Optional[str]
+    messages: List[str]
+    stamp: Optional[Stamp] = None
+    stats: Optional[Dict[str, float]] = None
+    gaps: Optional[List['DocGap']] = None
+    skipped: Optional[str] = None      # why the prefilter skipped the file, see core.jaldh_sniff
+    patch: Optional[bytes] = None      # unified diff of the file in the --diff mode, empty if unchanged
+
+
+def init_worker(config: dict, lang: str, prefix: Optional[str], stamp: bool = False, stats: bool = False,
+                check: Optional[str] = None, diff: bool = False, roots: Tuple[str, ...] = ()) -> None:
+    """
+    Pool initializer, stores the shared run settings in the worker.
+
+    Parameters:
+        config (dict): Loaded configuration.
+        lang (str): Source language or 'auto'.
+        prefix (Optional[str]): Output prefix for the -o mode, None to overwrite the sources.
+        stamp (bool): Whether to stamp written files for the cache manifest.
+        stats (bool): Whether to time the processing of every file.
+        check (Optional[str]): One of CHECK_MODES to only check the files, None to process them.
+        diff (bool): Whether to compute patches instead of writing the files.
+        roots (Tuple[str, ...]): Directories the .jaldh.yaml lookup stops at, see ConfigResolver.
+
+    Returns:
+        None
+    """
+    _worker_state['resolver'] = ConfigResolver(config, roots=roots)
+    configure_logging(config.get('logging'))
+    _worker_state['lang'] = lang
+    _worker_state['prefix'] = prefix
+    _worker_state['stamp'] = stamp
+    _worker_state['stats'] = stats
+    _worker_state['check'] = check
+    _worker_state['diff'] = diff
+
+
+def output_path_for(filepath: str, prefix: Optional[str]) -> str:
+    """Returns the path a processed file is written to, a prefixed copy in the -o mode."""
+    if not prefix:
+        return filepath
+    dir_name = os.path.dirname(filepath)
+    base_name = os.path.basename(filepath)
+    return os.path.join(dir_name, f"{prefix}{base_name}")
+
+
+def is_streamed(filepath: str, config: dict) -> bool:
+    """Checks whether a file reaches the 'stream_threshold_mb' size, 0 disables streaming."""
+    threshold = config.get('stream_threshold_mb', STREAM_THRESHOLD_MB)
+    if not threshold:
+        return False
+    try:
+        return os.path.getsize(filepath) >= threshold * 1024 * 1024
+    except OSError:
+        return False
+
+
+def process_file(filepath: str, config: dict, lang: str, prefix: Optional[str] = None,
+                 stamp: bool = False, stats: bool = False, diff: bool = False) -> FileResult:
+    """
+    Reads, parses and writes a single file.
+
+    A source that needs no new headers is left untouched. Written files keep the encoding and
+    line endings of the source and are replaced atomically. Files above the configured stream
+    threshold are processed block by block instead of being read into memory, if their backend
+    supports streaming (C/C++). With diff set, nothing is written and the result carries the
+    unified diff of the file instead.
+
+    Parameters:
+        filepath (str): File to process.
+        config (dict): Loaded configuration.
+        lang (str): Source language or 'auto'.
+        prefix (Optional[str]): Output prefix for the -o mode, None to overwrite the source.
+        stamp (bool): Whether to stamp the written file for the cache manifest.
+        stats (bool): Whether to time the file, see core.jaldh_stats.
+        diff (bool): Compute the patch instead of writing the file, prefix and stamp are ignored.
+
+    Returns:
+        FileResult: The written path (None if nothing was written), the collected messages,
+            the stamp of the written or unchanged file, the timings and the patch.
+    """
+    if not stats:
+        return _process_file(filepath, config, lang, prefix, stamp, None, diff)
+
+    timings = {}
+    start = time.perf_counter()
+    try:
+        bytes_in = os.path.getsize(filepath)
+    except OSError:
+        bytes_in = 0
+    result = _process_file(filepath, config, lang, prefix, stamp, timings, diff)
+    timings['total'] = time.perf_counter() - start
+    timings['bytes_in'] = bytes_in
+    timings['bytes_out'] = 0
+    if result.output_path:
+        try:
+            timings['bytes_out'] = os.path.getsize(result.output_path)
+        except OSError:
+            pass
+    return result._replace(stats=timings)
+
+
+def _process_file(filepath: str, config: dict, lang: str, prefix: Optional[str], stamp: bool,
+                  timings: Optional[dict], diff: bool = False) -> FileResult:
+    """Implements process_file(), timings receives the seconds per phase if not None."""
+    messages = []
+    try:
+        # Binary, generated and oversized files are left alone before anything is parsed
+        skipped = sniff_file(filepath, config.get('sniff'))
+        if skipped:
+            logIt(f"Skipping {filepath}: {skipped}")
+            return FileResult(filepath, None, messages, file_stamp(filepath) if stamp else None, skipped=skipped)
+
+        fparser = FileParser(config, report=messages.append, timings=timings)
+        if diff:
+            start = time.perf_counter()
+            patch = fparser.diff_file(filepath, lang, streamed=is_streamed(filepath, config))
+            if timings is not None:
+                timings['parse'] = time.perf_counter() - start
+            return FileResult(filepath, None, messages, patch=patch)
+
+        output_path = output_path_for(filepath, prefix)
+
+        if is_streamed(filepath, config):
+            detected = fparser.detect_language(filepath, lang)
+            backend = fparser.backend(detected) if detected is not None else None
+            if backend is None:
+                return FileResult(filepath, None, messages)
+            if getattr(backend, 'streaming', False):
+                start = time.perf_counter()
+                with AtomicWriter(output_path, mode_from=filepath) as writer:
+                    count = fparser.stream_file(filepath, detected, writer)
+                    if count is None or (not count and not prefix):
+                        writer.discard()
+                if timings is not None:
+                    timings['stream'] = time.perf_counter() - start
+                if count is None:
+                    return FileResult(filepath, None, messages)
+                if writer.discarded:
+                    return FileResult(filepath, None, messages, file_stamp(filepath) if stamp else None)
+                return FileResult(filepath, output_path, messages, file_stamp(output_path) if stamp else None)
+
+        parsed = fparser.parse_file(filepath, lang)
+        if parsed is None:
+            return FileResult(filepath, None, messages)
+        source, new_content = parsed
+
+        # Nothing to insert, keep the file and its mtime as they are
+        if not prefix and new_content == source.text:
+            return FileResult(filepath, None, messages, file_stamp(filepath) if stamp else None)
+
+        start = time.perf_counter()
+        write_source(output_path, new_content, source.encoding, source.newline, mode_from=filepath)
+        if timings is not None:
+            timings['write'] = time.perf_counter() - start
+        return FileResult(filepath, output_path, messages, file_stamp(output_path) if stamp else None)
+    except Exception as e:
+        messages.append(f"Error processing file {filepath}: {e}")
+        logIt(f"Error processing file {filepath}: {e}")
+        return FileResult(filepath, None, messages)
+
+
+def check_file(filepath: str, config: dict, lang: str, mode: str = 'all', stats: bool = False) -> FileResult:
+    """
+    Finds the missing documentation of a single file without changing it.
+
+    Parameters:
+        filepath (str): File to check.
+        config (dict): Loaded configuration, decides whether the file is streamed.
+        lang (str): Source language or 'auto'.
+        mode (str): One of CHECK_MODES.
+        stats (bool): Whether to time the file, see core.jaldh_stats.
+
+    Returns:
+        FileResult: The gaps (None if the file could not be checked), the collected messages and
+            the timings. Files skipped by the prefilter have no gaps.
+    """
+    if mode not in CHECK_MODES:
+        raise ValueError(f"Unknown check mode: {mode}")
+    if not stats:
+        return _check_file(filepath, config, lang, mode)
+
+    start = time.perf_counter()
+    try:
+        bytes_in = os.path.getsize(filepath)
+    except OSError:
+        bytes_in = 0
+    result = _check_file(filepath, config, lang, mode)
+    seconds = time.perf_counter() - start
+    return result._replace(stats={'parse': seconds, 'total': seconds, 'bytes_in': bytes_in, 'bytes_out': 0})
+
+
+def _check_file(filepath: str, config: dict, lang: str, mode: str) -> FileResult:
+    """Implements check_file()."""
+    messages = []
+    try:
+        skipped = sniff_file(filepath, config.get('sniff'))
+        if skipped:
+            logIt(f"Skipping {filepath}: {skipped}")
+            return FileResult(filepath, None, messages, gaps=[], skipped=skipped)
+        fparser = FileParser(config, report=messages.append)
+        gaps = fparser.check_file(filepath, lang, first=mode == 'first', streamed=is_streamed(filepath, config))
+        return FileResult(filepath, None, messages, gaps=gaps)
+    except Exception as e:
+        messages.append(f"Error checking file {filepath}: {e}")
+        logIt(f"Error checking file {filepath}: {e}")
+        return FileResult(filepath, None, messages)
+
+
+def _process_in_worker(filepath: str) -> FileResult:
+    """Runs process_file(), or check_file() in check mode, with the settings stored by init_worker()."""
+    if _worker_state['check']:
+        return check_file(filepath, _worker_state['resolver'].for_file(filepath), _worker_state['lang'],
+                          _worker_state['check'], _worker_state['stats'])
+    return process_file(filepath, _worker_state['resolver'].for_file(filepath), _worker_state['lang'],
+                        _worker_state['prefix'], _worker_state['stamp'], _worker_state['stats'], _worker_state['diff'])
+
+
+def _process_batch_in_worker(batch: List[str]) -> List[FileResult]:
+    """Runs _process_in_worker() for a batch of files, one task per batch keeps the pool traffic low."""
+    return [_process_in_worker(filepath) for filepath in batch]
+
+
+def _map_bounded(pool: Any, targets: Iterable[str], chunksize: int, window: int) -> Iterator[FileResult]:
+    """
+    Like pool.map(), but submits the targets lazily.
+
+    Executor.map() submits all targets up front. Here at most window batches are pending, the
+    next batch is taken from targets when the oldest one is done.
+
+    Parameters:
+        pool (Executor): The worker pool.
+        targets (Iterable[str]): Files to process.
+        chunksize (int): Files per batch.
+        window (int): Number of batches in flight.
+
+    Yields:
+        FileResult: One result per target, in target order.
+    """
+    targets = iter(targets)
+    pending = deque()
+
+    def submit() -> bool:
+        """Submits the next batch, False when the targets are exhausted."""
+        batch = list(islice(targets, chunksize))
+        if batch:
+            pending.append(pool.submit(_process_batch_in_worker, batch))
+        return bool(batch)
+
+    while len(pending) < window and submit():
+        pass
+    while pending:
+        results = pending.popleft().result()
+        submit()
+        yield from results
+
+
+def process_targets(targets: Iterable[str], config: dict, lang: str = 'auto', prefix: Optional[str] = None,
+                    jobs: int = 1, executor: str = 'process', stamp: bool = False,
+                    stats: bool = False, resolver: Optional[ConfigResolver] = None,
+                    check: Optional[str] = None, diff: bool = False) -> Iterator[FileResult]:
+    """
+    Processes all targets and yields their results in target order.
+
+    Every file is processed with the configuration of its directory, see
+    core.jaldh_config.ConfigResolver.
+
+    Parameters:
+        targets (Iterable[str]): Files to process, consumed lazily.
+        config (dict): Loaded run configuration.
+        lang (str): Source language or 'auto'.
+        prefix (Optional[str]): Output prefix for the -o mode, None to overwrite the sources.
+        jobs (int): Number of workers. 1 processes in-process, 0 uses one worker per CPU.
+        executor (str): 'process' for a process pool, 'thread' for a thread pool (network filesystems).
+        stamp (bool): Whether to stamp written files for the cache manifest.
+        stats (bool): Whether to time every file, the timings are returned in FileResult.stats.
+        resolver (Optional[ConfigResolver]): Resolver to reuse when processing in-process, one for
+            config is created if None. Workers resolve with the roots of it.
+        check (Optional[str]): One of CHECK_MODES to only check the targets, see check_file().
+        diff (bool): Compute a patch per target instead of writing, see process_file().
+
+    Yields:
+        FileResult: One result per target.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1 or (isinstance(targets, Sized) and len(targets) <= 1):
+        resolver = resolver or ConfigResolver(config)
+        for filepath in targets:
+            if check:
+                yield check_file(filepath, resolver.for_file(filepath), lang, check, stats)
+                continue
+            yield process_file(filepath, resolver.for_file(filepath), lang, prefix, stamp, stats, diff)
+        return
+
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor: {executor}")
+
+    # The pools are only imported when a run actually uses workers
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    initargs = (config, lang, prefix, stamp, stats, check, diff, tuple(resolver.roots) if resolver is not None else ())
+    if executor == 'thread':
+        pool = ThreadPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=initargs)
+        chunksize = 1
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=initargs)
+        # Batch the tasks to keep the inter-process traffic low on large trees
+        if isinstance(targets, Sized):
+            chunksize = max(1, min(64, len(targets) // (jobs * BATCHES_PER_WORKER)))
+        else:
+            chunksize = LAZY_CHUNKSIZE
+
+    try:
+        yield from _map_bounded(pool, targets, chunksize, jobs * BATCHES_PER_WORKER)
+    finally:
+        # Don't process the remaining targets when the caller stopped early
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,108 @@
+"""------------------------------
+Module: ./core/jaldh_sniff.py
+Description: Cheap prefilter that looks at the size and the first bytes of a file before it is parsed.
+Notes: Binary files with a source extension, generated files (a marker line such as
+    "// @generated" or "// Code generated by ... DO NOT EDIT." at the top), minified sources with
+    huge first lines and files above a size limit are skipped without reading them completely. The 'sniff' section of the configuration
+    turns the single checks on and off, per directory as well. The line length and size limits are
+    off by default, long generated tables are documented like any other C file.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import codecs
+import os
+import re
+from typing import Optional
+
+# Bytes read from the start of a file, markers and line lengths are only looked for in there
+SNIFF_BYTES = 8192
+
+# Lines at the top of a file a generator marker is looked for in
+GENERATED_HEAD_LINES = 10
+
+# Marker lines of generators, anchored at the start of a (comment) line. A marker mentioned in
+# the text of a hand-written file, e.g. "ids are auto-generated", does not count.
+GENERATED_MARKER = re.compile(rb'^[ \t]*(?:#+|//+|/\*+|\*|--|;+)?[ \t]*'
+                              rb'(?:@generated\b|Code generated .* DO NOT EDIT\b|This file is an amalgamation\b)',
+                              re.MULTILINE)
+
+# Defaults of the 'sniff' settings
+SNIFF_DEFAULTS = {
+    'max_size_mb': 0,          # skip larger files, 0 = no limit
+    'max_line_length': 0,      # skip files with a longer line in the first SNIFF_BYTES, 0 = no limit
+    'skip_binary': True,       # skip files with NUL bytes (unless UTF-16)
+    'skip_generated': True,    # skip files with a GENERATED_MARKER line in the first GENERATED_HEAD_LINES
+}
+
+
+def sniff(prefix: bytes, size: int, settings: Optional[dict] = None) -> Optional[str]:
+    """
+    Decides from the start of a file whether it should be left alone.
+
+    Parameters:
+        prefix (bytes): The first SNIFF_BYTES of the file, or all of it if it is shorter.
+        size (int): Size of the whole file in bytes.
+        settings (Optional[dict]): The 'sniff' section of the configuration, see SNIFF_DEFAULTS.
+
+    Returns:
+        Optional[str]: Why the file is skipped, None if it should be processed.
+    """
+    settings = dict(SNIFF_DEFAULTS, **(settings or {}))
+
+    max_size = settings['max_size_mb']
+    if max_size and size > max_size * 1024 * 1024:
+        return f"larger than {max_size} MB"
+
+    # UTF-16 text is full of NUL bytes and has no line to measure in bytes
+    if prefix.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return None
+
+    if settings['skip_binary'] and b'\0' in prefix:
+        return "binary content"
+
+    if settings['skip_generated'] and GENERATED_MARKER.search(_head(prefix)):
+        return "generated file"
+
+    max_line = settings['max_line_length']
+    if max_line:
+        # Jump from the last line break within max_line + 1 bytes to the next, a window without
+        # one is a longer line. A line cut off at the end of the prefix is only longer in the file.
+        pos = 0
+        while len(prefix) - pos > max_line:
+            newline = prefix.rfind(b'\n', pos, pos + max_line + 1)
+            if newline < 0:
+                return f"line longer than {max_line} characters"
+            pos = newline + 1
+    return None
+
+
+def _head(prefix: bytes, lines: int = GENERATED_HEAD_LINES) -> bytes:
+    """Returns the first lines of the prefix, the regex only runs over them."""
+    end = -1
+    for _ in range(lines):
+        end = prefix.find(b'\n', end + 1)
+        if end < 0:
+            return prefix
+    return prefix[:end]
+
+
+def sniff_file(filepath: str, settings: Optional[dict] = None) -> Optional[str]:
+    """
+    Runs sniff() on a file, reading at most SNIFF_BYTES.
+
+    Parameters:
+        filepath (str): The file.
+        settings (Optional[dict]): The 'sniff' section of the configuration.
+
+    Returns:
+        Optional[str]: Why the file is skipped, None if it should be processed. Files that can
+            not be read are not skipped here, reading them again reports the error.
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            prefix = f.read(SNIFF_BYTES)
+    except OSError:
+        return None
+    return sniff(prefix, size, settings)
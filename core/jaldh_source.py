@@ -0,0 +1,330 @@
+"""------------------------------
+Module: ./core/jaldh_source.py
+Description: Reads and writes source files while keeping their encoding and line endings.
+Notes: The parsers always work on text with '\n' line endings. read_source() remembers the
+    encoding and the line ending of the file, write_source() restores both and replaces the
+    target atomically through a temporary file in the same directory.
+    Huge files are not read into memory, MappedSource maps them and hands them out in blocks
+    of complete lines, its line lookups provide a bounded lookbehind through the mapping.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import codecs
+import mmap
+import os
+import stat
+from bisect import bisect_right
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+# Tried in this order if the file has no byte order mark, latin-1 decodes any byte sequence
+# and writes it back unchanged
+FALLBACK_ENCODINGS = ('utf-8', 'latin-1')
+
+# Size of the blocks MappedSource decodes at a time
+STREAM_BLOCK_SIZE = 1 << 20
+
+# Encodings MappedSource can handle, '\n' must be a single byte that never occurs inside a character
+STREAM_ENCODINGS = ('utf-8', 'utf-8-sig', 'latin-1')
+
+
+class SourceFile(NamedTuple):
+    """Content of a source file, normalized to '\n' line endings."""
+    text: str
+    encoding: str
+    newline: str
+
+
+def detect_encoding(data: bytes) -> str:
+    """
+    Detects the encoding of raw file content.
+
+    Parameters:
+        data (bytes): The raw content.
+
+    Returns:
+        str: Codec name that decodes the content.
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            data.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return FALLBACK_ENCODINGS[-1]
+
+
+def decode_source(data: bytes) -> SourceFile:
+    """
+    Decodes raw file content with the encoding detect_encoding() would choose.
+
+    The content is decoded once, a successful trial decoding is the result instead of being
+    repeated with the detected codec.
+
+    Parameters:
+        data (bytes): The raw content.
+
+    Returns:
+        SourceFile: The normalized text with the encoding and the detected line ending.
+    """
+    if data.startswith((codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = detect_encoding(data)
+        return source_from_text(data.decode(encoding), encoding)
+    for encoding in FALLBACK_ENCODINGS[:-1]:
+        try:
+            return source_from_text(data.decode(encoding), encoding)
+        except UnicodeDecodeError:
+            continue
+    return source_from_text(data.decode(FALLBACK_ENCODINGS[-1]), FALLBACK_ENCODINGS[-1])
+
+
+def detect_newline(text: str) -> str:
+    """
+    Detects the line ending of a text by its first line break.
+
+    Parameters:
+        text (str): The decoded content.
+
+    Returns:
+        str: '\r\n', '\r' or '\n' (also for text without line breaks).
+    """
+    index = text.find('\n')
+    if index > 0 and text[index - 1] == '\r':
+        return '\r\n'
+    if index < 0 and '\r' in text:
+        return '\r'
+    return '\n'
+
+
+def source_from_text(text: str, encoding: str = 'utf-8') -> SourceFile:
+    """
+    Normalizes decoded text, e.g. an editor buffer, like read_source() does for files.
+
+    Parameters:
+        text (str): The decoded content, any line ending.
+        encoding (str): The encoding the text came from.
+
+    Returns:
+        SourceFile: The text with '\n' line endings, the encoding and the detected line ending.
+    """
+    newline = detect_newline(text)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return SourceFile(text, encoding, newline)
+
+
+def read_source(filepath: str) -> SourceFile:
+    """
+    Reads a source file.
+
+    Parameters:
+        filepath (str): File to read.
+
+    Returns:
+        SourceFile: The normalized text with the detected encoding and line ending.
+    """
+    with open(filepath, 'rb') as f:
+        return decode_source(f.read())
+
+
+class AtomicWriter:
+    """
+    Context manager for replacing a file atomically.
+
+    Writes go to a temporary file in the target directory, which replaces the target when the
+    block ends without an exception and without discard() being called.
+    """
+
+    def __init__(self, filepath: str, mode_from: Optional[str] = None):
+        """
+        Parameters:
+            filepath (str): File to write.
+            mode_from (Optional[str]): File whose permissions are copied, defaults to filepath itself.
+        """
+        self.filepath = filepath
+        self.mode_from = mode_from or filepath
+        self.file: Optional[BinaryIO] = None
+        self.tmp_path = None
+        self.discarded = False
+
+    def __enter__(self) -> 'AtomicWriter':
+        # tempfile pulls in random and shutil, runs that write nothing don't need it
+        import tempfile
+
+        dir_name, base_name = os.path.split(self.filepath)
+        fd, self.tmp_path = tempfile.mkstemp(prefix=f'.{base_name}.', suffix='.tmp', dir=dir_name or '.')
+        self.file = os.fdopen(fd, 'wb')
+        return self
+
+    def write(self, data: bytes) -> None:
+        """Writes raw data to the temporary file."""
+        self.file.write(data)
+
+    def discard(self) -> None:
+        """Drops the temporary file at the end of the block and leaves the target untouched."""
+        self.discarded = True
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self.file.close()
+            if exc_type is None and not self.discarded:
+                try:
+                    os.chmod(self.tmp_path, stat.S_IMODE(os.stat(self.mode_from).st_mode))
+                except OSError:
+                    pass
+                os.replace(self.tmp_path, self.filepath)
+                return
+        except BaseException:
+            self._remove_tmp()
+            raise
+        self._remove_tmp()
+
+    def _remove_tmp(self) -> None:
+        try:
+            os.unlink(self.tmp_path)
+        except OSError:
+            pass
+
+
+def write_source(filepath: str, text: str, encoding: str = 'utf-8', newline: str = '\n',
+                 mode_from: Optional[str] = None) -> None:
+    """
+    Writes a source file atomically, an interrupted run leaves the old file intact.
+
+    Parameters:
+        filepath (str): File to write.
+        text (str): Content with '\n' line endings.
+        encoding (str): Encoding to write.
+        newline (str): Line ending to write.
+        mode_from (Optional[str]): File whose permissions are copied, defaults to filepath itself.
+
+    Returns:
+        None
+    """
+    if newline != '\n':
+        text = text.replace('\n', newline)
+    data = text.encode(encoding)
+    with AtomicWriter(filepath, mode_from) as writer:
+        writer.write(data)
+
+
+class MappedSource:
+    """
+    Memory mapped source file for streaming huge files with bounded memory.
+
+    blocks() decodes the file in blocks of complete lines with '\n' line endings. line() and
+    line_offset() look up lines by number through the mapping, starting at the nearest block
+    start or at the last looked up line, so ascending lookups stay linear.
+    """
+
+    def __init__(self, filepath: str, block_size: int = STREAM_BLOCK_SIZE):
+        """
+        Parameters:
+            filepath (str): File to map, must not be empty.
+            block_size (int): Approximate size of the blocks returned by blocks().
+        """
+        self.block_size = block_size
+        with open(filepath, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self.map)
+        self.encoding = self._detect_encoding()
+        self.start = len(codecs.BOM_UTF8) if self.encoding == 'utf-8-sig' else 0
+        # Codec for decoding and encoding text inside the file, after the byte order mark
+        self.codec = 'utf-8' if self.encoding == 'utf-8-sig' else self.encoding
+        first = self.map.find(b'\n')
+        self.newline = '\r\n' if first > 0 and self.map[first - 1] == 0x0D else '\n'
+        # Line numbers and offsets of the block starts, and the position of the last lookup
+        self.block_lines = [0]
+        self.block_offsets = [self.start]
+        self.cursor = (0, self.start)
+
+    def __enter__(self) -> 'MappedSource':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Releases the mapping."""
+        self.map.close()
+
+    def _detect_encoding(self) -> str:
+        """Like detect_encoding(), but decodes the mapping incrementally."""
+        if self.map[:3] == codecs.BOM_UTF8:
+            return 'utf-8-sig'
+        if self.map[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+            return 'utf-16'
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            for pos in range(0, self.size, self.block_size):
+                decoder.decode(self.map[pos:pos + self.block_size])
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            return 'latin-1'
+        return 'utf-8'
+
+    def blocks(self) -> Iterator[str]:
+        """
+        Decodes the file block by block.
+
+        Yields:
+            str: One or more complete lines with '\n' line endings.
+        """
+        mapped = self.map
+        pos = self.start
+        line = 0
+        while pos < self.size:
+            end = mapped.rfind(b'\n', pos, pos + self.block_size) + 1
+            if not end:
+                # A single line longer than a block
+                end = mapped.find(b'\n', pos + self.block_size) + 1 or self.size
+            if pos > self.start:
+                self.block_lines.append(line)
+                self.block_offsets.append(pos)
+            text = mapped[pos:end].decode(self.codec)
+            line += text.count('\n')
+            pos = end
+            if '\r' in text:
+                text = text.replace('\r\n', '\n')
+            yield text
+
+    def line_offset(self, index: int) -> int:
+        """
+        Returns the byte offset of the start of a line, the file size for lines past the end.
+
+        Parameters:
+            index (int): 0-based line number within the part of the file read by blocks() so far.
+
+        Returns:
+            int: Offset in the mapping.
+        """
+        line, pos = self.cursor
+        if index < line:
+            block = bisect_right(self.block_lines, index) - 1
+            line, pos = self.block_lines[block], self.block_offsets[block]
+        find = self.map.find
+        while line < index and pos < self.size:
+            pos = find(b'\n', pos) + 1 or self.size
+            line += 1
+        self.cursor = (line, pos)
+        return pos
+
+    def line(self, index: int) -> str:
+        """
+        Returns a line without its line ending.
+
+        Parameters:
+            index (int): 0-based line number within the part of the file read by blocks() so far.
+
+        Returns:
+            str: The decoded line, empty past the end of the file.
+        """
+        pos = self.line_offset(index)
+        end = self.map.find(b'\n', pos)
+        if end < 0:
+            end = self.size
+        return self.map[pos:end].decode(self.codec, 'replace').rstrip('\r')
@@ -0,0 +1,158 @@
+"""------------------------------
+Module: ./core/jaldh_stats.py
+Description: Collects per-phase and per-file timings of a run and reports them (--stats).
+Notes: Phases are timed in the main process with wall clock time. Phases can overlap, e.g.
+    'collect' and 'cache' run while 'process' consumes the files, so the wall time of the run
+    is measured once from start to finish and not summed up. Per-file timings are taken where
+    the file is processed, also inside worker processes, and travel back with the FileResult.
+    With several workers the per-file sums can exceed the wall time of the run.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import heapq
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+STATS_FORMATS = ('text', 'json')
+
+# Per-file timing keys, in report order. 'stream' is used instead of read/parse/write for
+# streamed files, where the three overlap.
+FILE_PHASES = ('read', 'parse', 'write', 'stream')
+
+# Per-file counters of the parse cache, 1 for the outcome of the file (core.jaldh_parsecache)
+CACHE_COUNTERS = ('cache_hits', 'cache_misses')
+
+
+class RunStats:
+    """
+    Timings and byte counts of a run.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.files: List[Tuple[str, Dict[str, float]]] = []
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def finish(self) -> None:
+        """Ends the run, the wall time of the report is measured up to the first call."""
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Times a phase of the run, repeated phases add up.
+
+        Parameters:
+            name (str): Name of the phase, e.g. 'collect' or 'process'.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def timed(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """
+        Times a lazy phase, e.g. collecting files while they are processed.
+
+        Only the time spent producing the items counts, the phase overlaps the phase consuming them.
+
+        Parameters:
+            name (str): Name of the phase.
+            items (Iterable[T]): The lazy producer.
+
+        Yields:
+            T: The items of items.
+        """
+        iterator = iter(items)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def add_file(self, filepath: str, file_stats: Dict[str, float]) -> None:
+        """
+        Records the timings of a processed file.
+
+        Parameters:
+            filepath (str): The processed file.
+            file_stats (Dict[str, float]): Seconds per FILE_PHASES key and 'total', plus 'bytes_in', 'bytes_out'
+                and the CACHE_COUNTERS.
+        """
+        self.files.append((filepath, file_stats))
+
+    def report(self, top: int = 10) -> dict:
+        """
+        Builds the report.
+
+        Parameters:
+            top (int): Number of slowest files to list.
+
+        Returns:
+            dict: 'phases' with the wall time per phase, 'totals' over all files with the 'wall' time
+                of the run and 'slowest' files.
+        """
+        totals = {'files': len(self.files), 'bytes_in': 0, 'bytes_out': 0}
+        totals.update(dict.fromkeys(CACHE_COUNTERS, 0))
+        for key in FILE_PHASES + ('total',):
+            totals[key] = 0.0
+        for _, file_stats in self.files:
+            for key, value in file_stats.items():
+                totals[key] = totals.get(key, 0) + value
+        wall = (self.finished if self.finished is not None else time.perf_counter()) - self.started
+        totals['wall'] = wall
+        totals['mb_per_s'] = totals['bytes_in'] / 1e6 / wall if wall else 0.0
+
+        slowest = heapq.nlargest(top, self.files, key=lambda item: item[1].get('total', 0.0))
+        return {
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'totals': {key: round(value, 6) if isinstance(value, float) else value for key, value in totals.items()},
+            'slowest': [dict(path=path, **{key: round(value, 6) if isinstance(value, float) else value
+                                           for key, value in file_stats.items()})
+                        for path, file_stats in slowest],
+        }
+
+    def format(self, fmt: str = 'text', top: int = 10) -> str:
+        """
+        Formats the report.
+
+        Parameters:
+            fmt (str): 'text' for a human readable summary or 'json'.
+            top (int): Number of slowest files to list.
+
+        Returns:
+            str: The formatted report.
+        """
+        report = self.report(top)
+        if fmt == 'json':
+            return json.dumps(report, indent=2)
+
+        totals = report['totals']
+        lines = ['Statistics', '  Phases (wall time):']
+        for name, seconds in report['phases'].items():
+            lines.append(f'    {name:<12} {seconds * 1000:10.1f} ms')
+        lines.append(f"  Run: {totals['wall'] * 1000:.1f} ms wall time, collect and cache overlap process")
+        lines.append(f"  Files: {totals['files']}, read {totals['bytes_in'] / 1e6:.2f} MB, "
+                     f"written {totals['bytes_out'] / 1e6:.2f} MB, {totals['mb_per_s']:.2f} MB/s overall")
+        per_file = ', '.join(f'{key} {totals[key] * 1000:.1f} ms' for key in FILE_PHASES if totals[key])
+        if per_file:
+            lines.append(f'  Per-file sums: {per_file}')
+        parsed = totals['cache_hits'] + totals['cache_misses']
+        if parsed:
+            lines.append(f"  Parse cache: {totals['cache_hits']} hits, {totals['cache_misses']} misses "
+                         f"({totals['cache_hits'] / parsed:.0%} of parsed files were copies)")
+        if report['slowest']:
+            lines.append(f"  Slowest {len(report['slowest'])} files:")
+            for entry in report['slowest']:
+                lines.append(f"    {entry.get('total', 0.0) * 1000:10.1f} ms {entry.get('bytes_in', 0):>12} B  {entry['path']}")
+        return '\n'.join(lines)
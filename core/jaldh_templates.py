@@ -0,0 +1,244 @@
+"""------------------------------
+Module: ./core/jaldh_templates.py
+Description: Compiles the header and comment templates of a configuration into render objects.
+Notes: Templates are compiled once per configuration and language, the compiled sets of the
+    most recently used configurations are kept. Values that are fixed for a run (separators,
+    author) are filled in while compiling, rendering only formats the lines that contain per-file
+    or per-function placeholders. The date is formatted when rendering, so long running --watch
+    and --serve processes do not write the date they were started on.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Tuple
+
+DEFAULT_SEPARATOR = '------------------------------'
+
+# Built-in templates per language family and kind. In user templates a line starting with
+# [params] is only kept for functions with parameters, [date] only with include_date, and a
+# line containing {param} is repeated for every parameter.
+DEFAULT_TEMPLATES = {
+    'python': {
+        'module': '\n'.join([
+            '"""{separator}',
+            'Module: {filename}',
+            'Description: <Short module description>',
+            'Notes: <Special remarks or dependencies>',
+            'Author: {author}',
+            '[date]Created: {date}',
+            '{separator}"""',
+            '',
+        ]),
+        'function': '\n'.join([
+            '"""{separator}',
+            'Description: <Describe what {name} does>',
+            '',
+            '[params]Parameters:',
+            '    {param}: <description>',
+            '',
+            'Returns:',
+            '    <description>',
+            '{separator}"""',
+        ]),
+    },
+    'c': {
+        'module': '\n'.join([
+            '/*{separator}',
+            'Module: {filename}',
+            'Description: <Short module description>',
+            'Notes: <Special remarks or dependencies>',
+            'Author: {author}',
+            '[date]Created: {date}',
+            '{separator}*/',
+            '',
+        ]),
+        'function': '\n'.join([
+            '/*{separator}',
+            '{name} - <Describe what this function does>',
+            '',
+            '[params]Parameters:',
+            '    {param} - <description>',
+            '',
+            'Returns:',
+            '    {return_type} - <description>',
+            '{separator}*/',
+        ]),
+        'class': '\n'.join([
+            '/*{separator}',
+            '{name} - {kind} overview',
+            'Constructor example: {name} obj;',
+            '{separator}*/',
+        ]),
+    },
+}
+
+# Languages without templates of their own use the ones of their family
+TEMPLATE_FALLBACK = {'cpp': 'c'}
+
+# Placeholders filled in per file or per definition, the date when rendering
+RENDER_FIELDS = ('filename', 'name', 'return_type', 'kind', 'param', 'date')
+# Placeholders fixed for a run
+RUN_FIELDS = ('separator', 'author')
+
+# Number of configurations whose compiled templates are kept
+TEMPLATE_CACHE_SIZE = 256
+
+PLACEHOLDER_PATTERN = re.compile(r'\{(%s)\}' % '|'.join(RENDER_FIELDS + RUN_FIELDS))
+CONDITION_PATTERN = re.compile(r'\[(params|date)\]')
+
+
+class Template:
+    """
+    A compiled template.
+
+    The template is translated into the source of a Python function once, which concatenates
+    the literal text with the placeholder values. render(indent='', params=(), filename='',
+    name='', return_type='', kind='') returns the text of a header or comment as a list, an
+    element may span several lines. indent is put in front of every non-empty line, e.g. the
+    body indentation of a Python function.
+    """
+
+    def __init__(self, text: str, values: Dict[str, str], include_date: bool = True,
+                 date_format: str = '%Y-%m-%d'):
+        """
+        Parameters:
+            text (str): The template, lines separated by newlines.
+            values (Dict[str, str]): The run constants separator and author.
+            include_date (bool): Whether [date] lines are kept, without them {date} is empty.
+            date_format (str): strftime() format of {date}, applied on every render.
+        """
+        if not include_date:
+            values = dict(values, date='')
+        uses_date = False
+        # Group the lines: (needs_params, repeated per parameter, f-string bodies of the lines)
+        groups: List[Tuple[bool, bool, List[str]]] = []
+        for line in text.split('\n'):
+            needs_params = False
+            condition = CONDITION_PATTERN.match(line)
+            if condition:
+                line = line[condition.end():]
+                if condition.group(1) == 'date' and not include_date:
+                    continue
+                needs_params = condition.group(1) == 'params'
+
+            # Run constants become part of the literal text, the other placeholders f-string fields
+            pieces = PLACEHOLDER_PATTERN.split(line)
+            fields = pieces[1::2]
+            uses_date = uses_date or ('date' in fields and 'date' not in values)
+            expression = ''
+            for index, piece in enumerate(pieces):
+                if index % 2 == 0 or piece in values:
+                    piece = values[piece] if index % 2 else piece
+                    expression += piece.replace('{', '{{').replace('}', '}}')
+                else:
+                    expression += '{%s}' % piece
+            if expression:
+                expression = '{indent}' + expression
+            repeated = 'param' in fields
+
+            if groups and groups[-1][:2] == (needs_params, repeated):
+                groups[-1][2].append(expression)
+            else:
+                groups.append((needs_params, repeated, [expression]))
+
+        body = []
+        for needs_params, repeated, expressions in groups:
+            joined = 'f' + repr('\n'.join(expressions))
+            if repeated:
+                statement = f'out.extend([{joined} for param in params])'
+            else:
+                statement = f'out.append({joined})'
+            body.append(f'    if params: {statement}' if needs_params else f'    {statement}')
+        if uses_date:
+            body.insert(0, f'    date = datetime.now().strftime({date_format!r})')
+        source = ("def render(indent='', params=(), filename='', name='', return_type='', kind=''):\n"
+                  "    out = []\n" + '\n'.join(body) + "\n    return out\n")
+        namespace: Dict[str, object] = {'datetime': datetime}
+        exec(compile(source, '<jaldh template>', 'exec'), namespace)
+        self.source = source
+        self.render = namespace['render']
+
+
+class TemplateSet(NamedTuple):
+    """The compiled templates of one language."""
+    module: Template
+    function: Template
+    class_: Template
+
+
+# Compiled templates per configuration object and language, least recently used first. The
+# configuration is kept with its templates, so its id can not be reused by another dict while the
+# entry exists. Dicts can not be weakly referenced, the size bounds what --watch and --serve keep
+_compiled: 'OrderedDict[Tuple[int, str], Tuple[dict, TemplateSet]]' = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def compile_templates(config: dict, lang: str) -> TemplateSet:
+    """
+    Compiles the templates of a language.
+
+    User templates are read from templates.<lang>.<kind> of the configuration, kinds are module,
+    function and class. Missing ones fall back to the language family and the built-in templates.
+
+    Parameters:
+        config (dict): Loaded configuration.
+        lang (str): 'python', 'c' or 'cpp'.
+
+    Returns:
+        TemplateSet: The compiled templates.
+    """
+    header = config.get('header', {}) or {}
+    include_date = header.get('include_date', True)
+    date_format = str(header.get('date_format', '%Y-%m-%d'))
+    base = {'author': str(header.get('author', 'Unknown'))}
+    file_values = dict(base, separator=str(config.get('file_separator', DEFAULT_SEPARATOR)))
+    item_values = dict(base, separator=str(config.get('function_separator', DEFAULT_SEPARATOR)))
+
+    user_templates = config.get('templates') or {}
+    family = TEMPLATE_FALLBACK.get(lang, lang)
+
+    def source(kind: str) -> str:
+        """Finds the template text of a kind, the most specific one wins."""
+        for name in (lang, family):
+            text = (user_templates.get(name) or {}).get(kind)
+            if text is not None:
+                return text.rstrip('\n') + ('\n' if kind == 'module' else '')
+        defaults = DEFAULT_TEMPLATES.get(family, DEFAULT_TEMPLATES['c'])
+        return defaults.get(kind, DEFAULT_TEMPLATES['c'][kind])
+
+    return TemplateSet(
+        module=Template(source('module'), file_values, include_date, date_format),
+        function=Template(source('function'), item_values, include_date, date_format),
+        class_=Template(source('class'), item_values, include_date, date_format),
+    )
+
+
+def get_templates(config: dict, lang: str) -> TemplateSet:
+    """
+    Returns the compiled templates of a language, compiling them on first use.
+
+    Parameters:
+        config (dict): Loaded configuration, the same object returns the same templates.
+        lang (str): 'python', 'c' or 'cpp'.
+
+    Returns:
+        TemplateSet: The compiled templates.
+    """
+    key = (id(config), lang)
+    with _compiled_lock:
+        entry = _compiled.get(key)
+        if entry is not None and entry[0] is config:
+            _compiled.move_to_end(key)
+            return entry[1]
+
+    templates = compile_templates(config, lang)
+    with _compiled_lock:
+        _compiled[key] = (config, templates)
+        _compiled.move_to_end(key)
+        while len(_compiled) > TEMPLATE_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return templates
@@ -0,0 +1,267 @@
+"""------------------------------
+Module: ./core/jaldh_walker.py
+Description: Collects the source files of a directory tree.
+Notes: Based on os.scandir, the file type comes from the directory entry, so files are not
+    stat'ed one by one. Directories are pruned before they are entered: version control and
+    build directories, virtualenvs, vendored trees, .gitignore/.jaldhignore matches and the
+    exclude globs of the configuration. The 'walk.prune' setting adds names to PRUNE_DIRS or,
+    prefixed with '!', enters them again, e.g. ['!vendor'] to document vendored sources.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import os
+import re
+from typing import Callable, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.jaldh_logger import logIt
+
+# Directories that never contain sources to document
+PRUNE_DIRS = frozenset({
+    '.git', '.hg', '.svn', '.bzr', 'CVS',
+    'node_modules', 'bower_components',
+    '__pycache__', '.mypy_cache', '.pytest_cache', '.ruff_cache', '.tox', '.nox', '.eggs',
+    '.venv', 'venv', 'site-packages',
+    'build', 'dist', '_build', 'cmake-build-debug', 'cmake-build-release',
+    'third_party', 'third-party', 'thirdparty', 'vendor', 'external',
+})
+
+# A directory containing this file is a virtualenv, whatever its name
+VENV_MARKER = 'pyvenv.cfg'
+
+IGNORE_FILES = ('.gitignore', '.jaldhignore')
+
+# skip: ignore symlinks, files: follow links to files only, follow: also enter linked directories
+SYMLINK_POLICIES = ('skip', 'files', 'follow')
+
+
+def prune_dirs_from(names: Iterable[str], defaults: Iterable[str] = PRUNE_DIRS) -> FrozenSet[str]:
+    """
+    Applies the 'walk.prune' setting to the default directory names.
+
+    Parameters:
+        names (Iterable[str]): Directory names to prune, names prefixed with '!' are entered again.
+        defaults (Iterable[str]): The names pruned without the setting.
+
+    Returns:
+        FrozenSet[str]: The directory names that are never entered.
+    """
+    if isinstance(names, str):
+        names = [names]
+    prune = set(defaults)
+    for name in names or ():
+        name = str(name).strip().rstrip('/')
+        if name.startswith('!'):
+            prune.discard(name[1:])
+        elif name:
+            prune.add(name)
+    return frozenset(prune)
+
+
+class IgnoreRule(NamedTuple):
+    """A single compiled .gitignore pattern."""
+    pattern: 're.Pattern'
+    negate: bool
+    dir_only: bool
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Translates a gitignore glob to a regular expression, '*' and '?' do not match '/'."""
+    i, n = 0, len(glob)
+    parts = []
+    while i < n:
+        c = glob[i]
+        if c == '*':
+            if glob.startswith('**/', i):
+                parts.append('(?:.*/)?')
+                i += 3
+                continue
+            if glob.startswith('**', i):
+                parts.append('.*')
+                i += 2
+                continue
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[':
+            end = glob.find(']', i + 2)
+            if end < 0:
+                parts.append(re.escape(c))
+            else:
+                chars = glob[i + 1:end]
+                if chars[0] in '!^':
+                    chars = '^' + chars[1:]
+                parts.append(f'[{chars.replace(chr(92), chr(92) * 2)}]')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            parts.append(re.escape(glob[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return ''.join(parts)
+
+
+def compile_ignore_rules(lines: Iterable[str]) -> List[IgnoreRule]:
+    """
+    Compiles .gitignore style patterns.
+
+    Supported are comments, negation with '!', directory-only patterns with a trailing '/',
+    patterns anchored by a '/' and the wildcards '*', '?', '[...]' and '**'.
+
+    Parameters:
+        lines (Iterable[str]): Pattern lines.
+
+    Returns:
+        List[IgnoreRule]: The compiled rules in file order.
+    """
+    rules = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip() or line.startswith('#'):
+            continue
+        line = line.rstrip(' ')
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+
+        # A slash at the beginning or in the middle anchors the pattern at the ignore file
+        anchored = '/' in line
+        regex = _glob_to_regex(line.lstrip('/'))
+        if not anchored:
+            regex = '(?:.*/)?' + regex
+        rules.append(IgnoreRule(re.compile(regex + r'\Z', re.DOTALL), negate, dir_only))
+    return rules
+
+
+def read_ignore_file(path: str) -> List[IgnoreRule]:
+    """
+    Reads and compiles an ignore file.
+
+    Parameters:
+        path (str): Path of the .gitignore or .jaldhignore file.
+
+    Returns:
+        List[IgnoreRule]: The compiled rules, empty if the file is unreadable.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return compile_ignore_rules(f)
+    except OSError as e:
+        logIt(f"Could not read ignore file {path}: {e}")
+        return []
+
+
+def is_ignored(rule_sets: Sequence[Tuple[str, List[IgnoreRule]]], relpath: str, is_dir: bool) -> bool:
+    """
+    Checks a path against stacked ignore rules, the last matching rule decides.
+
+    Parameters:
+        rule_sets (Sequence[Tuple[str, List[IgnoreRule]]]): (base, rules) pairs from the outermost
+            to the innermost directory, base is the '/' terminated directory of the ignore file
+            relative to the walk root ('' for the root).
+        relpath (str): Path relative to the walk root, '/' separated.
+        is_dir (bool): Whether the path is a directory.
+
+    Returns:
+        bool: True if the path is ignored.
+    """
+    for base, rules in reversed(rule_sets):
+        path = relpath[len(base):]
+        for rule in reversed(rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.pattern.match(path):
+                return not rule.negate
+    return False
+
+
+def walk_files(base_path: str, extensions: Tuple[str, ...], max_depth: Optional[int] = None,
+               symlinks: str = 'files', exclude: Sequence[str] = (),
+               prune_dirs: Iterable[str] = PRUNE_DIRS, ignore_files: Sequence[str] = IGNORE_FILES,
+               on_directory: Optional[Callable[[str], None]] = None) -> Iterator[str]:
+    """
+    Walks a directory tree top-down and yields the files with matching extensions.
+
+    Parameters:
+        base_path (str): Directory to walk.
+        extensions (Tuple[str, ...]): File extensions to yield.
+        max_depth (Optional[int]): Deepest directory level to enter, 0 only lists base_path. None is unlimited.
+        symlinks (str): Symlink policy, one of SYMLINK_POLICIES.
+        exclude (Sequence[str]): Additional gitignore style patterns relative to base_path.
+        prune_dirs (Iterable[str]): Directory names that are never entered.
+        ignore_files (Sequence[str]): Names of ignore files read in every directory.
+        on_directory (Optional[Callable[[str], None]]): Called with every directory that is searched,
+            e.g. to watch it for changes.
+
+    Yields:
+        str: Path of a matching file, joined onto base_path like os.walk does.
+    """
+    if symlinks not in SYMLINK_POLICIES:
+        raise ValueError(f"Unknown symlink policy: {symlinks}")
+    prune_dirs = frozenset(prune_dirs)
+    root_rules = [('', compile_ignore_rules(exclude))] if exclude else []
+
+    # Directories entered through followed links, to break cycles
+    visited = set()
+    if symlinks == 'follow':
+        st = os.stat(base_path)
+        visited.add((st.st_dev, st.st_ino))
+
+    # (path, path relative to base_path with trailing '/', depth, rule sets)
+    stack = [(base_path, '', 0, root_rules)]
+    while stack:
+        dirpath, reldir, depth, rule_sets = stack.pop()
+        try:
+            with os.scandir(dirpath) as it:
+                entries = list(it)
+        except OSError as e:
+            logIt(f"Could not read directory {dirpath}: {e}")
+            continue
+
+        names = {entry.name for entry in entries}
+        if reldir and VENV_MARKER in names:
+            continue
+        if on_directory is not None:
+            on_directory(dirpath)
+        for name in ignore_files:
+            if name in names:
+                rules = read_ignore_file(os.path.join(dirpath, name))
+                if rules:
+                    rule_sets = rule_sets + [(reldir, rules)]
+
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            try:
+                is_link = entry.is_symlink()
+                if is_link and symlinks == 'skip':
+                    continue
+                if entry.is_dir(follow_symlinks=True):
+                    if (max_depth is not None and depth >= max_depth) or name in prune_dirs:
+                        continue
+                    if is_link and symlinks != 'follow':
+                        continue
+                    if rule_sets and is_ignored(rule_sets, reldir + name, True):
+                        continue
+                    if symlinks == 'follow':
+                        st = entry.stat()
+                        key = (st.st_dev, st.st_ino)
+                        if key in visited:
+                            continue
+                        visited.add(key)
+                    subdirs.append(entry)
+                elif name.endswith(extensions) and entry.is_file(follow_symlinks=True):
+                    if rule_sets and is_ignored(rule_sets, reldir + name, False):
+                        continue
+                    yield os.path.join(dirpath, name)
+            except OSError as e:
+                logIt(f"Could not inspect {entry.path}: {e}")
+
+        # Push in reverse so the directories are entered in listing order
+        for entry in reversed(subdirs):
+            stack.append((entry.path, f'{reldir}{entry.name}/', depth + 1, rule_sets))
@@ -0,0 +1,272 @@
+"""------------------------------
+Module: ./core/jaldh_watch.py
+Description: Watch mode, keeps running and reprocesses source files when they change (--watch).
+Notes: Changes are found by comparing size and mtime of the collected files between two scans.
+    On Linux inotify (through ctypes, no extra package) wakes the loop up when something in a
+    watched directory changes, elsewhere the tree is polled. Bursts of changes, e.g. an editor
+    saving several files, are debounced and processed as one batch.
+Author: Peter Jacobi
+Created: 2026-10-17
+------------------------------"""
+
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.jaldh_logger import logIt
+
+WATCH_BACKENDS = ('auto', 'inotify', 'poll')
+
+# Seconds between two scans when polling
+WATCH_INTERVAL = 1.0
+# Seconds without further changes before a batch is processed
+WATCH_DEBOUNCE = 0.2
+# Longest time a batch is held back while changes keep coming in
+WATCH_MAX_DELAY = 5.0
+
+# inotify event mask: anything that can add, change or remove a source file
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+INOTIFY_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+                | IN_DELETE | IN_DELETE_SELF)
+
+# (mtime_ns, size) per file
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def take_snapshot(filepaths: Iterable[str]) -> Snapshot:
+    """
+    Stats the given files.
+
+    Parameters:
+        filepaths (Iterable[str]): The collected files.
+
+    Returns:
+        Snapshot: mtime and size per file, files that vanished in between are left out.
+    """
+    snapshot = {}
+    for filepath in filepaths:
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            continue
+        snapshot[filepath] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+def changed_files(old: Snapshot, new: Snapshot) -> List[str]:
+    """
+    Compares two snapshots.
+
+    Parameters:
+        old (Snapshot): The earlier snapshot.
+        new (Snapshot): The current snapshot.
+
+    Returns:
+        List[str]: New and modified files, in the order of the current snapshot.
+    """
+    return [filepath for filepath, stamp in new.items() if old.get(filepath) != stamp]
+
+
+class PollWaiter:
+    """
+    Waits a fixed interval between two scans.
+    """
+
+    name = 'poll'
+
+    def __init__(self, interval: float = WATCH_INTERVAL):
+        self.interval = interval
+
+    def add(self, directory: str) -> None:
+        """Polling needs no registration of directories."""
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Sleeps until the next scan.
+
+        Parameters:
+            timeout (Optional[float]): Seconds to sleep, the poll interval if None.
+
+        Returns:
+            bool: Always True, a scan is due.
+        """
+        time.sleep(self.interval if timeout is None else timeout)
+        return True
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class InotifyWaiter:
+    """
+    Waits for inotify events in the watched directories.
+
+    Directories are registered again on every scan, the kernel ignores duplicates and this picks
+    up new and recreated directories. If a directory can not be watched (e.g. the user limit of
+    watches is reached) the waiter falls back to waking up every interval as well.
+    """
+
+    name = 'inotify'
+
+    def __init__(self, interval: float = WATCH_INTERVAL):
+        """
+        Parameters:
+            interval (float): Poll interval used when a directory could not be watched.
+
+        Raises:
+            OSError: If inotify is not available.
+        """
+        # Only loaded when watching, ctypes is not cheap to import
+        import ctypes
+        import ctypes.util
+        import select
+
+        self.interval = interval
+        self.degraded = False
+        self._ctypes = ctypes
+        self._select = select.select
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def add(self, directory: str) -> None:
+        """
+        Watches a directory, not its subdirectories.
+
+        Parameters:
+            directory (str): The directory.
+        """
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(directory), INOTIFY_MASK) < 0:
+            errno = self._ctypes.get_errno()
+            if not self.degraded:
+                self.degraded = True
+                print(f"Could not watch {directory}: {os.strerror(errno)}, polling every {self.interval} s as well")
+            logIt(f"Could not watch {directory}: {os.strerror(errno)}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for events and consumes them.
+
+        Parameters:
+            timeout (Optional[float]): Seconds to wait at most. If None, waits until an event
+                arrives, or up to the poll interval if a directory could not be watched.
+
+        Returns:
+            bool: True if events arrived or a scan is due, False on a timeout without events.
+        """
+        scan_due = timeout is None and self.degraded
+        if scan_due:
+            timeout = self.interval
+        ready, _, _ = self._select([self._fd], [], [], timeout)
+        if not ready:
+            return scan_due
+        # The events only wake the loop up, the following scan finds out what changed
+        while True:
+            try:
+                if not os.read(self._fd, 65536):
+                    break
+            except BlockingIOError:
+                break
+        return True
+
+    def close(self) -> None:
+        """Releases the inotify instance."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def make_waiter(backend: str = 'auto', interval: float = WATCH_INTERVAL):
+    """
+    Creates the waiter of a watch backend.
+
+    Parameters:
+        backend (str): One of WATCH_BACKENDS, 'auto' uses inotify where available.
+        interval (float): Poll interval in seconds.
+
+    Returns:
+        PollWaiter | InotifyWaiter: The waiter.
+    """
+    if backend not in WATCH_BACKENDS:
+        raise ValueError(f"Unknown watch backend: {backend}")
+    if backend != 'poll' and sys.platform.startswith('linux'):
+        try:
+            return InotifyWaiter(interval)
+        except (OSError, AttributeError) as e:
+            if backend == 'inotify':
+                raise
+            logIt(f"inotify is not available, polling instead: {e}")
+    elif backend == 'inotify':
+        raise OSError(f"inotify is not available on {sys.platform}")
+    return PollWaiter(interval)
+
+
+def watch(collect: Callable[[Callable[[str], None]], Iterable[str]], process: Callable[[List[str]], Iterable[str]],
+          backend: str = 'auto', interval: float = WATCH_INTERVAL, debounce: float = WATCH_DEBOUNCE,
+          on_scan: Optional[Callable[[], None]] = None, directories: Iterable[str] = (),
+          cycles: Optional[int] = None) -> None:
+    """
+    Reprocesses changed files until interrupted.
+
+    Parameters:
+        collect (Callable): Returns the files to watch, called with a callback that receives
+            every searched directory.
+        process (Callable[[List[str]], Iterable[str]]): Processes a batch of changed files and
+            returns the paths it wrote, these are not reported as changes again.
+        backend (str): One of WATCH_BACKENDS.
+        interval (float): Poll interval in seconds.
+        debounce (float): Seconds without further changes before a batch is processed.
+        on_scan (Optional[Callable[[], None]]): Called before every scan, e.g. to reload a changed configuration.
+        directories (Iterable[str]): Further directories to watch, e.g. the one of the configuration file.
+        cycles (Optional[int]): Number of wake-ups before returning, None runs until interrupted.
+    """
+    waiter = make_waiter(backend, interval)
+    logIt(f"Watching with {waiter.name}, interval {interval} s, debounce {debounce} s")
+    try:
+        for directory in directories:
+            waiter.add(directory)
+        snapshot = take_snapshot(collect(waiter.add))
+        while cycles is None or cycles > 0:
+            if cycles is not None:
+                cycles -= 1
+            if not waiter.wait():
+                continue
+
+            # Let a burst of changes settle
+            deadline = time.monotonic() + WATCH_MAX_DELAY
+            if isinstance(waiter, PollWaiter):
+                current = take_snapshot(collect(waiter.add))
+                while changed_files(snapshot, current) and time.monotonic() < deadline:
+                    waiter.wait(debounce)
+                    settled = take_snapshot(collect(waiter.add))
+                    if settled == current:
+                        break
+                    current = settled
+                if on_scan is not None:
+                    on_scan()
+            else:
+                while waiter.wait(debounce) and time.monotonic() < deadline:
+                    pass
+                if on_scan is not None:
+                    on_scan()
+                current = take_snapshot(collect(waiter.add))
+
+            changed = changed_files(snapshot, current)
+            if changed:
+                logIt(f"Watch: {len(changed)} changed files")
+                written = list(process(changed))
+                # Our own writes are no changes
+                current.update(take_snapshot(changed + written))
+            snapshot = current
+    finally:
+        waiter.close()
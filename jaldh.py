@@ -1,125 +1,599 @@
-"""
-------------------------------
-Module: .\jaldh.py
-Description: Main execution file for jaldh (Just Another Little Doc Helper)
-    JALDH supports Python, C, C++, and auto-detection of language based on file extension.
-Author: Peter Jacobi
-Created: 2025-06-22
-------------------------------
-"""
-
-import argparse
-import os
-import sys
-from typing import Generator
-
-from core.jaldh_config import load_config, ensure_default_config
-from core.jaldh_fileparser import FileParser
-from core.jaldh_docwriter import extract_headers_and_write_doc
-from core.jaldh_logger import logIt
-
-VERSION = "0.1.0 Beta"
-
-# Define supported file extensions as a constant
-SUPPORTED_EXTENSIONS = ('.py', '.c', '.h', '.cpp', '.hpp', '.cc')
-
-
-def collect_files(base_path: str, recursive: bool) -> Generator[str, None, None]:
-    """
-    Collect files from a given directory based on supported extensions.
-
-    Parameters:
-        base_path (str): Base directory path.
-        recursive (bool): Whether to search subdirectories recursively.
-
-    Yields:
-        str: Absolute path to a matching file.
-    """
-    for root, dirs, files in os.walk(base_path):
-        for f in files:
-            if f.endswith(SUPPORTED_EXTENSIONS):
-                yield os.path.join(root, f)
-        if not recursive:
-            break
-
-
-def main():
-    """
-    Main script execution function. Handles argument parsing and processing.
-    """
-    print(f"jaldh (Just-Another-Little-Doc-Helper) - Version {VERSION}")
-    logIt(f"Starting jaldh {VERSION} with arguments: {sys.argv[1:]}...")
-
-    parser = argparse.ArgumentParser(description='jaldh - Just Another Little Doc Helper')
-    parser.add_argument('--source', '-s', help='Path to source file or directory')
-    parser.add_argument('--lang', '-l', choices=['python', 'c', 'cpp', 'auto'], default='auto', help='Source language')
-    parser.add_argument('--config', '-c', default='config.yaml', help='Path to config file')
-    parser.add_argument('-a', action='store_true', help='Apply to all files in current directory')
-    parser.add_argument('-r', action='store_true', help='Apply recursively to subdirectories')
-    parser.add_argument('-o', metavar='PREFIX', help='Write output to new files with prefix')
-    parser.add_argument('--doc', metavar='FILENAME', help='Write collected documentation to FILENAME ')
-
-    args = parser.parse_args()
-
-    # Validate input arguments
-    if not args.a and not args.r and not args.source:
-        parser.error("--source (-s) is required unless -a or -r is specified.")
-
-    # Ensure default configuration exists or is loaded
-    try:
-        config = ensure_default_config(args.config)
-    except FileNotFoundError:
-        print(f"Configuration file not found: {args.config} and can not be created. ... System error! exiting.")
-        logIt("Configuration file not found and cant be created. This is a fatal error.")
-        sys.exit(1)
-
-    # Collect target files
-    targets = []
-    try:
-        if args.a or args.r:
-            base_path = args.source or '.'
-            targets = list(collect_files(base_path, recursive=args.r))
-        elif os.path.isfile(args.source):
-            targets = [args.source]
-        else:
-            print("Invalid source path or missing flags (-a / -r) for directory processing.")
-            return
-    except Exception as e:
-        print(f"Error while collecting files: {e}")
-        logIt(f"Error while collecting files: {e}")
-        sys.exit(1)
-
-    # Process documentation writing
-    if args.doc:
-        try:
-            extract_headers_and_write_doc(targets, args.doc)
-        except Exception as e:
-            print(f"Error while writing documentation: {e}")
-            logIt(f"Error while writing documentation: {e}")
-        return
-
-    # Process target files
-    for filepath in targets:
-        try:
-            fparser = FileParser(config)
-            new_content = fparser.parse_file_and_insert_headers(filepath, args.lang, config, dry_run=bool(args.o))
-            if new_content is None:
-                continue
-
-            if args.o:
-                dir_name = os.path.dirname(filepath)
-                base_name = os.path.basename(filepath)
-                output_path = os.path.join(dir_name, f"{args.o}{base_name}")
-                with open(output_path, 'w') as f:
-                    f.write(new_content)
-            else:
-                with open(filepath, 'w') as f:
-                    f.write(new_content)
-        except Exception as e:
-            print(f"Error processing file {filepath}: {e}")
-            logIt(f"Error processing file {filepath}: {e}")
-
-
-if __name__ == '__main__':
-    main()
+"""
+------------------------------
+Module: .\jaldh.py
+Description: Main execution file for jaldh (Just Another Little Doc Helper)
+    JALDH supports Python, C, C++, and auto-detection of language based on file extension.
+Author: Peter Jacobi
+Created: 2025-06-22
+------------------------------
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+from typing import Callable, Generator, Iterable, Iterator, List, Optional
+
+from core.jaldh_backends import BackendError, get_registry
+from core.jaldh_cache import CACHE_FILE, CacheManifest, config_hash
+from core.jaldh_config import ConfigResolver, load_config, ensure_default_config
+from core.jaldh_filelist import files_from
+from core.jaldh_git import git_changed_files
+from core.jaldh_runner import EXECUTORS, FileResult, process_targets
+from core.jaldh_docindex import DOC_INDEX_FILE, REPORT_FORMATS, write_indexed_doc
+from core.jaldh_logger import configure as configure_logging, logIt
+from core.jaldh_stats import STATS_FORMATS, RunStats
+from core.jaldh_walker import SYMLINK_POLICIES, prune_dirs_from, walk_files
+from core.jaldh_watch import WATCH_BACKENDS, WATCH_INTERVAL, watch
+
+VERSION = "0.1.0 Beta"
+
+# Extensions of the built-in languages, languages from the configuration add their own (see core.jaldh_backends)
+SUPPORTED_EXTENSIONS = get_registry().extensions
+
+# Output of --check, quiet only sets the exit status and stops at the first failing file
+CHECK_FORMATS = ('text', 'json', 'quiet')
+
+
+def collect_files(base_path: str, recursive: bool, config: Optional[dict] = None, max_depth: Optional[int] = None,
+                  symlinks: Optional[str] = None,
+                  on_directory: Optional[Callable[[str], None]] = None) -> Generator[str, None, None]:
+    """
+    Collect files from a given directory based on the extensions of the registered languages.
+
+    Version control, build and vendored directories are pruned, .gitignore/.jaldhignore files
+    and the 'walk' section of the configuration are honoured (see core.jaldh_walker).
+
+    Parameters:
+        base_path (str): Base directory path.
+        recursive (bool): Whether to search subdirectories recursively.
+        config (Optional[dict]): Loaded configuration, provides exclude globs, pruned directories, the symlink
+            policy and further languages.
+        max_depth (Optional[int]): Deepest subdirectory level to enter when recursive, None is unlimited.
+        symlinks (Optional[str]): Symlink policy, overrides the configuration.
+        on_directory (Optional[Callable[[str], None]]): Called with every searched directory.
+
+    Yields:
+        str: Absolute path to a matching file.
+    """
+    walk_config = (config or {}).get('walk') or {}
+    yield from walk_files(base_path, get_registry(config).extensions,
+                          max_depth=max_depth if recursive else 0,
+                          symlinks=symlinks or walk_config.get('symlinks', 'files'),
+                          exclude=walk_config.get('exclude') or (),
+                          prune_dirs=prune_dirs_from(walk_config.get('prune') or ()),
+                          on_directory=on_directory)
+
+
+def main():
+    """
+    Main script execution function. Handles argument parsing and processing.
+    """
+    logIt(f"Starting jaldh {VERSION} with arguments: {sys.argv[1:]}...")
+
+    parser = argparse.ArgumentParser(description='jaldh - Just Another Little Doc Helper')
+    parser.add_argument('--source', '-s', help='Path to source file or directory')
+    parser.add_argument('--lang', '-l', default='auto',
+                        help='Source language: python, c, cpp, a language from the configuration or auto (default)')
+    parser.add_argument('--config', '-c', default='config.yaml', help='Path to config file')
+    parser.add_argument('-a', action='store_true', help='Apply to all files in current directory')
+    parser.add_argument('-r', action='store_true', help='Apply recursively to subdirectories')
+    parser.add_argument('-o', metavar='PREFIX', help='Write output to new files with prefix')
+    parser.add_argument('--diff', nargs='?', const='-', metavar='FILE',
+                        help='Write the changes as one unified diff to FILE (default stdout) instead of changing the '
+                             'files, apply it with git apply or patch -p1')
+    parser.add_argument('--doc', metavar='FILENAME', help='Write collected documentation to FILENAME ')
+    parser.add_argument('--doc-index', nargs='?', const=DOC_INDEX_FILE, metavar='FILE',
+                        help=f'Keep the extracted documentation in the SQLite index FILE (default {DOC_INDEX_FILE}), '
+                             'only changed files are extracted again')
+    parser.add_argument('--doc-format', choices=REPORT_FORMATS, default='text',
+                        help='Format of the --doc report, markdown and json also list functions and classes')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Number of parallel workers (0 = one per CPU, default 1)')
+    parser.add_argument('--executor', choices=EXECUTORS, default='process',
+                        help='Worker pool type for --jobs, use thread on network filesystems')
+    parser.add_argument('--cache', nargs='?', const=CACHE_FILE, metavar='FILE',
+                        help=f'Skip files unchanged since the last run, using the manifest FILE (default {CACHE_FILE})')
+    parser.add_argument('--max-depth', type=int, metavar='N',
+                        help='Deepest subdirectory level to enter with -r (0 = only the start directory)')
+    parser.add_argument('--symlinks', choices=SYMLINK_POLICIES,
+                        help='Symlinks to follow while collecting files: skip, files (default) or follow (also directories)')
+    parser.add_argument('--stats', nargs='?', const='text', choices=STATS_FORMATS,
+                        help='Report per-phase and per-file timings as text (default) or json')
+    parser.add_argument('--stats-top', type=int, default=10, metavar='N', help='Number of slowest files in --stats')
+    parser.add_argument('--stats-file', metavar='FILE', help='Write the --stats report to FILE instead of stdout')
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument('--changed-since', metavar='REF',
+                           help='Only process files changed since the git REF (commit, branch or tag), untracked files included')
+    selection.add_argument('--staged', action='store_true', help='Only process files staged in git (pre-commit hooks)')
+    selection.add_argument('--files-from', metavar='PATH',
+                           help='Process the files listed in PATH (- for stdin), separated by newlines or NUL bytes, '
+                                'e.g. from find -print0 or git ls-files -z')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and process files again when they change (stop with Ctrl+C)')
+    parser.add_argument('--watch-interval', type=float, default=WATCH_INTERVAL, metavar='SECONDS',
+                        help=f'Poll interval of --watch (default {WATCH_INTERVAL})')
+    parser.add_argument('--watch-backend', choices=WATCH_BACKENDS, default='auto',
+                        help='Change detection of --watch: inotify (Linux), poll, or auto (inotify where available)')
+    parser.add_argument('--check', nargs='?', const='text', choices=CHECK_FORMATS,
+                        help='Only report missing documentation as file:line (text, default), json or quiet, '
+                             'nothing is written; exits with 1 if anything is missing')
+    parser.add_argument('--serve', action='store_true',
+                        help='Answer JSON lines requests with in-memory sources on stdin/stdout (editor integration)')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Profile the run with cProfile and dump the stats to FILE (worker processes are not profiled)')
+
+    args = parser.parse_args()
+    # Keep machine readable output clean, with a patch on stdout everything else goes to stderr
+    if args.check not in ('json', 'quiet') and not args.serve and args.diff != '-':
+        print(f"jaldh (Just-Another-Little-Doc-Helper) - Version {VERSION}")
+
+    # Validate input arguments
+    git_selection = args.changed_since is not None or args.staged
+    if args.serve and (args.source or args.a or args.r or git_selection or args.files_from or args.o or args.diff
+                       or args.doc or args.check or args.watch or args.cache or args.stats):
+        parser.error("--serve reads its sources from stdin and can only be combined with --lang, --config and --profile.")
+    if args.files_from and (args.source or args.a or args.r or args.max_depth is not None or args.watch):
+        parser.error("--files-from can not be combined with --source, -a, -r, --max-depth or --watch.")
+    if not args.a and not args.r and not args.source and not git_selection and not args.files_from and not args.serve:
+        parser.error("--source (-s) is required unless -a, -r, --changed-since, --staged or --files-from is specified.")
+    if git_selection and args.source and not os.path.isdir(args.source):
+        parser.error("--changed-since and --staged need a directory as --source.")
+    if git_selection and args.watch:
+        parser.error("--watch can not be combined with --changed-since or --staged.")
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive number.")
+    if args.cache and args.o:
+        parser.error("--cache can not be combined with -o.")
+    if args.max_depth is not None and args.max_depth < 0:
+        parser.error("--max-depth must be 0 or a positive number.")
+    if args.stats_top < 0:
+        parser.error("--stats-top must be 0 or a positive number.")
+    if (args.doc_index or args.doc_format != 'text') and not args.doc:
+        parser.error("--doc-index and --doc-format need --doc.")
+    if args.doc_index and args.cache:
+        parser.error("--doc-index can not be combined with --cache, the index is incremental itself.")
+    if args.watch and (args.doc or args.stats):
+        parser.error("--watch can not be combined with --doc or --stats.")
+    if args.watch_interval <= 0:
+        parser.error("--watch-interval must be a positive number.")
+    if args.check and (args.o or args.doc or args.watch or args.cache):
+        parser.error("--check can not be combined with -o, --doc, --watch or --cache.")
+    if args.diff and (args.o or args.doc or args.check or args.watch or args.cache):
+        parser.error("--diff can not be combined with -o, --doc, --check, --watch or --cache.")
+
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run, args)
+        finally:
+            profiler.dump_stats(args.profile)
+            print(f"Profile written to {args.profile}", file=sys.stderr if args.diff == '-' else sys.stdout)
+    else:
+        run(args)
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    Processes the targets selected by the parsed command line arguments.
+
+    Parameters:
+        args (argparse.Namespace): The validated arguments of main().
+    """
+    stats = RunStats() if args.stats else None
+    try:
+        _run(args, stats)
+    finally:
+        if stats is not None:
+            stats.finish()
+            report = stats.format(args.stats, args.stats_top)
+            if args.stats_file:
+                try:
+                    with open(args.stats_file, 'w', encoding='utf-8') as f:
+                        f.write(report + '\n')
+                except OSError as e:
+                    print(f"Error while writing statistics to {args.stats_file}: {e}")
+                    logIt(f"Error while writing statistics to {args.stats_file}: {e}")
+            else:
+                print(report, file=sys.stderr if args.diff == '-' else sys.stdout)
+
+
+def _run(args: argparse.Namespace, stats: Optional[RunStats]) -> None:
+    """Implements run(), phases are timed into stats if not None."""
+    phase = stats.phase if stats is not None else _untimed
+
+    # Ensure default configuration exists or is loaded
+    try:
+        with phase('config'):
+            config = ensure_default_config(args.config)
+    except FileNotFoundError:
+        print(f"Configuration file not found: {args.config} and can not be created. ... System error! exiting.")
+        logIt("Configuration file not found and cant be created. This is a fatal error.")
+        sys.exit(1)
+    configure_logging(config.get('logging'))
+
+    # Languages of the configuration, their backends are only imported for their first file
+    try:
+        registry = get_registry(config)
+    except BackendError as e:
+        print(f"Invalid language configuration in {args.config}: {e}")
+        logIt(f"Invalid language configuration in {args.config}: {e}")
+        sys.exit(1)
+    if args.lang != 'auto' and args.lang not in registry.specs:
+        print(f"Unknown language: {args.lang}, known are {', '.join(registry.specs)} and auto")
+        logIt(f"Unknown language: {args.lang}")
+        sys.exit(1)
+
+    if args.serve:
+        serve_requests(args, config)
+        return
+
+    # Collect target files, the walker and --files-from hand them out while they are processed
+    targets: Iterable[str] = []
+    try:
+        if args.files_from:
+            targets = _lazy_selection(files_from(args.files_from, registry.extensions), stats)
+        elif args.changed_since is not None or args.staged:
+            # Ask git instead of walking, recursive unless only -a is given
+            walk_config = config.get('walk') or {}
+            with phase('collect'):
+                targets = git_changed_files(args.source or '.', registry.extensions, since=args.changed_since,
+                                            staged=args.staged, max_depth=0 if args.a and not args.r else args.max_depth,
+                                            exclude=walk_config.get('exclude') or (),
+                                            prune_dirs=prune_dirs_from(walk_config.get('prune') or ()))
+        elif args.a or args.r:
+            base_path = args.source or '.'
+            targets = _lazy_selection(collect_files(base_path, recursive=args.r, config=config,
+                                                    max_depth=args.max_depth, symlinks=args.symlinks), stats)
+        elif os.path.isfile(args.source):
+            targets = [args.source]
+        else:
+            print("Invalid source path or missing flags (-a / -r) for directory processing.")
+            return
+    except Exception as e:
+        print(f"Error while collecting files: {e}")
+        logIt(f"Error while collecting files: {e}")
+        sys.exit(1)
+
+    # Load the manifest of files processed by earlier runs
+    manifest = None
+    if args.cache:
+        if args.doc:
+            manifest = CacheManifest(args.cache, config_hash({}, 'doc', VERSION))
+        else:
+            manifest = CacheManifest(args.cache, config_hash(config, args.lang, VERSION))
+
+    # Process documentation writing
+    if args.doc:
+        try:
+            with phase('doc'):
+                if args.doc_index or args.doc_format != 'text':
+                    # The index is updated before the report is written, both need the whole list
+                    write_indexed_doc(list(targets), args.doc, args.doc_index or ':memory:', args.doc_format,
+                                      jobs=args.jobs, executor=args.executor, registry=registry, stats=stats)
+                else:
+                    from core.jaldh_docwriter import extract_headers_and_write_doc
+                    extract_headers_and_write_doc(targets, args.doc, manifest, stats)
+        except Exception as e:
+            print(f"Error while writing documentation: {e}")
+            logIt(f"Error while writing documentation: {e}")
+        finally:
+            if manifest is not None:
+                manifest.save()
+        return
+
+    # Files are processed with the configuration of their directory (.jaldh.yaml files)
+    resolver = ConfigResolver(config, roots=_config_roots(args))
+
+    if args.check:
+        # Closing the results early skips the remaining files in quiet mode
+        check = 'first' if args.check == 'quiet' else 'all'
+        with phase('check'), contextlib.closing(process_targets(targets, config, args.lang, jobs=args.jobs,
+                                                                executor=args.executor, stats=stats is not None,
+                                                                resolver=resolver, check=check)) as results:
+            passed = report_check(results, args.check, stats)
+        if not passed:
+            sys.exit(1)
+        return
+
+    if args.diff:
+        try:
+            with phase('process'):
+                write_patch(process_targets(targets, config, args.lang, jobs=args.jobs, executor=args.executor,
+                                            stats=stats is not None, resolver=resolver, diff=True), args.diff, stats)
+        except OSError as e:
+            print(f"Error while writing the patch to {args.diff}: {e}")
+            logIt(f"Error while writing the patch to {args.diff}: {e}")
+            sys.exit(1)
+        return
+    config_keys = {}
+
+    def config_key(filepath: str) -> str:
+        """Hashes the configuration of a file, once per distinct configuration."""
+        file_config = resolver.for_file(filepath)
+        key = config_keys.get(id(file_config))
+        if key is None:
+            key = config_keys[id(file_config)] = config_hash(file_config, args.lang, VERSION)
+        return key
+
+    def uncached(files: Iterable[str]) -> Iterator[str]:
+        """Skips files that were already processed under the same configuration."""
+        total = unchanged = 0
+        for filepath in files:
+            total += 1
+            with phase('cache'):
+                is_unchanged = manifest.is_unchanged('headers', filepath, config_key(filepath))
+            if is_unchanged:
+                unchanged += 1
+                continue
+            yield filepath
+        logIt(f"Skipping {unchanged} of {total} files unchanged since the last run")
+
+    if manifest is not None:
+        targets = uncached(targets)
+
+    # Paths written with the -o prefix, never treated as sources in watch mode
+    generated = set()
+
+    def process(batch: Iterable[str]) -> List[str]:
+        """Processes a batch of files, reports the results in batch order and returns the written paths."""
+        written = []
+        skipped = 0
+        try:
+            for result in process_targets(batch, config, args.lang, prefix=args.o, jobs=args.jobs,
+                                          executor=args.executor, stamp=manifest is not None,
+                                          stats=stats is not None, resolver=resolver):
+                for message in result.messages:
+                    print(message)
+                if manifest is not None and result.stamp is not None:
+                    manifest.record('headers', result.filepath, result.stamp, config_key=config_key(result.filepath))
+                if stats is not None and result.stats is not None:
+                    stats.add_file(result.filepath, result.stats)
+                if result.skipped:
+                    skipped += 1
+                if result.output_path is not None:
+                    written.append(result.output_path)
+                    if args.o:
+                        generated.add(result.output_path)
+        finally:
+            if manifest is not None:
+                manifest.save()
+        if skipped:
+            print(f"Skipped {skipped} binary, generated or oversized files, see the log for details")
+        return written
+
+    # Process target files
+    with phase('process'):
+        process(targets)
+    if not args.watch:
+        return
+
+    def collect(on_directory: Callable[[str], None]) -> List[str]:
+        """Collects the watched files like the first pass did."""
+        if args.a or args.r:
+            files = collect_files(args.source or '.', recursive=args.r, config=config, max_depth=args.max_depth,
+                                  symlinks=args.symlinks, on_directory=on_directory)
+        else:
+            on_directory(os.path.dirname(os.path.abspath(args.source)))
+            files = [args.source]
+        return [filepath for filepath in files if filepath not in generated]
+
+    def reload_config() -> None:
+        """Picks up changed configuration files, unchanged ones are not parsed again."""
+        nonlocal config, resolver
+        try:
+            new_config = load_config(args.config)
+            if not isinstance(new_config, dict):
+                raise ValueError("not a mapping")
+        except Exception as e:
+            print(f"Keeping the previous configuration, {args.config} can not be loaded: {e}")
+            logIt(f"Keeping the previous configuration, {args.config} can not be loaded: {e}")
+            return
+        if new_config is config:
+            resolver.clear()
+            return
+        config = new_config
+        configure_logging(config.get('logging'))
+        resolver = ConfigResolver(config, roots=_config_roots(args))
+        config_keys.clear()
+        if manifest is not None:
+            manifest.config_key = config_hash(config, args.lang, VERSION)
+        print(f"Configuration reloaded from {args.config}")
+        logIt(f"Configuration reloaded from {args.config}")
+
+    print("Watching for changes, press Ctrl+C to stop ...")
+    try:
+        watch(collect, process, backend=args.watch_backend, interval=args.watch_interval, on_scan=reload_config,
+              directories=[os.path.dirname(os.path.abspath(args.config))])
+    except KeyboardInterrupt:
+        print("Watch stopped.")
+        logIt("Watch stopped")
+
+
+def serve_requests(args: argparse.Namespace, config: dict) -> None:
+    """
+    Runs the --serve loop until stdin ends, see core.jaldh_api.serve().
+
+    Changed configuration files are picked up before every request. Anything printed while
+    answering goes to stderr, stdout only carries the responses.
+
+    Parameters:
+        args (argparse.Namespace): The validated arguments of main().
+        config (dict): The loaded run configuration.
+    """
+    from core.jaldh_api import serve
+
+    resolver = ConfigResolver(config, roots=_config_roots(args))
+
+    def get_resolver() -> ConfigResolver:
+        """Returns the resolver of the current configuration, unchanged files are not parsed again."""
+        nonlocal config, resolver
+        try:
+            new_config = load_config(args.config)
+        except Exception as e:
+            logIt(f"Keeping the previous configuration, {args.config} can not be loaded: {e}")
+            return resolver
+        if new_config is config or not isinstance(new_config, dict):
+            resolver.clear()
+        else:
+            config = new_config
+            configure_logging(config.get('logging'))
+            resolver = ConfigResolver(config, roots=_config_roots(args))
+        return resolver
+
+    responses = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        count = serve(sys.stdin, responses, args.lang, get_resolver)
+    logIt(f"Served {count} requests")
+
+
+def report_check(results: Iterator[FileResult], fmt: str, stats: Optional[RunStats] = None) -> bool:
+    """
+    Reports the results of a --check run.
+
+    Parameters:
+        results (Iterator[FileResult]): The check results, see core.jaldh_runner.check_file().
+        fmt (str): One of CHECK_FORMATS. quiet prints nothing and stops at the first failing file.
+        stats (Optional[RunStats]): Run statistics the file timings are added to, None without --stats.
+
+    Returns:
+        bool: True if every file was checked and nothing is missing. Files skipped by the prefilter
+            are listed but do not fail the check.
+    """
+    missing = []
+    errors = []
+    skipped = []
+    checked = failed = 0
+    for result in results:
+        if stats is not None and result.stats is not None:
+            stats.add_file(result.filepath, result.stats)
+        if result.skipped:
+            skipped.append({'file': result.filepath, 'reason': result.skipped})
+            if fmt == 'text':
+                print(f"{result.filepath}: skipped, {result.skipped}")
+            continue
+        checked += 1
+        if result.gaps is None:
+            errors.append({'file': result.filepath, 'messages': result.messages})
+        else:
+            missing.extend({'file': result.filepath, 'line': gap.line, 'kind': gap.kind,
+                            'name': '' if gap.kind == 'module' else gap.name} for gap in result.gaps)
+        if result.gaps is None or result.gaps:
+            failed += 1
+            if fmt == 'quiet':
+                break
+        if fmt == 'text':
+            for message in result.messages:
+                print(message)
+            for gap in result.gaps or ():
+                if gap.kind == 'module':
+                    print(f"{result.filepath}:{gap.line}: missing module header")
+                else:
+                    print(f"{result.filepath}:{gap.line}: missing documentation for {gap.kind} {gap.name}")
+
+    if fmt == 'json':
+        print(json.dumps({'checked': checked, 'failed': failed, 'missing': missing, 'errors': errors,
+                          'skipped': skipped}, indent=2))
+    elif fmt == 'text':
+        if failed:
+            print(f"{len(missing)} missing, {len(errors)} errors in {failed} of {checked} files")
+        else:
+            print(f"{checked} files checked, nothing missing")
+        if skipped:
+            print(f"{len(skipped)} files skipped by the prefilter, not checked")
+    logIt(f"Check: {len(missing)} missing, {len(errors)} errors in {failed} of {checked} files, {len(skipped)} skipped")
+    return not failed
+
+
+def write_patch(results: Iterator[FileResult], output: str, stats: Optional[RunStats] = None) -> int:
+    """
+    Writes the patches of a --diff run as one unified diff, in target order.
+
+    Each patch is written as soon as its file is done, files without changes add nothing.
+    While the patch goes to stdout, messages are printed to stderr.
+
+    Parameters:
+        results (Iterator[FileResult]): The results of process_targets() with diff set.
+        output (str): File to write, '-' for stdout.
+        stats (Optional[RunStats]): Receives the per-file timings with --stats.
+
+    Returns:
+        int: Number of changed files in the patch.
+
+    Raises:
+        OSError: If the output can not be written.
+    """
+    to_stdout = output == '-'
+    out = sys.stdout.buffer if to_stdout else open(output, 'wb')
+    changed = skipped = 0
+    try:
+        with contextlib.redirect_stdout(sys.stderr) if to_stdout else contextlib.nullcontext():
+            for result in results:
+                for message in result.messages:
+                    print(message)
+                if stats is not None and result.stats is not None:
+                    stats.add_file(result.filepath, result.stats)
+                if result.skipped:
+                    skipped += 1
+                if result.patch:
+                    out.write(result.patch)
+                    changed += 1
+            if skipped:
+                print(f"Skipped {skipped} binary, generated or oversized files, see the log for details")
+    finally:
+        if to_stdout:
+            out.flush()
+        else:
+            out.close()
+    logIt(f"Patch with {changed} changed files written to {'stdout' if to_stdout else output}")
+    return changed
+
+
+def _lazy_selection(files: Iterable[str], stats: Optional[RunStats]) -> Iterator[str]:
+    """
+    Hands out lazily selected files, the time spent selecting them counts as the 'collect' phase.
+
+    Errors while selecting end the run like errors of the eager selections do.
+
+    Parameters:
+        files (Iterable[str]): The lazy selection, e.g. collect_files() or files_from().
+        stats (Optional[RunStats]): Run statistics, None without --stats.
+
+    Yields:
+        str: The selected files.
+    """
+    try:
+        yield from stats.timed('collect', files) if stats is not None else files
+    except Exception as e:
+        print(f"Error while collecting files: {e}")
+        logIt(f"Error while collecting files: {e}")
+        sys.exit(1)
+
+
+def _config_roots(args: argparse.Namespace) -> List[str]:
+    """
+    Returns the directories the .jaldh.yaml lookup does not climb above, see ConfigResolver.
+
+    Parameters:
+        args (argparse.Namespace): The validated arguments of main().
+
+    Returns:
+        List[str]: The directory of the configuration file and the source directory.
+    """
+    source = args.source or '.'
+    if os.path.isfile(source):
+        source = os.path.dirname(source) or '.'
+    return [os.path.dirname(os.path.abspath(args.config)), source]
+
+
+@contextlib.contextmanager
+def _untimed(name: str) -> Iterator[None]:
+    """Stand-in for RunStats.phase() without --stats."""
+    yield
+
+
+if __name__ == '__main__':
+    main()
     
\ No newline at end of file